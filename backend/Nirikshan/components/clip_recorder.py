@@ -0,0 +1,142 @@
+import collections
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import cv2
+
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.components.metrics import ARTIFACTS_TOTAL
+from Nirikshan.constant.application import CLIP_ENCODER_QUEUE_SIZE
+from Nirikshan.logger import logging
+
+
+class ClipRecorder:
+    """
+    Encodes an accident clip while the incident is still going on: start()
+    writes the pre-roll, append() adds frames as they arrive and finish()
+    closes the file after the post-roll. Encoding runs on a thread per clip
+    fed by a bounded queue, so memory stays flat however long the clip is.
+    """
+    STATS_WINDOW = 1000
+
+    def __init__(self, queue_size: int = CLIP_ENCODER_QUEUE_SIZE):
+        self.queue_size = max(1, queue_size)
+        self.path: Optional[Path] = None
+        self.frames_recorded = 0
+        self.clips_finished = 0
+        self.failures = 0
+        self._frames: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._encoders: List[threading.Thread] = []
+        self._finished = collections.deque()
+        self._lock = threading.Lock()
+        self._encode_times = collections.deque(maxlen=self.STATS_WINDOW)
+
+    @property
+    def recording(self) -> bool:
+        return self._thread is not None
+
+    def start(self, path, fps: float, pre_roll: Iterable = ()):
+        """
+        Opens a new clip and queues the pre-roll frames (copied, so a reused ring buffer may move on).
+
+        :param path: Destination mp4 file
+        :param fps: Frame rate of the clip
+        :param pre_roll: Frames recorded before the incident, oldest first
+        """
+        if self.recording:
+            self.finish()
+        self.path = Path(path)
+        self.frames_recorded = 0
+        self._frames = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._encode, args=(self._frames, self.path, fps),
+                                        name=f"clip-{self.path.stem}", daemon=True)
+        self._thread.start()
+        with self._lock:
+            self._encoders = [thread for thread in self._encoders if thread.is_alive()]
+            self._encoders.append(self._thread)
+        for frame in pre_roll:
+            self.append(frame.copy())
+        logging.info(f"Recording accident clip {self.path} ({self.frames_recorded} pre-roll frames)")
+
+    def append(self, frame):
+        """Queues a frame for the open clip; the frame must not be modified afterwards."""
+        if not self.recording:
+            return
+        self._frames.put(frame)
+        self.frames_recorded += 1
+
+    def finish(self) -> Optional[Path]:
+        """Closes the open clip once its queued frames are written; returns its path."""
+        if not self.recording:
+            return None
+        self._frames.put(None)
+        self._thread = None
+        self._frames = None
+        return self.path
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every clip finished so far is fully written; returns False on timeout."""
+        with self._lock:
+            encoders = [thread for thread in self._encoders if thread is not self._thread]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in encoders:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in encoders)
+
+    def poll_finished(self) -> List[Path]:
+        """Returns the clips fully written since the last call."""
+        finished = []
+        while self._finished:
+            finished.append(self._finished.popleft())
+        return finished
+
+    def _encode(self, frames: queue.Queue, path: Path, fps: float):
+        writer = None
+        failed = False
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    break
+                started = time.perf_counter()
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                    writer = cv2.VideoWriter(str(path), fourcc, fps, (width, height))
+                writer.write(frame)
+                with self._lock:
+                    self._encode_times.append(time.perf_counter() - started)
+        except Exception as e:
+            failed = True
+            with self._lock:
+                self.failures += 1
+            logging.error(f"Failed to record clip {path}: {str(e)}")
+            # keep draining so the producer never blocks on a dead encoder
+            while frames.get() is not None:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+        if writer is not None and not failed:
+            with self._lock:
+                self.clips_finished += 1
+            ARTIFACTS_TOTAL.labels("clip").inc()
+            self._finished.append(path)
+            logging.info(f"Clip saved: {path}")
+
+    def stats(self) -> dict:
+        frames = self._frames
+        with self._lock:
+            return {
+                "recording": self.recording,
+                "path": str(self.path) if self.recording else None,
+                "frames_recorded": self.frames_recorded if self.recording else 0,
+                "queue_depth": frames.qsize() if frames is not None else 0,
+                "clips_finished": self.clips_finished,
+                "failures": self.failures,
+                "encode_ms": summarize_timings(self._encode_times),
+            }
@@ -0,0 +1,224 @@
+import collections
+import os
+import queue
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+
+from Nirikshan.components.incident_catalog import IncidentCatalog
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.components.metrics import ARTIFACTS_TOTAL
+from Nirikshan.constant.application import EVIDENCE_QUEUE_SIZE, INCIDENT_DB_PATH
+from Nirikshan.logger import logging
+
+ACCIDENT_IMAGES_DIR = Path("accident_images")
+PUBLIC_IMAGES_DIR = Path("../frontend/public/accident_images")
+
+
+def publish_file(path: Path, link_dir: Path) -> Path:
+    """
+    Exposes a written file in another directory without a second copy: a
+    hardlink where possible, a copy only across filesystems.
+    """
+    target = Path(link_dir) / Path(path).name
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copy2(path, target)
+    return target
+
+
+class _EvidenceJob:
+    __slots__ = ("path", "payload", "options", "on_written", "submitted_at")
+
+    def __init__(self, path, payload, options, on_written):
+        self.path = Path(path)
+        self.payload = payload
+        self.options = options
+        self.on_written = on_written
+        self.submitted_at = time.perf_counter()
+
+
+class EvidenceWriter:
+    """
+    Encodes and persists accident images on a background thread so detection
+    never waits on disk. The queue is bounded: when it is full the caller
+    blocks until there is room rather than losing evidence. Clips are not
+    written here; ClipRecorder encodes them while the incident is in progress.
+    """
+    STATS_WINDOW = 1000
+
+    def __init__(self, max_queue: int = EVIDENCE_QUEUE_SIZE):
+        self._jobs = queue.Queue(maxsize=max(1, max_queue))
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.images_written = 0
+        self.failures = 0
+        self.blocked_submits = 0
+        self._write_times = collections.deque(maxlen=self.STATS_WINDOW)
+        self._queue_waits = collections.deque(maxlen=self.STATS_WINDOW)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Writes everything still queued, then stops the thread."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._jobs.put(None)
+        thread.join(timeout)
+
+    def _submit(self, job: _EvidenceJob):
+        self.start()
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full:
+            with self._stats_lock:
+                self.blocked_submits += 1
+            logging.warning(f"Evidence queue full, waiting to queue {job.path.name}")
+            self._jobs.put(job)
+
+    def save_image(self, frame, path, link_dir: Optional[Path] = None, quality: int = 95,
+                   on_written: Optional[Callable] = None):
+        """
+        Queues a frame to be written as a JPEG.
+
+        :param frame: BGR frame, owned by the writer from now on
+        :param path: Destination file
+        :param link_dir: Optional directory to expose the file in (hardlinked)
+        :param quality: JPEG quality
+        :param on_written: Optional callback run with the path once the file exists
+        """
+        self._submit(_EvidenceJob(path, frame, {"link_dir": link_dir, "quality": quality}, on_written))
+
+    def _write_image(self, job: _EvidenceJob):
+        ok, buffer = cv2.imencode('.jpg', job.payload, [cv2.IMWRITE_JPEG_QUALITY, job.options["quality"]])
+        if not ok:
+            raise RuntimeError(f"Could not encode {job.path.name}")
+        temporary = job.path.with_name(job.path.name + ".part")
+        with open(temporary, "wb") as f:
+            f.write(buffer.tobytes())
+        os.replace(temporary, job.path)
+        if job.options["link_dir"] is not None:
+            publish_file(job.path, job.options["link_dir"])
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            started = time.perf_counter()
+            try:
+                self._write_image(job)
+            except Exception as e:
+                with self._stats_lock:
+                    self.failures += 1
+                logging.error(f"Failed to write evidence {job.path}: {str(e)}")
+            else:
+                finished = time.perf_counter()
+                with self._stats_lock:
+                    self.images_written += 1
+                    self._queue_waits.append(started - job.submitted_at)
+                    self._write_times.append(finished - started)
+                ARTIFACTS_TOTAL.labels("image").inc()
+                logging.info(f"Evidence saved: {job.path}")
+            finally:
+                job.payload = None
+                if job.on_written is not None:
+                    try:
+                        job.on_written(job.path)
+                    except Exception as e:
+                        logging.error(f"Evidence callback failed for {job.path}: {str(e)}")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "running": self._thread is not None,
+                "queue_depth": self._jobs.qsize(),
+                "max_queue": self._jobs.maxsize,
+                "images_written": self.images_written,
+                "failures": self.failures,
+                "blocked_submits": self.blocked_submits,
+                "queue_wait_ms": summarize_timings(self._queue_waits),
+                "write_ms": summarize_timings(self._write_times),
+            }
+
+
+_shared_lock = threading.Lock()
+_shared_writer: Optional[EvidenceWriter] = None
+_shared_catalog: Optional[IncidentCatalog] = None
+
+
+def shared_evidence() -> Tuple[EvidenceWriter, IncidentCatalog]:
+    """
+    The evidence writer and incident catalog of this process, created on first
+    use, so a camera worker process only opens them once it saves an image.
+    """
+    global _shared_writer, _shared_catalog
+    with _shared_lock:
+        if _shared_writer is None:
+            ACCIDENT_IMAGES_DIR.mkdir(exist_ok=True)
+            PUBLIC_IMAGES_DIR.mkdir(exist_ok=True, parents=True)
+            _shared_writer = EvidenceWriter()
+            _shared_catalog = IncidentCatalog(INCIDENT_DB_PATH)
+        return _shared_writer, _shared_catalog
+
+
+def close_shared_evidence():
+    """Writes what is still queued and closes the catalog, if this process opened them."""
+    global _shared_writer, _shared_catalog
+    with _shared_lock:
+        writer, catalog = _shared_writer, _shared_catalog
+        _shared_writer = _shared_catalog = None
+    if writer is not None:
+        writer.stop()
+        catalog.close()
+
+
+def save_accident_image(frame, connection_id: str, frame_number: int, details: Optional[Dict] = None) -> Optional[str]:
+    """
+    Queues the image on the shared evidence writer, cataloged once written, and
+    returns the URL it will be served at. Module-level so camera worker
+    processes can be handed it without importing the API app.
+    """
+    if frame is None:
+        logging.error("No frame provided to save_accident_image")
+        return None
+
+    try:
+        evidence_writer, incident_catalog = shared_evidence()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_id = uuid.uuid4().hex[:8]
+        filename = f"accident_{timestamp}_{unique_id}.jpg"
+
+        url = f"/accident_images/{filename}"
+        created_at = datetime.now().timestamp()
+
+        def catalog_image(path: Path):
+            if path.exists():
+                incident_catalog.record(filename, url, details, path.stat().st_size, created_at)
+
+        evidence_writer.save_image(frame, ACCIDENT_IMAGES_DIR / filename, link_dir=PUBLIC_IMAGES_DIR,
+                                   on_written=catalog_image)
+        return url
+
+    except Exception as e:
+        logging.error(f"Error saving accident image: {str(e)}")
+        logging.error(traceback.format_exc())
+        return None
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+import supervision as sv
+
+from Nirikshan.constant.training_pipeline import ACCIDENT_CLASS_IDS, VEHICLE_CLASS_IDS
+
+BIKE_COLOR = (0, 165, 255)
+CAR_COLOR = (0, 255, 0)
+ACCIDENT_COLOR = (0, 0, 255)
+
+# class_id -> (color, end point radius) for drawn traces
+TRACE_STYLES = {0: (BIKE_COLOR, 5), 4: (CAR_COLOR, 5)}
+TRACE_STYLES.update({class_id: (ACCIDENT_COLOR, 6) for class_id in ACCIDENT_CLASS_IDS})
+
+
+def track_class_lookup(detections: sv.Detections) -> dict:
+    """Maps tracker_id -> class_id for the tracked detections of the current frame."""
+    if len(detections) == 0 or detections.tracker_id is None:
+        return {}
+    return dict(zip(detections.tracker_id.tolist(), detections.class_id.tolist()))
+
+
+class FrameAnnotator:
+    """
+    Draws boxes for non-vehicle detections and motion traces for vehicle and
+    accident tracks. Works on whole arrays: one mask for the boxes and one
+    track_id -> class lookup per frame, so only traces of currently tracked
+    objects are converted and drawn.
+    """
+
+    def __init__(self):
+        self.box_annotator = sv.BoxAnnotator(thickness=2)
+
+    def annotate(self, scene: np.ndarray, detections: sv.Detections, traces) -> np.ndarray:
+        """
+        :param scene: BGR frame to draw on in place
+        :param detections: Tracked detections of the current frame
+        :param traces: Mapping of track_id -> (N, 2) array or sequence of trace points; iterating it yields
+            track ids in drawing order
+        :return: The annotated scene
+        """
+        if len(detections) > 0:
+            non_vehicle = ~np.isin(detections.class_id, VEHICLE_CLASS_IDS)
+            if non_vehicle.any():
+                self.box_annotator.annotate(scene=scene, detections=detections[non_vehicle])
+
+        track_classes = track_class_lookup(detections)
+        if not track_classes:
+            return scene
+
+        # traces in their own order, each line followed by its end point, so overlapping tracks stack as before
+        for track_id in traces:
+            style = TRACE_STYLES.get(track_classes.get(track_id))
+            if style is None:
+                continue
+            points = traces.get(track_id)
+            if points is None or len(points) < 2:
+                continue
+            color, radius = style
+            points = np.asarray(points, dtype=np.int32)
+            cv2.polylines(scene, [points], False, color, 3)
+            # a zero-length segment of thickness 2r-1 rasterizes exactly like cv2.circle(radius=r, filled)
+            cv2.polylines(scene, [np.repeat(points[-1:], 2, axis=0)], False, color, 2 * radius - 1)
+        return scene
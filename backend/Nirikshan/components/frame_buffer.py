@@ -0,0 +1,104 @@
+from typing import Iterable, Iterator, Optional
+
+import cv2
+import numpy as np
+
+FRAME_BUFFER_RAW = "raw"
+FRAME_BUFFER_JPEG = "jpeg"
+FRAME_BUFFER_MODES = (FRAME_BUFFER_RAW, FRAME_BUFFER_JPEG)
+
+
+class FrameRingBuffer:
+    """
+    Fixed-capacity ring of the most recent frames.
+
+    In "raw" mode all slots live in one (capacity, H, W, 3) uint8 array that is
+    allocated on the first append and reused afterwards: appending copies the
+    frame into the oldest slot instead of allocating a new array. In "jpeg"
+    mode each slot holds the encoded bytes of the frame, roughly 10-20x smaller
+    at the cost of an encode per append and a decode per read.
+    """
+
+    def __init__(self, capacity: int, mode: str = FRAME_BUFFER_RAW, jpeg_quality: int = 90):
+        if mode not in FRAME_BUFFER_MODES:
+            raise ValueError(f"Unknown frame buffer mode '{mode}', expected one of {FRAME_BUFFER_MODES}")
+        self.capacity = max(1, int(capacity))
+        self.mode = mode
+        self.jpeg_quality = jpeg_quality
+        self._slots: Optional[np.ndarray] = None
+        self._encoded = [None] * self.capacity if mode == FRAME_BUFFER_JPEG else None
+        self._shape = None
+        self._start = 0
+        self._count = 0
+        self.frames_written = 0
+        self.reallocations = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _allocate(self, shape):
+        if self.mode == FRAME_BUFFER_RAW:
+            self._slots = np.empty((self.capacity,) + shape, dtype=np.uint8)
+            self.reallocations += 1
+        else:
+            self._encoded = [None] * self.capacity
+        self._shape = shape
+        self._start = 0
+        self._count = 0
+
+    def append(self, frame: np.ndarray):
+        """Copies (or encodes) a frame into the ring, overwriting the oldest one when full."""
+        if frame.shape != self._shape:
+            self._allocate(frame.shape)
+        index = (self._start + self._count) % self.capacity
+        if self.mode == FRAME_BUFFER_RAW:
+            np.copyto(self._slots[index], frame)
+        else:
+            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            self._encoded[index] = buffer
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self.frames_written += 1
+
+    def extend(self, frames: Iterable[np.ndarray]):
+        for frame in frames:
+            self.append(frame)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """
+        Yields frames oldest first. Raw frames are views into the ring and are
+        only valid until the next append; copy them if they must outlive it.
+        """
+        for offset in range(self._count):
+            index = (self._start + offset) % self.capacity
+            if self.mode == FRAME_BUFFER_RAW:
+                yield self._slots[index]
+            else:
+                yield cv2.imdecode(self._encoded[index], cv2.IMREAD_COLOR)
+
+    def clear(self):
+        """Forgets the stored frames but keeps the allocated memory for reuse."""
+        self._start = 0
+        self._count = 0
+        if self._encoded is not None:
+            self._encoded = [None] * self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes currently held by the ring (the full preallocation in raw mode)."""
+        if self.mode == FRAME_BUFFER_RAW:
+            return self._slots.nbytes if self._slots is not None else 0
+        return sum(buffer.nbytes for buffer in self._encoded if buffer is not None)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "capacity": self.capacity,
+            "frames": self._count,
+            "frames_written": self.frames_written,
+            "frame_shape": list(self._shape) if self._shape is not None else None,
+            "bytes": self.nbytes,
+            "reallocations": self.reallocations,
+        }
@@ -0,0 +1,167 @@
+import collections
+import contextlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from Nirikshan.constant.application import TRACE_MAX_EVENTS
+from Nirikshan.logger import logging
+
+
+class FrameTracer:
+    """
+    Records begin/end spans of every stage of every frame for one camera
+    session or video job and exports them as Chrome trace-event JSON (open in
+    chrome://tracing or ui.perfetto.dev). Spans are stored as complete ("X")
+    events on the thread that ran them, so overlapping work on other threads,
+    e.g. an image save during a slow send, shows up side by side. Only the
+    newest `max_events` spans are kept.
+    """
+
+    def __init__(self, target: str, max_events: int = TRACE_MAX_EVENTS):
+        """
+        :param target: Camera id (or video path) of a session, or a video job id
+        :param max_events: Spans kept; older ones are dropped first
+        """
+        self.target = target
+        self.max_events = max(1, int(max_events))
+        self.recording = True
+        self.started_at = time.time()
+        self.stopped_at: Optional[float] = None
+        self.spans_recorded = 0
+        self._events = collections.deque(maxlen=self.max_events)
+        self._threads: Dict[int, str] = {}
+        self._tracks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _track_id(self, track: str) -> int:
+        track_id = self._tracks.get(track)
+        if track_id is None:
+            # virtual threads for work measured elsewhere, numbered clear of real thread idents
+            track_id = self._tracks.setdefault(track, -(len(self._tracks) + 1))
+        return track_id
+
+    def record(self, name: str, start: float, end: float, frame: Optional[int] = None,
+               track: Optional[str] = None, **args):
+        """
+        Adds a span.
+
+        :param name: Stage name
+        :param start: time.perf_counter() at the beginning of the span
+        :param end: time.perf_counter() at its end
+        :param frame: Frame number the span belongs to
+        :param track: Name of a virtual thread to put the span on instead of the calling thread,
+            for work timed on another thread (e.g. a batched forward pass)
+        :param args: Extra values shown with the span
+        """
+        if not self.recording:
+            return
+        if frame is not None:
+            args["frame"] = frame
+        with self._lock:
+            if track is None:
+                thread = threading.current_thread()
+                tid = thread.ident
+                self._threads[tid] = thread.name
+            else:
+                tid = self._track_id(track)
+            self._events.append((name, start, end, tid, args))
+            self.spans_recorded += 1
+
+    @contextlib.contextmanager
+    def span(self, name: str, frame: Optional[int] = None, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), frame, **args)
+
+    def stop(self):
+        self.recording = False
+        self.stopped_at = time.time()
+
+    def export(self) -> dict:
+        """The recorded spans as a Chrome trace-event JSON object."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+            threads.update({tid: track for track, tid in self._tracks.items()})
+        trace_events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"nirikshan {self.target}"}}
+        ]
+        trace_events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        )
+        for name, start, end, tid, args in events:
+            event = {"name": name, "cat": "frame", "ph": "X", "pid": pid, "tid": tid,
+                     "ts": round(start * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms", "otherData": self.stats()}
+
+    def stats(self) -> dict:
+        return {
+            "target": self.target,
+            "recording": self.recording,
+            "started": datetime.fromtimestamp(self.started_at).isoformat(),
+            "stopped": datetime.fromtimestamp(self.stopped_at).isoformat() if self.stopped_at else None,
+            "spans_recorded": self.spans_recorded,
+            "spans_kept": len(self._events),
+            "max_events": self.max_events,
+        }
+
+
+class TraceRegistry:
+    """
+    Traces switched on at runtime, keyed by target. Pipelines look their
+    target up once per frame with active(), so tracing can start and stop in
+    the middle of a stream and costs one dict lookup per frame while off.
+    """
+
+    def __init__(self):
+        self._tracers: Dict[str, FrameTracer] = {}
+        self._lock = threading.Lock()
+
+    def start(self, target: str, max_events: int = TRACE_MAX_EVENTS) -> FrameTracer:
+        """Starts a new trace for a target, replacing any earlier one."""
+        tracer = FrameTracer(target, max_events)
+        with self._lock:
+            self._tracers[target] = tracer
+        logging.info(f"Tracing started for {target}")
+        return tracer
+
+    def stop(self, target: str) -> Optional[FrameTracer]:
+        """Stops recording; the spans stay available for export."""
+        tracer = self.get(target)
+        if tracer is not None and tracer.recording:
+            tracer.stop()
+            logging.info(f"Tracing stopped for {target} ({tracer.spans_recorded} spans)")
+        return tracer
+
+    def discard(self, target: str) -> Optional[FrameTracer]:
+        with self._lock:
+            tracer = self._tracers.pop(target, None)
+        if tracer is not None:
+            tracer.stop()
+        return tracer
+
+    def get(self, target: str) -> Optional[FrameTracer]:
+        return self._tracers.get(target)
+
+    def active(self, target: Optional[str]) -> Optional[FrameTracer]:
+        """The recording tracer of a target, or None."""
+        tracer = self._tracers.get(target)
+        return tracer if tracer is not None and tracer.recording else None
+
+    def stats(self) -> list:
+        with self._lock:
+            tracers = list(self._tracers.values())
+        return [tracer.stats() for tracer in tracers]
+
+
+TRACING = TraceRegistry()
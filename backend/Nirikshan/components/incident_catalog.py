@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from Nirikshan.logger import logging
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    camera_id TEXT,
+    camera_name TEXT,
+    accident_type TEXT,
+    confidence REAL,
+    latitude REAL,
+    longitude REAL,
+    location TEXT,
+    frame_number INTEGER,
+    size_bytes INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS incidents_created ON incidents (created_at, id);
+CREATE INDEX IF NOT EXISTS incidents_camera ON incidents (camera_id, created_at, id);
+CREATE INDEX IF NOT EXISTS incidents_type ON incidents (accident_type, created_at, id);
+"""
+
+_COLUMNS = ("id", "filename", "url", "camera_id", "camera_name", "accident_type", "confidence",
+            "latitude", "longitude", "location", "frame_number", "size_bytes", "created_at")
+
+
+class IncidentCatalog:
+    """
+    SQLite index of saved accident images, written as images land on disk so
+    listing never has to scan the image directory. Pages are keyed on
+    (created_at, id), newest first, so with or without filters every page is
+    an index range scan however many incidents there are.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10.0)
+            connection.row_factory = sqlite3.Row
+            # WAL lets camera worker processes write while the API reads
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def record(self, filename: str, url: str, details: Optional[Dict] = None,
+               size_bytes: Optional[int] = None, created_at: Optional[float] = None):
+        """
+        Adds (or replaces) the entry of a saved image.
+
+        :param filename: Image file name, unique per incident
+        :param url: URL the image is served at
+        :param details: camera_id, camera_name, accident_type, confidence, latitude, longitude, location, frame_number
+        :param size_bytes: Size of the written file
+        :param created_at: Unix timestamp, defaults to now
+        """
+        details = details or {}
+        row = (
+            filename, url,
+            None if details.get("camera_id") is None else str(details["camera_id"]),
+            details.get("camera_name"), details.get("accident_type"), details.get("confidence"),
+            details.get("latitude"), details.get("longitude"), details.get("location"),
+            details.get("frame_number"), size_bytes,
+            created_at if created_at is not None else datetime.now().timestamp(),
+        )
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO incidents (filename, url, camera_id, camera_name, accident_type, "
+                    "confidence, latitude, longitude, location, frame_number, size_bytes, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+
+    def backfill(self, images_dir, url_prefix: str = "/accident_images") -> int:
+        """Indexes images written before the catalog existed; only runs while the catalog is empty."""
+        with self._lock:
+            connection = self._connect()
+            if connection.execute("SELECT 1 FROM incidents LIMIT 1").fetchone() is not None:
+                return 0
+            rows = []
+            for file in Path(images_dir).glob("*.jpg"):
+                stat = file.stat()
+                rows.append((file.name, f"{url_prefix}/{file.name}", stat.st_size, stat.st_ctime))
+            rows.sort(key=lambda row: row[3])
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO incidents (filename, url, size_bytes, created_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+        if rows:
+            logging.info(f"Incident catalog backfilled with {len(rows)} existing images")
+        return len(rows)
+
+    @staticmethod
+    def encode_cursor(incident: Dict) -> str:
+        return f"{incident['created_at']!r}:{incident['id']}"
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[float, int]:
+        """Parses a next_cursor value; raises ValueError if it is malformed."""
+        created_at, incident_id = cursor.rsplit(":", 1)
+        return float(created_at), int(incident_id)
+
+    def list(self, limit: int = 50, cursor: Optional[str] = None, camera_id: Optional[str] = None,
+             accident_type: Optional[str] = None, min_confidence: Optional[float] = None,
+             since: Optional[float] = None, until: Optional[float] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Returns one page of incidents, newest first.
+
+        :param limit: Page size
+        :param cursor: next_cursor of the previous page
+        :return: (incidents, next_cursor); next_cursor is None on the last page
+        """
+        clauses, params = [], []
+        if cursor is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(self.decode_cursor(cursor))
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(camera_id)
+        if accident_type is not None:
+            clauses.append("accident_type = ?")
+            params.append(accident_type)
+        if min_confidence is not None:
+            clauses.append("confidence >= ?")
+            params.append(min_confidence)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM incidents {where} ORDER BY created_at DESC, id DESC LIMIT ?", params
+            ).fetchall()
+        incidents = [dict(row) for row in rows[:limit]]
+        next_cursor = self.encode_cursor(incidents[-1]) if len(rows) > limit else None
+        return incidents, next_cursor
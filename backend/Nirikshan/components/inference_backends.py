@@ -0,0 +1,317 @@
+import argparse
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+from Nirikshan.components.preprocessing import FramePreprocessor
+from Nirikshan.constant.application import (
+    INFERENCE_CALIBRATION_DIR,
+    INFERENCE_CALIBRATION_FRAMES,
+    MODEL_INPUT_SIZE,
+)
+from Nirikshan.logger import logging
+
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def exported_model_path(weights_path, backend: str, int8: bool = False) -> Path:
+    """
+    Location of the exported variant of a .pt checkpoint for a backend.
+
+    :param weights_path: Path to the ultralytics .pt weights
+    :param backend: One of BACKENDS
+    :param int8: Whether the INT8 post-training quantized variant is wanted
+    :return: Path to the .pt file, .onnx file or OpenVINO model directory
+    """
+    weights_path = Path(weights_path)
+    suffix = "_int8" if int8 else ""
+    if backend == "torch":
+        return weights_path
+    if backend == "onnx":
+        return weights_path.with_name(f"{weights_path.stem}{suffix}.onnx")
+    if backend == "openvino":
+        return weights_path.with_name(f"{weights_path.stem}{suffix}_openvino_model")
+    raise ValueError(f"Unknown inference backend: {backend}. Expected one of {BACKENDS}")
+
+
+def load_calibration_frames(calibration_dir=INFERENCE_CALIBRATION_DIR, limit: int = INFERENCE_CALIBRATION_FRAMES):
+    """
+    Reads calibration frames for INT8 quantization from a directory of images.
+
+    :param calibration_dir: Directory with .jpg/.png frames from the target cameras
+    :param limit: Maximum number of frames to use
+    :return: List of BGR frames
+    """
+    paths = sorted(p for p in Path(calibration_dir).glob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    frames = [frame for frame in (cv2.imread(str(p)) for p in paths[:limit]) if frame is not None]
+    if not frames:
+        raise FileNotFoundError(f"No calibration images found in {calibration_dir}")
+    return frames
+
+
+def _calibration_inputs(frames):
+    preprocessor = FramePreprocessor(torch.device("cpu"), mode="letterbox", input_size=MODEL_INPUT_SIZE)
+    for frame in frames:
+        (batch, _), = preprocessor.prepare([frame])
+        yield batch.numpy().copy()
+
+
+def _quantize_onnx(fp32_path: Path, int8_path: Path, frames):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    import onnxruntime
+
+    input_name = onnxruntime.InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class FrameCalibrationReader(CalibrationDataReader):
+        def __init__(self):
+            self._inputs = iter(_calibration_inputs(frames))
+
+        def get_next(self):
+            batch = next(self._inputs, None)
+            return None if batch is None else {input_name: batch}
+
+    quantize_static(
+        str(fp32_path),
+        str(int8_path),
+        FrameCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+
+def _quantize_openvino(fp32_dir: Path, int8_dir: Path, frames):
+    import nncf
+    import openvino as ov
+
+    core = ov.Core()
+    xml_path = next(fp32_dir.glob("*.xml"))
+    model = core.read_model(str(xml_path))
+    dataset = nncf.Dataset(list(_calibration_inputs(frames)))
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED, subset_size=len(frames))
+
+    int8_dir.mkdir(parents=True, exist_ok=True)
+    ov.save_model(quantized, str(int8_dir / xml_path.name))
+    for metadata in fp32_dir.glob("*.yaml"):
+        shutil.copy2(metadata, int8_dir / metadata.name)
+
+
+def export_model(weights_path, backend: str, int8: bool = False, calibration_dir=INFERENCE_CALIBRATION_DIR,
+                 force: bool = False) -> Path:
+    """
+    Exports a .pt checkpoint for a CPU backend, optionally with INT8 post-training quantization.
+
+    :param weights_path: Path to the ultralytics .pt weights
+    :param backend: "onnx" or "openvino"
+    :param int8: Quantize the exported model to INT8 using calibration frames
+    :param calibration_dir: Directory of frames used to calibrate INT8 ranges
+    :param force: Re-export even if the target already exists
+    :return: Path to the exported model
+    """
+    target = exported_model_path(weights_path, backend, int8)
+    if backend == "torch" or (target.exists() and not force):
+        return target
+
+    fp32_target = exported_model_path(weights_path, backend)
+    if force or not fp32_target.exists():
+        logging.info(f"Exporting {weights_path} to {backend}")
+        exported = YOLO(str(weights_path)).export(format=backend, dynamic=True, imgsz=MODEL_INPUT_SIZE)
+        if Path(exported).resolve() != fp32_target.resolve():
+            shutil.move(str(exported), str(fp32_target))
+
+    if int8:
+        logging.info(f"Quantizing {fp32_target} to INT8 with frames from {calibration_dir}")
+        frames = load_calibration_frames(calibration_dir)
+        if backend == "onnx":
+            _quantize_onnx(fp32_target, target, frames)
+        else:
+            _quantize_openvino(fp32_target, target, frames)
+    return target
+
+
+class InferenceBackend:
+    """
+    Runs a preprocessed input batch through one model runtime. Every backend
+    returns, per image, (boxes, class_ids, confidences) as numpy arrays with
+    xyxy boxes in input tensor coordinates.
+    """
+    name = None
+
+    def __init__(self, model_path, device):
+        self.model_path = Path(model_path)
+        self.device = device
+
+    def predict(self, batch):
+        raise NotImplementedError
+
+
+class UltralyticsBackend(InferenceBackend):
+    """
+    Backend served through ultralytics' AutoBackend, which runs .pt weights on
+    torch and exported .onnx / OpenVINO models on their own runtimes while
+    keeping the same results API and NMS.
+    """
+
+    def __init__(self, name, model_path, device):
+        super().__init__(model_path, device)
+        self.name = name
+        if name == "torch":
+            self.model = YOLO(str(model_path)).to(device)
+        else:
+            self.model = YOLO(str(model_path), task="detect")
+
+    def predict(self, batch):
+        outputs = []
+        for result in self.model(batch):
+            outputs.append((
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.cls.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+            ))
+        return outputs
+
+
+def load_backend(backend: str, weights_path, device, int8: bool = False) -> InferenceBackend:
+    """
+    Loads the requested backend, exporting the .pt weights first if needed.
+
+    :param backend: One of BACKENDS
+    :param weights_path: Path to the ultralytics .pt weights
+    :param device: torch device; exported backends always run on CPU
+    :param int8: Use the INT8 quantized export (onnx/openvino only)
+    :return: InferenceBackend instance
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Expected one of {BACKENDS}")
+    model_path = export_model(weights_path, backend, int8=int8)
+    logging.info(f"Using {backend}{' int8' if int8 and backend != 'torch' else ''} backend from {model_path}")
+    return UltralyticsBackend(backend, model_path, device)
+
+
+def _box_iou(boxes_a, boxes_b):
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return intersection / np.maximum(area_a[:, None] + area_b[None, :] - intersection, 1e-9)
+
+
+def compare_detections(reference, candidate, iou_threshold: float = 0.5, confidence_tolerance: float = 0.1):
+    """
+    Greedily matches candidate detections to reference detections of the same class.
+
+    :param reference: (boxes, class_ids, confidences) from the reference backend
+    :param candidate: (boxes, class_ids, confidences) from the backend under test
+    :param iou_threshold: Minimum IoU for two boxes to count as the same object
+    :param confidence_tolerance: Maximum allowed confidence difference for a match
+    :return: Dictionary with matched/missed/extra counts and the worst confidence delta
+    """
+    ref_boxes, ref_classes, ref_conf = (np.asarray(a) for a in reference)
+    cand_boxes, cand_classes, cand_conf = (np.asarray(a) for a in candidate)
+    matched, worst_delta = 0, 0.0
+    used = np.zeros(len(cand_boxes), dtype=bool)
+    if len(ref_boxes) and len(cand_boxes):
+        iou = _box_iou(ref_boxes.reshape(-1, 4), cand_boxes.reshape(-1, 4))
+        iou[ref_classes.reshape(-1, 1) != cand_classes.reshape(1, -1)] = 0
+        for i in np.argsort(-ref_conf):
+            iou[i, used] = 0
+            j = int(np.argmax(iou[i]))
+            delta = abs(float(ref_conf[i]) - float(cand_conf[j]))
+            if iou[i, j] >= iou_threshold and delta <= confidence_tolerance:
+                used[j] = True
+                matched += 1
+                worst_delta = max(worst_delta, delta)
+    return {
+        "matched": matched,
+        "missed": len(ref_boxes) - matched,
+        "extra": int((~used).sum()),
+        "max_confidence_delta": round(worst_delta, 4),
+    }
+
+
+def check_parity(reference_trainer, candidate_trainer, frames, iou_threshold: float = 0.5,
+                 confidence_tolerance: float = 0.1, min_match_ratio: float = 0.95):
+    """
+    Confirms a backend reproduces the reference backend's detections within tolerance.
+
+    :param reference_trainer: ModelTrainer on the torch backend
+    :param candidate_trainer: ModelTrainer on the backend under test
+    :param frames: BGR frames to compare on
+    :return: Dictionary with per-frame comparisons, totals and a passed flag
+    """
+    per_frame = [
+        compare_detections(reference, candidate, iou_threshold, confidence_tolerance)
+        for reference, candidate in zip(reference_trainer.detect_objects_batch(frames),
+                                        candidate_trainer.detect_objects_batch(frames))
+    ]
+    matched = sum(result["matched"] for result in per_frame)
+    expected = matched + sum(result["missed"] for result in per_frame)
+    extra = sum(result["extra"] for result in per_frame)
+    ratio = matched / (expected + extra) if expected + extra else 1.0
+    return {
+        "frames": len(frames),
+        "reference_detections": expected,
+        "matched": matched,
+        "extra": extra,
+        "match_ratio": round(ratio, 4),
+        "max_confidence_delta": max((result["max_confidence_delta"] for result in per_frame), default=0.0),
+        "passed": ratio >= min_match_ratio,
+        "per_frame": per_frame,
+    }
+
+
+def _read_video_frames(video_path, limit):
+    cap = cv2.VideoCapture(str(video_path))
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main():
+    from Nirikshan.components.model_trainer import ModelTrainer
+
+    parser = argparse.ArgumentParser(description="Export best.pt to CPU inference backends and check parity")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export (and optionally quantize) best.pt")
+    export_parser.add_argument("--backend", choices=BACKENDS[1:], required=True)
+    export_parser.add_argument("--int8", action="store_true")
+    export_parser.add_argument("--calibration-dir", default=INFERENCE_CALIBRATION_DIR)
+    export_parser.add_argument("--force", action="store_true")
+
+    parity_parser = subparsers.add_parser("parity", help="Compare a backend's detections against torch")
+    parity_parser.add_argument("--backend", choices=BACKENDS[1:], required=True)
+    parity_parser.add_argument("--int8", action="store_true")
+    parity_parser.add_argument("--video", required=True, help="Video to sample frames from")
+    parity_parser.add_argument("--frames", type=int, default=50)
+    parity_parser.add_argument("--iou", type=float, default=0.5)
+    parity_parser.add_argument("--confidence-tolerance", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        print(export_model(ModelTrainer.default_weights_path(), args.backend, args.int8,
+                           args.calibration_dir, args.force))
+        return
+
+    frames = _read_video_frames(args.video, args.frames)
+    result = check_parity(ModelTrainer(backend="torch"), ModelTrainer(backend=args.backend, int8=args.int8),
+                          frames, args.iou, args.confidence_tolerance)
+    result.pop("per_frame")
+    print(result)
+    raise SystemExit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
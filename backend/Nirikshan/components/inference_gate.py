@@ -0,0 +1,157 @@
+from typing import Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from Nirikshan.constant.application import (
+    INFERENCE_STRIDE,
+    MOTION_GATE,
+    MOTION_GATE_HOLD_FRAMES,
+    MOTION_GATE_MAX_SKIP,
+    MOTION_GATE_PIXEL_DELTA,
+    MOTION_GATE_THRESHOLD,
+    MOTION_GATE_WIDTH,
+)
+from Nirikshan.constant.training_pipeline import ACCIDENT_CLASS_IDS
+
+
+class InferenceGate:
+    """
+    Decides per frame whether a source needs a forward pass.
+
+    Without motion gating every `stride`-th frame is inferred. With motion
+    gating a frame is compared, downscaled to a small grayscale image, with the
+    last inferred frame; static scenes skip inference for up to `max_skip`
+    frames in a row. Motion, or an accident-class candidate in the last
+    results, forces every frame through the model for `hold_frames` frames.
+    Skipped frames reuse the last detections, so trackers keep their tracks.
+    """
+
+    def __init__(self, stride: int = INFERENCE_STRIDE, motion: bool = MOTION_GATE,
+                 threshold: float = MOTION_GATE_THRESHOLD, max_skip: int = MOTION_GATE_MAX_SKIP,
+                 hold_frames: int = MOTION_GATE_HOLD_FRAMES, width: int = MOTION_GATE_WIDTH,
+                 pixel_delta: int = MOTION_GATE_PIXEL_DELTA):
+        """
+        :param stride: Infer every stride-th frame when motion gating is off
+        :param motion: Enable frame differencing
+        :param threshold: Fraction of changed pixels that counts as motion
+        :param max_skip: Longest run of skipped frames on a static scene
+        :param hold_frames: Frames inferred at full rate after motion or a candidate
+        :param width: Width of the downscaled difference image
+        :param pixel_delta: Gray level change for a pixel to count as changed
+        """
+        self.stride = max(1, int(stride))
+        self.motion = motion
+        self.threshold = threshold
+        self.max_skip = max(1, int(max_skip))
+        self.hold_frames = max(0, int(hold_frames))
+        self.width = max(8, int(width))
+        self.pixel_delta = pixel_delta
+        self._reference: Optional[np.ndarray] = None
+        self._primed = False
+        self._since_inference = 0
+        self._hold = 0
+        self.frames = 0
+        self.frames_inferred = 0
+        self.motion_frames = 0
+        self.candidate_frames = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.motion or self.stride > 1
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, int(height * self.width / width))),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _moved(self, small: np.ndarray) -> bool:
+        if self._reference is None or self._reference.shape != small.shape:
+            return True
+        changed = cv2.absdiff(small, self._reference) > self.pixel_delta
+        return np.count_nonzero(changed) > self.threshold * changed.size
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """Returns whether this frame goes through the model; call once per frame, in order."""
+        self.frames += 1
+        if not self.enabled:
+            self.frames_inferred += 1
+            return True
+
+        self._since_inference += 1
+        small = self._downscale(frame) if self.motion else None
+        if small is not None and self._moved(small):
+            self.motion_frames += 1
+            self._hold = self.hold_frames
+            infer = True
+        elif self._hold > 0:
+            self._hold -= 1
+            infer = True
+        else:
+            infer = not self._primed or \
+                self._since_inference >= (self.max_skip if self.motion else self.stride)
+
+        if infer:
+            self.frames_inferred += 1
+            self._primed = True
+            self._since_inference = 0
+            if small is not None:
+                self._reference = small
+        return infer
+
+    def observe(self, class_ids: Optional[Iterable]):
+        """Feeds back the classes found on an inferred frame; accident candidates force full rate."""
+        if class_ids is None or not self.enabled:
+            return
+        if np.isin(np.asarray(class_ids), ACCIDENT_CLASS_IDS).any():
+            self.candidate_frames += 1
+            self._hold = self.hold_frames
+
+    def state(self) -> Tuple:
+        """Everything that decides which of the following frames are inferred; picklable."""
+        return self._primed, self._since_inference, self._hold, self._reference
+
+    def restore(self, state: Tuple):
+        """Continues from the state() of a gate that saw the preceding frames."""
+        self._primed, self._since_inference, self._hold, self._reference = state
+
+    @staticmethod
+    def same_state(state: Tuple, other: Tuple) -> bool:
+        """Whether two gates in these states decide the same for every following frame."""
+        if state[:3] != other[:3]:
+            return False
+        if state[3] is None or other[3] is None:
+            return state[3] is other[3]
+        return np.array_equal(state[3], other[3])
+
+    def reset_counters(self):
+        """Zeroes the statistics without touching the gating state."""
+        self.frames = 0
+        self.frames_inferred = 0
+        self.motion_frames = 0
+        self.candidate_frames = 0
+
+    def merge_stats(self, chunk_stats: Iterable[dict]):
+        """Adds the counters of gates that ran on chunks of the same video in other processes."""
+        for stats in chunk_stats:
+            self.frames += stats["frames"]
+            self.frames_inferred += stats["frames_inferred"]
+            self.motion_frames += stats["motion_frames"]
+            self.candidate_frames += stats["candidate_frames"]
+
+    def stats(self) -> dict:
+        frames = self.frames
+        skipped = frames - self.frames_inferred
+        return {
+            "motion_gate": self.motion,
+            "stride": self.stride,
+            "frames": frames,
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": skipped,
+            "skip_ratio": round(skipped / frames, 4) if frames else 0.0,
+            "motion_frames": self.motion_frames,
+            "candidate_frames": self.candidate_frames,
+        }
@@ -0,0 +1,173 @@
+import asyncio
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from Nirikshan.logger import logging
+
+
+class _InferenceRequest:
+    __slots__ = ("frame", "future", "submitted_at", "timings")
+
+    def __init__(self, frame, future, submitted_at, timings=None):
+        self.frame = frame
+        self.future = future
+        self.submitted_at = submitted_at
+        self.timings = timings
+
+
+def summarize_timings(values):
+    """
+    Summarizes a window of timings given in seconds.
+
+    :param values: Iterable of durations in seconds
+    :return: Dictionary with count, mean, p50, p95 and max in milliseconds
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    count = len(ordered)
+    return {
+        "count": count,
+        "mean": round(sum(ordered) / count * 1000, 3),
+        "p50": round(ordered[int(0.50 * (count - 1))] * 1000, 3),
+        "p95": round(ordered[int(0.95 * (count - 1))] * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+class InferenceScheduler:
+    """
+    Collects frames from every active stream session and runs them through the
+    model in batches, so N cameras cost one forward pass per tick instead of N.
+    """
+    STATS_WINDOW = 1000
+
+    def __init__(self, model_trainer, max_batch_size=8, max_wait_ms=10.0):
+        self.model_trainer = model_trainer
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._requests = queue.Queue()
+        self._thread = None
+        self._running = False
+        # orders submit() against stop(), so no request is queued after the final drain
+        self._submit_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._frames = 0
+        self._batch_sizes = collections.Counter()
+        self._queue_waits = collections.deque(maxlen=self.STATS_WINDOW)
+        self._inference_times = collections.deque(maxlen=self.STATS_WINDOW)
+
+    def start(self):
+        with self._submit_lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+        logging.info(f"Inference scheduler started (max_batch_size={self.max_batch_size}, "
+                     f"max_wait_ms={self.max_wait * 1000:.1f})")
+
+    def stop(self):
+        with self._submit_lock:
+            if not self._running:
+                return
+            self._running = False
+            self._requests.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("Inference scheduler stopped"))
+        logging.info("Inference scheduler stopped")
+
+    def submit(self, frame, timings=None):
+        """
+        Queues a frame for the next batch.
+
+        :param frame: BGR frame
+        :param timings: Optional dict receiving the preprocess and inference seconds of the frame's batch
+            before the future resolves
+        :return: concurrent.futures.Future resolving to (boxes, class_ids, confidences); failed right away
+            if the scheduler is not running
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._running:
+                self._requests.put(_InferenceRequest(frame, future, time.perf_counter(), timings))
+                return future
+        future.set_exception(RuntimeError("Inference scheduler stopped"))
+        return future
+
+    async def detect(self, frame):
+        return await asyncio.wrap_future(self.submit(frame))
+
+    def _collect_batch(self):
+        first = self._requests.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = [request for request in self._collect_batch()
+                     if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            batch_timings = {}
+            try:
+                results = self.model_trainer.detect_objects_batch([request.frame for request in batch], batch_timings)
+            except Exception as e:
+                logging.error(f"Batched inference failed: {str(e)}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for request, result in zip(batch, results):
+                if request.timings is not None:
+                    request.timings.update(batch_timings)
+                request.future.set_result(result)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._frames += len(batch)
+                self._batch_sizes[len(batch)] += 1
+                self._queue_waits.extend(started - request.submitted_at for request in batch)
+                self._inference_times.append(finished - started)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "running": self._running,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._requests.qsize(),
+                "batches": self._batches,
+                "frames": self._frames,
+                "mean_batch_size": round(self._frames / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "queue_wait_ms": summarize_timings(self._queue_waits),
+                "batch_inference_ms": summarize_timings(self._inference_times),
+            }
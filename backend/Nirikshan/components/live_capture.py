@@ -0,0 +1,82 @@
+import threading
+import time
+
+import cv2
+
+from Nirikshan.logger import logging
+
+
+class LatestFrameGrabber:
+    """
+    Reads a live capture as fast as the source produces frames and keeps only
+    the newest one, so a slow consumer never works through a growing backlog.
+    Frames replaced before anyone read them are counted as dropped.
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, name: str = "live-grabber"):
+        self.cap = cap
+        self.name = name
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._condition = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._decode_seconds = 0.0
+        self._sequence = 0
+        self._running = False
+        self._thread = None
+        self.ended = False
+        self.frames_grabbed = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logging.warning(f"{self.name}: capture read did not return within {timeout}s")
+
+    def _run(self):
+        try:
+            while self._running:
+                started = time.perf_counter()
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                with self._condition:
+                    if self._frame is not None:
+                        self.frames_dropped += 1
+                    self._frame = frame
+                    self._captured_at = time.perf_counter()
+                    self._decode_seconds = self._captured_at - started
+                    self._sequence += 1
+                    self.frames_grabbed += 1
+                    self._condition.notify_all()
+        except Exception as e:
+            logging.error(f"{self.name}: capture failed: {str(e)}")
+        finally:
+            with self._condition:
+                self.ended = True
+                self._condition.notify_all()
+
+    def read(self, timeout: float = 0.1):
+        """
+        Takes the newest unread frame.
+
+        :param timeout: Seconds to wait for a new frame
+        :return: Tuple of (frame, captured_at, sequence, decode_seconds), None on timeout, or
+                 (None, None, None, None) once the source has ended
+        """
+        with self._condition:
+            if self._frame is None and not self.ended:
+                self._condition.wait(timeout)
+            if self._frame is None:
+                return (None, None, None, None) if self.ended else None
+            frame, self._frame = self._frame, None
+            return frame, self._captured_at, self._sequence, self._decode_seconds
@@ -0,0 +1,232 @@
+import bisect
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from Nirikshan.logger import logging
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stages of a live frame, in order; "send" is one WebSocket send to one subscriber.
+STAGES = ("decode", "preprocess", "inference", "tracking", "annotation", "encode", "send")
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """
+        Returns the time series for these label values, creating it on first use.
+        Hot paths should keep the returned child instead of calling this per event.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def remove(self, *values):
+        """Drops the time series for these label values, e.g. of a camera that went away."""
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            self._children.pop(key, None)
+
+    def _samples(self, key, child) -> Iterable[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            lines.extend(self._samples(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self, key, child) -> Iterable[str]:
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process in the Prometheus text exposition format.
+
+    Counters and histograms are updated where the events happen; their
+    children are plain counters behind a lock, cheap enough for per-frame
+    use. Gauges describing current state (sessions, queue depths, memory) are
+    instead built by collectors at scrape time from the objects' stats, so
+    they cost nothing between scrapes.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[_Metric]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = STAGE_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        """Registers a callable returning freshly built metrics (usually gauges) on every scrape."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logging.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {str(e)}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "nirikshan_stage_seconds", "Time spent per frame in each stage of a live camera session",
+    ("camera", "stage"))
+ACCIDENTS_TOTAL = REGISTRY.counter(
+    "nirikshan_accidents_total", "Accident events detected, by camera (\"offline\" for uploaded videos and feeds)",
+    ("camera",))
+ARTIFACTS_TOTAL = REGISTRY.counter(
+    "nirikshan_artifacts_saved_total", "Accident images and clips written to disk", ("kind",))
+
+
+def stage_timers(camera: str) -> Dict[str, _HistogramChild]:
+    """The stage histograms of one camera, keyed by stage name."""
+    return {stage: STAGE_SECONDS.labels(camera, stage) for stage in STAGES}
+
+
+def remove_camera(camera: str):
+    """Drops the stage and accident series of a camera once its session has ended."""
+    for stage in STAGES:
+        STAGE_SECONDS.remove(camera, stage)
+    ACCIDENTS_TOTAL.remove(camera)
@@ -0,0 +1,93 @@
+import collections
+import contextlib
+import os
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.constant.application import MODEL_POOL_SIZE
+from Nirikshan.logger import logging
+
+
+class ModelTrainerPool:
+    """
+    A fixed set of ModelTrainer instances shared by every caller in the
+    process. Each detection call borrows an idle instance for the duration of
+    the forward pass, so up to `size` requests run inference at the same time
+    instead of queueing on a single model's lock.
+
+    The pool exposes the same detect_objects / detect_objects_batch interface
+    as ModelTrainer and can be used wherever a model_trainer is expected.
+    """
+    STATS_WINDOW = 1000
+
+    def __init__(self, factory: Optional[Callable] = None, size: int = MODEL_POOL_SIZE,
+                 torch_threads: Optional[int] = None):
+        """
+        :param factory: Builds one ModelTrainer; defaults to ModelTrainer()
+        :param size: Number of model instances
+        :param torch_threads: Intra-op threads per forward pass; defaults to an even share of the cores
+        """
+        if factory is None:
+            from Nirikshan.components.model_trainer import ModelTrainer
+            factory = ModelTrainer
+        self.size = max(1, int(size))
+        self.torch_threads = torch_threads
+        if self.torch_threads is None and self.size > 1:
+            self.torch_threads = max(1, (os.cpu_count() or 1) // self.size)
+        if self.torch_threads is not None:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+
+        started = time.perf_counter()
+        self.instances = [factory() for _ in range(self.size)]
+        logging.info(f"Model pool of {self.size} instance(s) built in {time.perf_counter() - started:.2f}s")
+        self._idle = queue.Queue()
+        for instance in self.instances:
+            self._idle.put(instance)
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self._acquire_waits = collections.deque(maxlen=self.STATS_WINDOW)
+
+    @property
+    def backend(self):
+        return self.instances[0].backend
+
+    @property
+    def device(self):
+        return self.instances[0].device
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Borrows an idle model instance, waiting for one if all are busy."""
+        started = time.perf_counter()
+        instance = self._idle.get()
+        with self._stats_lock:
+            self.calls += 1
+            self._acquire_waits.append(time.perf_counter() - started)
+        try:
+            yield instance
+        finally:
+            self._idle.put(instance)
+
+    def detect_objects(self, frame):
+        with self.acquire() as instance:
+            return instance.detect_objects(frame)
+
+    def detect_objects_batch(self, frames, timings=None):
+        with self.acquire() as instance:
+            return instance.detect_objects_batch(frames, timings)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            idle = self._idle.qsize()
+            return {
+                "size": self.size,
+                "busy": self.size - idle,
+                "idle": idle,
+                "torch_threads": self.torch_threads,
+                "calls": self.calls,
+                "acquire_wait_ms": summarize_timings(self._acquire_waits),
+            }
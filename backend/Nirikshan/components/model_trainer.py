@@ -1,32 +1,63 @@
-from ultralytics import YOLO
 import numpy as np
 import logging
+import threading
+import time
 import torch
 import cv2
 import os
 
+from Nirikshan.components.inference_backends import InferenceBackend, load_backend
+from Nirikshan.components.preprocessing import FramePreprocessor
+from Nirikshan.constant.application import INFERENCE_BACKEND, INFERENCE_INT8
+
 class ModelTrainer:
-    def __init__(self):
-        model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "model", "best.pt")
-        logging.info(f"Loading YOLO model from {model_path}")
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        logging.info(f"Using device: {self.device}")
-        self.model = YOLO(model_path).to(self.device)
+    def __init__(self, backend=INFERENCE_BACKEND, int8=INFERENCE_INT8):
+        """
+        :param backend: Backend name, or an InferenceBackend instance to run as is (e.g. a benchmark stub)
+        :param int8: Use the INT8 quantized export of the onnx/openvino backends
+        """
+        if isinstance(backend, InferenceBackend):
+            self.device = backend.device
+            self.backend = backend
+        else:
+            model_path = self.default_weights_path()
+            logging.info(f"Loading YOLO model from {model_path}")
+            use_cuda = backend == "torch" and torch.cuda.is_available()
+            self.device = torch.device('cuda' if use_cuda else 'cpu')
+            logging.info(f"Using device: {self.device}")
+            self.backend = load_backend(backend, model_path, self.device, int8=int8)
+        self.model = self.backend.model
+        self.preprocessor = FramePreprocessor(self.device)
+        self._lock = threading.Lock()
         logging.info("Model loaded successfully")
 
+    @staticmethod
+    def default_weights_path():
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "model", "best.pt")
+
     def detect_objects(self, frame):
-        height, width = frame.shape[:2]
-        new_height = (height // 32) * 32
-        new_width = (width // 32) * 32
-        resized_frame = cv2.resize(frame, (new_width, new_height))
+        return self.detect_objects_batch([frame])[0]
 
-        resized_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB)
-        resized_frame = torch.from_numpy(resized_frame).permute(2, 0, 1).unsqueeze(0).float().to(self.device)
-        
-        resized_frame /= 255.0
+    def detect_objects_batch(self, frames, timings=None):
+        """
+        Runs detection on several frames, one forward pass per distinct input shape.
 
-        results = self.model(resized_frame)[0]
-        boxes = results.boxes.xyxy.cpu().numpy()  
-        class_ids = results.boxes.cls.cpu().numpy()  
-        confidences = results.boxes.conf.cpu().numpy()
-        return boxes, class_ids, confidences
\ No newline at end of file
+        :param frames: List of BGR frames
+        :param timings: Optional dict receiving the "preprocess" and "inference" seconds of the batch
+            and the perf_counter time it "started" at
+        :return: List of (boxes, class_ids, confidences) tuples, in input order
+        """
+        outputs = [None] * len(frames)
+        with self._lock:
+            started = time.perf_counter()
+            batches = self.preprocessor.prepare(frames)
+            prepared = time.perf_counter()
+            for batch, members in batches:
+                for (index, layout), (boxes, class_ids, confidences) in zip(members, self.backend.predict(batch)):
+                    outputs[index] = (layout.to_frame(boxes), class_ids, confidences)
+            finished = time.perf_counter()
+        if timings is not None:
+            timings["started"] = started
+            timings["preprocess"] = prepared - started
+            timings["inference"] = finished - prepared
+        return outputs
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+import torch
+
+from Nirikshan.constant.application import MODEL_INPUT_SIZE, PREPROCESS_MODE
+
+
+class FrameLayout:
+    """
+    Geometry for turning frames of one resolution into model input, plus the
+    uint8 staging canvas the resized frame is drawn into.
+    """
+
+    def __init__(self, frame_shape, input_shape, resized_shape, offset, pad_value):
+        self.frame_shape = frame_shape
+        self.input_shape = input_shape
+        self.resized_shape = resized_shape
+        self.offset = offset
+        frame_height, frame_width = frame_shape
+        resized_height, resized_width = resized_shape
+        self.scale = np.array([resized_width / frame_width, resized_height / frame_height] * 2, dtype=np.float32)
+        self.shift = np.array([offset[1], offset[0]] * 2, dtype=np.float32)
+        self.passthrough = resized_shape == frame_shape and input_shape == frame_shape
+
+        self.canvas = np.full((input_shape[0], input_shape[1], 3), pad_value, dtype=np.uint8)
+        top, left = offset
+        self.region = self.canvas[top:top + resized_height, left:left + resized_width]
+
+    def draw(self, frame):
+        """Resizes the frame into the canvas and returns the array to normalize."""
+        if self.passthrough:
+            return frame
+        cv2.resize(frame, (self.resized_shape[1], self.resized_shape[0]), dst=self.region,
+                   interpolation=cv2.INTER_LINEAR)
+        return self.canvas
+
+    def to_frame(self, boxes):
+        """Maps xyxy boxes from model input coordinates back to frame coordinates."""
+        boxes = (np.asarray(boxes, dtype=np.float32) - self.shift) / self.scale
+        np.clip(boxes[:, 0::2], 0, self.frame_shape[1], out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, self.frame_shape[0], out=boxes[:, 1::2])
+        return boxes
+
+
+class FramePreprocessor:
+    """
+    Turns BGR frames into normalized RGB input tensors without per-frame
+    allocations: layouts and input buffers are cached per resolution and
+    reused, and BGR->RGB, HWC->CHW, uint8->float and /255 happen in a single
+    pass straight into the batch buffer.
+    """
+    PAD_VALUE = 114
+    SCALE = np.float32(1.0 / 255.0)
+
+    def __init__(self, device, mode: str = PREPROCESS_MODE, input_size: int = MODEL_INPUT_SIZE, stride: int = 32):
+        if mode not in ("stride", "letterbox"):
+            raise ValueError(f"Unknown preprocess mode: {mode}")
+        self.device = device
+        self.mode = mode
+        self.stride = stride
+        self.input_size = max(stride, (input_size // stride) * stride)
+        self._layouts = {}
+        self._host_buffers = {}
+        self._device_buffers = {}
+        self.allocations = 0
+
+    def layout(self, height: int, width: int) -> FrameLayout:
+        key = (height, width)
+        layout = self._layouts.get(key)
+        if layout is None:
+            if self.mode == "letterbox":
+                ratio = min(self.input_size / height, self.input_size / width)
+                resized = (max(1, round(height * ratio)), max(1, round(width * ratio)))
+                input_shape = (self.input_size, self.input_size)
+                offset = ((input_shape[0] - resized[0]) // 2, (input_shape[1] - resized[1]) // 2)
+            else:
+                resized = (max(self.stride, (height // self.stride) * self.stride),
+                           max(self.stride, (width // self.stride) * self.stride))
+                input_shape = resized
+                offset = (0, 0)
+            layout = FrameLayout(key, input_shape, resized, offset, self.PAD_VALUE)
+            self._layouts[key] = layout
+            self.allocations += 1
+        return layout
+
+    def _host_buffer(self, input_shape, count):
+        buffer = self._host_buffers.get(input_shape)
+        if buffer is None or buffer[0].shape[0] < count:
+            pin = self.device.type == "cuda"
+            tensor = torch.empty((count, 3) + input_shape, dtype=torch.float32, pin_memory=pin)
+            buffer = (tensor, tensor.numpy())
+            self._host_buffers[input_shape] = buffer
+            self.allocations += 1
+        return buffer
+
+    def _to_device(self, input_shape, host):
+        if self.device.type == "cpu":
+            return host
+        buffer = self._device_buffers.get(input_shape)
+        if buffer is None or buffer.shape[0] < host.shape[0]:
+            buffer = torch.empty_like(host, device=self.device)
+            self._device_buffers[input_shape] = buffer
+            self.allocations += 1
+        target = buffer[:host.shape[0]]
+        target.copy_(host, non_blocking=True)
+        return target
+
+    def prepare(self, frames):
+        """
+        Fills reusable input buffers for a list of frames.
+
+        :param frames: List of BGR uint8 frames
+        :return: List of (batch_tensor, [(frame_index, layout), ...]), one per input shape.
+                 The tensors are only valid until the next call.
+        """
+        groups = {}
+        for index, frame in enumerate(frames):
+            layout = self.layout(*frame.shape[:2])
+            groups.setdefault(layout.input_shape, []).append((index, frame, layout))
+
+        batches = []
+        for input_shape, members in groups.items():
+            host_tensor, host_array = self._host_buffer(input_shape, len(members))
+            for slot, (_, frame, layout) in enumerate(members):
+                source = layout.draw(frame)
+                np.multiply(source[..., ::-1].transpose(2, 0, 1), self.SCALE, out=host_array[slot], casting="unsafe")
+            tensor = self._to_device(input_shape, host_tensor[:len(members)])
+            batches.append((tensor, [(index, layout) for index, _, layout in members]))
+        return batches
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "input_size": self.input_size if self.mode == "letterbox" else None,
+            "layouts": len(self._layouts),
+            "allocations": self.allocations,
+            "buffer_bytes": sum(tensor.element_size() * tensor.nelement() for tensor, _ in self._host_buffers.values()),
+        }
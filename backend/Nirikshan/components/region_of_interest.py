@@ -0,0 +1,114 @@
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+def parse_roi(value) -> Optional[List[Tuple[float, float]]]:
+    """
+    Validates an ROI polygon as sent by clients.
+
+    :param value: List of [x, y] points, either in pixels or normalized to 0..1; None for no ROI
+    :return: List of (x, y) tuples, or None
+    :raises ValueError: if the polygon is malformed
+    """
+    if value is None:
+        return None
+    try:
+        points = [(float(point[0]), float(point[1])) for point in value]
+    except (TypeError, ValueError, IndexError, KeyError):
+        raise ValueError("ROI must be a list of [x, y] points")
+    if len(points) < 3:
+        raise ValueError("ROI needs at least 3 points")
+    if any(x < 0 or y < 0 for x, y in points):
+        raise ValueError("ROI points must not be negative")
+    return points
+
+
+class RegionOfInterest:
+    """
+    Restricts detection to the part of a camera view inside a polygon. Frames
+    are cropped to the polygon's bounding box (grown to a multiple of the model
+    stride, so the crop needs no resize) before inference, detections whose
+    centre lies outside the polygon are dropped, and the remaining boxes are
+    shifted back to full-frame coordinates.
+
+    Points may be given in pixels or normalized to 0..1; the pixel geometry is
+    computed for the first frame size seen and again whenever it changes.
+    """
+
+    def __init__(self, polygon: Sequence[Tuple[float, float]], stride: int = 32):
+        self.polygon = [(float(x), float(y)) for x, y in polygon]
+        self.normalized = all(x <= 1.0 and y <= 1.0 for x, y in self.polygon)
+        self.stride = stride
+        self._frame_shape = None
+        self.box: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        self._mask: Optional[np.ndarray] = None
+        self.frames = 0
+        self.detections_dropped = 0
+
+    @classmethod
+    def from_metadata(cls, metadata: Optional[dict]) -> Optional["RegionOfInterest"]:
+        """Builds the ROI stored under "roi" in a camera's metadata, if any."""
+        polygon = parse_roi((metadata or {}).get("roi"))
+        return cls(polygon) if polygon else None
+
+    def _grow(self, start: int, end: int, limit: int) -> Tuple[int, int]:
+        size = min(limit, -(-(end - start) // self.stride) * self.stride)
+        start = max(0, min(start, limit - size))
+        return start, start + size
+
+    def _prepare(self, frame_shape):
+        height, width = frame_shape[:2]
+        scale = (width, height) if self.normalized else (1.0, 1.0)
+        points = np.array([(x * scale[0], y * scale[1]) for x, y in self.polygon], dtype=np.float32)
+        points[:, 0] = points[:, 0].clip(0, width - 1)
+        points[:, 1] = points[:, 1].clip(0, height - 1)
+        x, y, w, h = cv2.boundingRect(points)
+        x0, x1 = self._grow(x, x + max(w, 1), width)
+        y0, y1 = self._grow(y, y + max(h, 1), height)
+        self.box = (x0, y0, x1, y1)
+
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        cv2.fillPoly(mask, [np.round(points - (x0, y0)).astype(np.int32)], 1)
+        self._mask = mask
+        self._frame_shape = frame_shape[:2]
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """Returns the part of the frame the model should see (a view, no copy)."""
+        if frame.shape[:2] != self._frame_shape:
+            self._prepare(frame.shape)
+        self.frames += 1
+        x0, y0, x1, y1 = self.box
+        return frame[y0:y1, x0:x1]
+
+    def restore(self, boxes, class_ids, confidences):
+        """
+        Drops detections of a cropped frame whose centre is outside the polygon
+        and maps the rest to full-frame coordinates.
+
+        :return: (boxes, class_ids, confidences) in full-frame coordinates
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if boxes.shape[0] == 0:
+            return boxes, class_ids, confidences
+        height, width = self._mask.shape
+        centers_x = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(np.int32).clip(0, width - 1)
+        centers_y = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(np.int32).clip(0, height - 1)
+        keep = self._mask[centers_y, centers_x].astype(bool)
+        self.detections_dropped += int(keep.size - np.count_nonzero(keep))
+
+        x0, y0 = self.box[:2]
+        boxes = boxes[keep] + np.array([x0, y0, x0, y0], dtype=np.float32)
+        return boxes, np.asarray(class_ids)[keep], np.asarray(confidences)[keep]
+
+    def stats(self) -> dict:
+        x0, y0, x1, y1 = self.box
+        frame_pixels = self._frame_shape[0] * self._frame_shape[1] if self._frame_shape else 0
+        return {
+            "polygon": self.polygon,
+            "crop": [x0, y0, x1, y1],
+            "pixel_ratio": round((x1 - x0) * (y1 - y0) / frame_pixels, 4) if frame_pixels else None,
+            "frames": self.frames,
+            "detections_dropped": self.detections_dropped,
+        }
@@ -0,0 +1,168 @@
+import asyncio
+import collections
+import time
+from typing import Callable, Dict, Optional
+
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.constant.application import SEND_QUEUE_CONTROL_SIZE, SEND_QUEUE_PREVIEW_SIZE
+from Nirikshan.logger import logging
+
+PRIORITY_ALERT = "alert"
+PRIORITY_CONTROL = "control"
+PRIORITY_PREVIEW = "preview"
+# in the order they are sent
+PRIORITIES = (PRIORITY_ALERT, PRIORITY_CONTROL, PRIORITY_PREVIEW)
+
+
+def classify(item) -> str:
+    """
+    Priority class of an outbound message: binary and JSON preview frames are
+    "preview", progress updates "control", everything else (accidents, saved
+    evidence, video info, completion and errors) "alert".
+    """
+    if isinstance(item, bytes):
+        return PRIORITY_PREVIEW
+    kind = item.get("type")
+    if kind == "frame":
+        return PRIORITY_PREVIEW
+    if kind == "progress":
+        return PRIORITY_CONTROL
+    return PRIORITY_ALERT
+
+
+class ClientSendQueue:
+    """
+    Outbound messages of one WebSocket client, sent by a task of its own so a
+    slow client never holds up the camera session feeding it. Once a
+    connection has its queue, everything sent to it goes through the queue,
+    so there is only ever one writer on the socket. Messages wait in one
+    queue per priority class and go out alerts first, then control, then
+    previews. Alerts are never dropped; the control and preview queues are
+    bounded and drop their oldest entry when full, so a client that cannot
+    keep up skips preview frames and stale progress updates.
+
+    Must only be used from the event loop that runs the sender task.
+    """
+    STATS_WINDOW = 1000
+
+    def __init__(self, websocket, name: str = "client", preview_size: int = SEND_QUEUE_PREVIEW_SIZE,
+                 control_size: int = SEND_QUEUE_CONTROL_SIZE):
+        """
+        :param websocket: Starlette WebSocket to send to
+        :param name: Label for logs, usually the connection id
+        :param preview_size: Preview frames kept waiting before the oldest is dropped
+        :param control_size: Progress messages kept waiting before the oldest is dropped
+        """
+        self.websocket = websocket
+        self.name = name
+        self._limits = {
+            PRIORITY_ALERT: None,
+            PRIORITY_CONTROL: max(1, control_size),
+            PRIORITY_PREVIEW: max(1, preview_size),
+        }
+        self._queues = {priority: collections.deque() for priority in PRIORITIES}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.error: Optional[BaseException] = None
+        self.sent: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self.dropped: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self._send_lags = collections.deque(maxlen=self.STATS_WINDOW)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def start(self):
+        """Starts the sender task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, item, on_sent: Optional[Callable] = None) -> bool:
+        """
+        Queues a message without waiting; returns False if the queue is closed
+        (the client went away or a send failed).
+
+        :param item: bytes for a binary frame, or a dict sent as JSON
+        :param on_sent: Optional callback run with (item, started, ended) once the message is sent
+        """
+        if self._closed:
+            return False
+        priority = classify(item)
+        pending = self._queues[priority]
+        limit = self._limits[priority]
+        if limit is not None and len(pending) >= limit:
+            pending.popleft()
+            self.dropped[priority] += 1
+        pending.append((item, time.perf_counter(), on_sent))
+        self._wakeup.set()
+        return True
+
+    def discard_stale(self):
+        """
+        Drops the queued previews and progress updates, e.g. when the stream
+        feeding them ends or the client switches cameras; queued alerts still go out.
+        """
+        for priority in (PRIORITY_CONTROL, PRIORITY_PREVIEW):
+            self.dropped[priority] += len(self._queues[priority])
+            self._queues[priority].clear()
+
+    def close(self):
+        """Drops everything still queued and stops the sender task."""
+        self._closed = True
+        for pending in self._queues.values():
+            pending.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def _next(self):
+        for priority in PRIORITIES:
+            pending = self._queues[priority]
+            if pending:
+                return priority, pending.popleft()
+        return None
+
+    async def _send(self, item):
+        if isinstance(item, bytes):
+            await self.websocket.send_bytes(item)
+        else:
+            await self.websocket.send_json(item)
+
+    async def _run(self):
+        try:
+            while True:
+                entry = self._next()
+                if entry is None:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                priority, (item, queued_at, on_sent) = entry
+                started = time.perf_counter()
+                await self._send(item)
+                ended = time.perf_counter()
+                self.sent[priority] += 1
+                self._send_lags.append(ended - queued_at)
+                if on_sent is not None:
+                    on_sent(item, started, ended)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+            logging.warning(f"Sending to {self.name} failed: {str(e)}")
+            self.close()
+
+    def oldest_pending_age(self) -> float:
+        """Seconds the oldest queued message has been waiting, 0 if none."""
+        queued = [pending[0][1] for pending in self._queues.values() if pending]
+        return time.perf_counter() - min(queued) if queued else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "pending": {priority: len(pending) for priority, pending in self._queues.items()},
+            "sent": dict(self.sent),
+            "dropped": dict(self.dropped),
+            "oldest_pending_ms": round(self.oldest_pending_age() * 1000, 3),
+            "send_lag_ms": summarize_timings(self._send_lags),
+            "closed": self._closed,
+            "error": str(self.error) if self.error is not None else None,
+        }
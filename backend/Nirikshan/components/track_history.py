@@ -0,0 +1,116 @@
+import numpy as np
+
+from Nirikshan.constant.training_pipeline import (
+    MAX_TRACE_POINTS,
+    TRACK_HISTORY_CAPACITY,
+    TRACKER_LOST_TRACK_BUFFER,
+)
+
+
+class TrackHistoryStore:
+    """
+    Fixed-size trace storage for one camera. Every track gets a slot holding a
+    ring buffer of its last max_points centre points; slots of tracks not seen
+    for ttl_frames frames are released and reused, and when all slots are busy
+    the least recently seen track is evicted. Tracks that find no slot because
+    more tracks than slots are visible in one frame get no trace point for
+    that frame. Memory never grows after construction, however long the
+    camera runs.
+    """
+
+    def __init__(self, capacity: int = TRACK_HISTORY_CAPACITY, max_points: int = MAX_TRACE_POINTS,
+                 ttl_frames: int = TRACKER_LOST_TRACK_BUFFER):
+        self.capacity = capacity
+        self.max_points = max_points
+        self.ttl_frames = ttl_frames
+        self._points = np.zeros((capacity, max_points, 2), dtype=np.int32)
+        self._lengths = np.zeros(capacity, dtype=np.int32)
+        self._heads = np.zeros(capacity, dtype=np.int32)
+        self._last_seen = np.zeros(capacity, dtype=np.int64)
+        self._slots = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self.frame_index = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, track_id):
+        return track_id in self._slots
+
+    def __iter__(self):
+        return iter(list(self._slots))
+
+    def _allocate(self, track_id, protected) -> int:
+        """Returns a slot for a new track, or -1 if every slot holds a track seen in this frame."""
+        if not self._free:
+            in_use = np.array([slot for tid, slot in self._slots.items() if tid not in protected], dtype=np.int64)
+            if not in_use.size:
+                return -1
+            victim = int(in_use[np.argmin(self._last_seen[in_use])])
+            self._release([tid for tid, slot in self._slots.items() if slot == victim])
+        slot = self._free.pop()
+        self._lengths[slot] = 0
+        self._heads[slot] = 0
+        self._slots[track_id] = slot
+        return slot
+
+    def _release(self, track_ids):
+        for track_id in track_ids:
+            self._free.append(self._slots.pop(track_id))
+            self.evicted += 1
+
+    def update(self, track_ids, centers):
+        """
+        Appends this frame's centre point for each tracked object and expires
+        tracks that have not been seen for ttl_frames frames. Call once per frame,
+        also when nothing was tracked.
+
+        :param track_ids: Sequence of tracker ids seen in this frame
+        :param centers: (N, 2) integer array of their centre points
+        """
+        self.frame_index += 1
+        track_ids = list(track_ids)
+        if track_ids:
+            protected = set(track_ids)
+            slots = np.fromiter(
+                (self._slots[tid] if tid in self._slots else self._allocate(tid, protected) for tid in track_ids),
+                dtype=np.int64, count=len(track_ids))
+            if slots.min() < 0:
+                stored = slots >= 0
+                slots, centers = slots[stored], np.asarray(centers)[stored]
+            heads = self._heads[slots]
+            self._points[slots, heads] = centers
+            self._heads[slots] = (heads + 1) % self.max_points
+            self._lengths[slots] = np.minimum(self._lengths[slots] + 1, self.max_points)
+            self._last_seen[slots] = self.frame_index
+
+        if self._slots:
+            expired = [tid for tid, slot in self._slots.items()
+                       if self.frame_index - self._last_seen[slot] > self.ttl_frames]
+            self._release(expired)
+
+    def get(self, track_id, default=None):
+        """
+        :return: (N, 2) int32 array of the track's points, oldest first, or default
+        """
+        slot = self._slots.get(track_id)
+        if slot is None:
+            return default
+        length = self._lengths[slot]
+        if length < self.max_points:
+            return self._points[slot, :length]
+        head = self._heads[slot]
+        return np.concatenate((self._points[slot, head:], self._points[slot, :head]))
+
+    def items(self):
+        for track_id in list(self._slots):
+            yield track_id, self.get(track_id)
+
+    def stats(self):
+        return {
+            "active_tracks": len(self._slots),
+            "capacity": self.capacity,
+            "evicted": self.evicted,
+            "bytes": int(self._points.nbytes + self._lengths.nbytes + self._heads.nbytes + self._last_seen.nbytes),
+        }
@@ -0,0 +1,127 @@
+import os
+
+# Cross-camera inference scheduler: frames submitted by all live sessions are
+# grouped into one forward pass of at most INFERENCE_MAX_BATCH_SIZE frames,
+# waiting no longer than INFERENCE_MAX_WAIT_MS for the batch to fill up.
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("NIRIKSHAN_INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("NIRIKSHAN_INFERENCE_MAX_WAIT_MS", "10"))
+
+# Live stream sessions run decode -> infer -> track/annotate -> encode in worker
+# threads; each hand-off queue holds at most STREAM_STAGE_QUEUE_SIZE frames.
+STREAM_STAGE_QUEUE_SIZE = int(os.getenv("NIRIKSHAN_STREAM_STAGE_QUEUE_SIZE", "4"))
+STREAM_MAX_WIDTH = 1280
+STREAM_MAX_FPS = 24.0
+STREAM_JPEG_QUALITY = 85
+
+# Inference gating. Every INFERENCE_STRIDE-th frame of a source is inferred;
+# with MOTION_GATE on, frames are instead diffed (MOTION_GATE_WIDTH pixels wide,
+# grayscale) against the last inferred one and a static scene skips up to
+# MOTION_GATE_MAX_SKIP frames in a row. Motion (more than MOTION_GATE_THRESHOLD
+# of the pixels changing by MOTION_GATE_PIXEL_DELTA) or an accident-class
+# candidate forces full-rate detection for MOTION_GATE_HOLD_FRAMES frames.
+INFERENCE_STRIDE = int(os.getenv("NIRIKSHAN_INFERENCE_STRIDE", "1"))
+MOTION_GATE = os.getenv("NIRIKSHAN_MOTION_GATE", "0") == "1"
+MOTION_GATE_THRESHOLD = float(os.getenv("NIRIKSHAN_MOTION_GATE_THRESHOLD", "0.002"))
+MOTION_GATE_MAX_SKIP = int(os.getenv("NIRIKSHAN_MOTION_GATE_MAX_SKIP", "12"))
+MOTION_GATE_HOLD_FRAMES = int(os.getenv("NIRIKSHAN_MOTION_GATE_HOLD_FRAMES", "24"))
+MOTION_GATE_WIDTH = 96
+MOTION_GATE_PIXEL_DELTA = 20
+
+# Live sources (RTSP and friends) are read by a grabber thread that only keeps
+# the newest frame; frames older than LIVE_MAX_FRAME_AGE_MS are skipped before
+# inference whenever a newer one is already waiting.
+LIVE_STREAM_SCHEMES = ("rtsp://", "rtsps://", "rtmp://", "udp://", "srt://")
+LIVE_MAX_FRAME_AGE_MS = float(os.getenv("NIRIKSHAN_LIVE_MAX_FRAME_AGE_MS", "500"))
+
+# Model input preparation. "stride" keeps the frame size, rounded down to a
+# multiple of 32; "letterbox" scales and pads every frame to a fixed
+# MODEL_INPUT_SIZE square so the input tensor shape never changes.
+PREPROCESS_MODE = os.getenv("NIRIKSHAN_PREPROCESS_MODE", "stride")
+MODEL_INPUT_SIZE = int(os.getenv("NIRIKSHAN_MODEL_INPUT_SIZE", "640"))
+
+# Inference runtime for ModelTrainer: "torch" runs best.pt through ultralytics,
+# "onnx" and "openvino" run CPU exports of it (created on first use). INT8
+# quantization calibrates on frames from INFERENCE_CALIBRATION_DIR.
+INFERENCE_BACKEND = os.getenv("NIRIKSHAN_INFERENCE_BACKEND", "torch")
+INFERENCE_INT8 = os.getenv("NIRIKSHAN_INFERENCE_INT8", "0") == "1"
+INFERENCE_CALIBRATION_DIR = os.getenv("NIRIKSHAN_INFERENCE_CALIBRATION_DIR", "accident_images")
+INFERENCE_CALIBRATION_FRAMES = int(os.getenv("NIRIKSHAN_INFERENCE_CALIBRATION_FRAMES", "300"))
+
+# Model instances loaded in the API process. Uploads, video jobs and the stream
+# scheduler borrow an idle one per forward pass, so up to MODEL_POOL_SIZE of
+# them run inference in parallel (each with an even share of the cores).
+MODEL_POOL_SIZE = int(os.getenv("NIRIKSHAN_MODEL_POOL_SIZE", "1"))
+
+# Startup: the model is loaded in the background after uvicorn binds, then
+# warmed up with WARMUP_RUNS passes per expected camera resolution ("WxH").
+WARMUP_RESOLUTIONS = os.getenv("NIRIKSHAN_WARMUP_RESOLUTIONS", "1280x720")
+WARMUP_BATCH_SIZES = os.getenv("NIRIKSHAN_WARMUP_BATCH_SIZES", "1")
+WARMUP_RUNS = int(os.getenv("NIRIKSHAN_WARMUP_RUNS", "2"))
+
+# Preview subscriptions: "thumbnail" clients get THUMBNAIL_FPS downscaled
+# frames, "alerts" clients get no frames at all (nothing is rendered or
+# encoded unless an accident image has to be saved).
+THUMBNAIL_FPS = float(os.getenv("NIRIKSHAN_THUMBNAIL_FPS", "1"))
+THUMBNAIL_WIDTH = int(os.getenv("NIRIKSHAN_THUMBNAIL_WIDTH", "320"))
+THUMBNAIL_JPEG_QUALITY = 70
+PROGRESS_INTERVAL_FRAMES = 30
+
+# Camera worker processes: with CAMERA_WORKERS > 0 every camera session runs in
+# one of that many worker processes (each with its own model) instead of the
+# API process, so decoding and tracking for N cameras spread over N cores.
+CAMERA_WORKERS = int(os.getenv("NIRIKSHAN_CAMERA_WORKERS", "0"))
+CAMERA_WORKER_QUEUE_SIZE = int(os.getenv("NIRIKSHAN_CAMERA_WORKER_QUEUE_SIZE", "16"))
+
+# Pre/post-accident frame buffers: "raw" keeps BGR frames in one preallocated
+# array per buffer, "jpeg" keeps them encoded at FRAME_BUFFER_JPEG_QUALITY.
+FRAME_BUFFER_MODE = os.getenv("NIRIKSHAN_FRAME_BUFFER_MODE", "raw")
+FRAME_BUFFER_JPEG_QUALITY = int(os.getenv("NIRIKSHAN_FRAME_BUFFER_JPEG_QUALITY", "90"))
+
+# Evidence writer: accident images and clips are encoded and written on a
+# background thread; submitters block once EVIDENCE_QUEUE_SIZE jobs are waiting.
+EVIDENCE_QUEUE_SIZE = int(os.getenv("NIRIKSHAN_EVIDENCE_QUEUE_SIZE", "32"))
+
+# Accident clips are encoded while the incident is in progress. Live streams
+# record them into ACCIDENT_CLIPS_DIR unless STREAM_RECORD_CLIPS is "0"; up to
+# CLIP_ENCODER_QUEUE_SIZE frames (at least the pre-roll) wait for the encoder.
+ACCIDENT_CLIPS_DIR = os.getenv("NIRIKSHAN_ACCIDENT_CLIPS_DIR", "accident_clips")
+STREAM_RECORD_CLIPS = os.getenv("NIRIKSHAN_STREAM_RECORD_CLIPS", "1") == "1"
+CLIP_ENCODER_QUEUE_SIZE = int(os.getenv("NIRIKSHAN_CLIP_ENCODER_QUEUE_SIZE", "64"))
+
+# Incident catalog: SQLite index of saved accident images behind /images.
+INCIDENT_DB_PATH = os.getenv("NIRIKSHAN_INCIDENT_DB_PATH", "incidents.db")
+INCIDENT_PAGE_SIZE = 50
+INCIDENT_MAX_PAGE_SIZE = 500
+
+# Offline video jobs: /detect/video streams the upload to UPLOADS_DIR in
+# UPLOAD_CHUNK_SIZE chunks and queues it; VIDEO_JOB_WORKERS jobs run at a time,
+# at most VIDEO_JOB_MAX_PENDING wait, and the last VIDEO_JOB_HISTORY finished
+# jobs stay queryable.
+UPLOADS_DIR = os.getenv("NIRIKSHAN_UPLOADS_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_BYTES = int(os.getenv("NIRIKSHAN_UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+VIDEO_JOB_WORKERS = int(os.getenv("NIRIKSHAN_VIDEO_JOB_WORKERS", str(MODEL_POOL_SIZE)))
+VIDEO_JOB_MAX_PENDING = int(os.getenv("NIRIKSHAN_VIDEO_JOB_MAX_PENDING", "32"))
+VIDEO_JOB_HISTORY = 200
+
+# Parallel offline processing: with PARALLEL_VIDEO_WORKERS > 1, videos longer
+# than PARALLEL_VIDEO_CHUNK_FRAMES are split into chunks of that many frames and
+# detected on that many processes (each with its own model); chunks re-run
+# PARALLEL_VIDEO_OVERLAP_FRAMES earlier frames when the inference gate is on,
+# and are run again from the exact gate state if that did not catch up.
+PARALLEL_VIDEO_WORKERS = int(os.getenv("NIRIKSHAN_PARALLEL_VIDEO_WORKERS", "0"))
+PARALLEL_VIDEO_CHUNK_FRAMES = int(os.getenv("NIRIKSHAN_PARALLEL_VIDEO_CHUNK_FRAMES", "1800"))
+PARALLEL_VIDEO_OVERLAP_FRAMES = int(os.getenv("NIRIKSHAN_PARALLEL_VIDEO_OVERLAP_FRAMES", "48"))
+
+# Frame timeline tracing: /admin/tracing switches recording of per-frame stage
+# spans on for one camera session or video job; each trace keeps the newest
+# TRACE_MAX_EVENTS spans and is exported as Chrome trace-event JSON.
+TRACE_MAX_EVENTS = int(os.getenv("NIRIKSHAN_TRACE_MAX_EVENTS", "200000"))
+
+# Per-client send queues: every WebSocket connection is written to by its own
+# sender task only. Alerts and status messages are never dropped; at most
+# SEND_QUEUE_PREVIEW_SIZE preview frames and SEND_QUEUE_CONTROL_SIZE progress
+# messages wait per client, oldest dropped first, so a slow client loses
+# previews instead of holding up its camera session.
+SEND_QUEUE_PREVIEW_SIZE = int(os.getenv("NIRIKSHAN_SEND_QUEUE_PREVIEW_SIZE", "2"))
+SEND_QUEUE_CONTROL_SIZE = int(os.getenv("NIRIKSHAN_SEND_QUEUE_CONTROL_SIZE", "16"))
@@ -0,0 +1,29 @@
+CLASS_NAMES = {
+    0: "bike",
+    1: "bike_bike_accident",
+    2: "bike_object_accident",
+    3: "bike_person_accident",
+    4: "car",
+    5: "car_bike_accident",
+    6: "car_car_accident",
+    7: "car_object_accident",
+    8: "car_person_accident",
+    9: "person"
+}
+
+VEHICLE_CLASS_IDS = [0, 4]
+ACCIDENT_CLASS_IDS = [1, 2, 3, 5, 6, 7, 8]
+
+CONFIDENCE_THRESHOLD = 0.85
+
+MIN_FRAMES_BETWEEN_DETECTIONS = 30
+BUFFER_SIZE = 15
+POST_ACCIDENT_FRAMES = 15
+MAX_CLIP_FRAMES = 300
+ACCIDENT_COOLDOWN_FRAMES = 90
+ACCIDENT_STATE_DURATION = 120
+TRACE_LENGTH = 30
+MAX_TRACE_POINTS = 90
+
+TRACKER_LOST_TRACK_BUFFER = 30
+TRACK_HISTORY_CAPACITY = 256
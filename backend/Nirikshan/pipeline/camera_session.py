@@ -0,0 +1,346 @@
+import asyncio
+import functools
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Nirikshan.components.metrics import ACCIDENTS_TOTAL, STAGE_SECONDS, remove_camera
+from Nirikshan.components.send_queue import ClientSendQueue
+from Nirikshan.logger import logging
+from Nirikshan.pipeline.stream_pipeline import FramePacket, StreamPipeline, StreamSession
+from Nirikshan.utils.main_utils import redact_source
+from Nirikshan.utils.frame_transport import (
+    FRAME_FORMAT_BINARY,
+    FRAME_FORMAT_JSON,
+    SUBSCRIPTION_ALERTS,
+    SUBSCRIPTION_FULL,
+    pack_binary_frame,
+)
+
+
+class Subscriber:
+    """
+    One WebSocket attached to a camera session, with its own transport
+    preferences. Messages go into the send queue of the connection, whose task
+    does the I/O; send() returns False once that queue is closed.
+    """
+    __slots__ = ("connection_id", "frame_format", "subscription", "queue")
+
+    def __init__(self, connection_id: str, queue: ClientSendQueue, frame_format: str, subscription: str):
+        self.connection_id = connection_id
+        self.frame_format = frame_format
+        self.subscription = subscription
+        self.queue = queue
+
+    def send(self, items: List, on_sent: Optional[Callable] = None) -> bool:
+        return all([self.queue.put(item, on_sent) for item in items])
+
+
+class CameraSession:
+    """
+    One decode/inference/tracking pipeline per camera, shared by every WebSocket
+    watching it. Starts with the first subscriber, stops when the last one
+    leaves, and fans alerts and frames out to all attached subscribers.
+    """
+
+    def __init__(self, camera_key: str, stream, on_finished: Optional[Callable] = None):
+        """
+        :param camera_key: camera_id, or the video path without credentials for cameras without one;
+            used in logs and as the camera label of its metrics, which are dropped when the session ends
+        :param stream: StreamPipeline, or a RemoteStream running in a camera worker process
+        :param on_finished: Called with the session once its stream has ended
+        """
+        self.camera_key = camera_key
+        self.video_path = stream.video_path
+        self.subscribers: Dict[str, Subscriber] = {}
+        self.stream = stream
+        self.video_info: Optional[Dict] = None
+        self.frames_broadcast = 0
+        self._send_seconds = STAGE_SECONDS.labels(camera_key, "send")
+        self._accidents = ACCIDENTS_TOTAL.labels(camera_key)
+        self._on_finished = on_finished
+        self._task: Optional[asyncio.Task] = None
+        self._metrics_removed = False
+
+    @property
+    def idle(self) -> bool:
+        return not self.subscribers
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def _remove_metrics(self):
+        # runs before the registry can start another session for this camera, so a successor's
+        # series are never removed
+        if not self._metrics_removed:
+            self._metrics_removed = True
+            remove_camera(self.camera_key)
+
+    async def close(self):
+        """Stops the pipeline and the broadcast task; called once the last subscriber has left."""
+        self._remove_metrics()
+        self.stream.stop()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logging.info(f"Camera session closed: {self.camera_key}")
+
+    async def attach(self, subscriber: Subscriber):
+        """Adds a subscriber; late joiners get the video info of the running stream first."""
+        if self.video_info is not None:
+            subscriber.send([self._video_info_for(subscriber)])
+        self.subscribers[subscriber.connection_id] = subscriber
+        self._refresh_subscriptions()
+        logging.info(f"{subscriber.connection_id} attached to camera session {self.camera_key} "
+                     f"({len(self.subscribers)} subscribers)")
+
+    def detach(self, connection_id: str) -> bool:
+        """
+        Removes a subscriber and drops the previews and progress still queued
+        for it; returns False if it was not attached.
+        """
+        subscriber = self.subscribers.pop(connection_id, None)
+        if subscriber is None:
+            return False
+        subscriber.queue.discard_stale()
+        self._refresh_subscriptions()
+        logging.info(f"{connection_id} detached from camera session {self.camera_key} "
+                     f"({len(self.subscribers)} subscribers)")
+        return True
+
+    def _refresh_subscriptions(self):
+        subscribers = list(self.subscribers.values())
+        self.stream.set_subscriptions(
+            frozenset(subscriber.subscription for subscriber in subscribers
+                      if subscriber.subscription != SUBSCRIPTION_ALERTS),
+            frozenset(subscriber.frame_format for subscriber in subscribers)
+        )
+
+    def _video_info_for(self, subscriber: Subscriber) -> Dict:
+        return {**self.video_info, "frame_format": subscriber.frame_format, "subscription": subscriber.subscription}
+
+    def _on_sent(self, packet: Optional[FramePacket], item, started: float, ended: float):
+        self._send_seconds.observe(ended - started)
+        if packet is not None and packet.tracer is not None:
+            packet.tracer.record("send", started, ended, packet.frame_number,
+                                 message=item.get("type") if isinstance(item, dict) else "binary_frame")
+
+    def _broadcast(self, build: Callable[[Subscriber], List], packet: Optional[FramePacket] = None):
+        """
+        Queues each subscriber its own list of messages; never waits for a
+        client. Subscribers whose connection can no longer be sent to are detached.
+        """
+        on_sent = functools.partial(self._on_sent, packet)
+        for subscriber in list(self.subscribers.values()):
+            items = build(subscriber)
+            if items and not subscriber.send(items, on_sent):
+                logging.warning(f"Dropping subscriber {subscriber.connection_id} of {self.camera_key}: "
+                                f"{str(subscriber.queue.error)}")
+                self.detach(subscriber.connection_id)
+
+    def _frame_payloads(self, packet: FramePacket) -> Dict[Tuple[str, str], object]:
+        """Builds each (frame_format, level) payload once per packet, shared by every subscriber."""
+        stream = self.stream
+        progress = packet.frame_number / stream.total_frames if stream.total_frames > 0 else 0
+        timestamp = datetime.now().timestamp()
+        payloads = {}
+        for level, jpeg in packet.previews.items():
+            if FRAME_FORMAT_BINARY in stream.frame_formats:
+                payloads[(FRAME_FORMAT_BINARY, level)] = pack_binary_frame(packet.frame_number, timestamp, progress, jpeg)
+            encoded = packet.encoded_previews.get(level)
+            if encoded is not None:
+                payloads[(FRAME_FORMAT_JSON, level)] = {
+                    "type": "frame",
+                    "frame": encoded,
+                    "frame_number": packet.frame_number,
+                    "timestamp": timestamp,
+                    "display_time": packet.frame_number / stream.original_fps if stream.original_fps > 0 else 0,
+                    "total_frames": stream.total_frames,
+                    "progress": progress
+                }
+        return payloads
+
+    def _progress_message(self, packet: FramePacket) -> Dict:
+        stream = self.stream
+        if stream.is_live:
+            message = f"Processed {stream.frames_decoded} live frames, dropped {stream.frames_dropped}"
+        else:
+            message = f"Processed {packet.frame_number} of {stream.total_frames} frames"
+        return {
+            "type": "progress",
+            "message": message,
+            "severity": "info",
+            "frame_count": packet.frame_number,
+            "progress": packet.frame_number / stream.total_frames if stream.total_frames > 0 else 0,
+            "dropped_frames": stream.frames_dropped
+        }
+
+    async def _publish(self, packet: FramePacket):
+        for message in packet.messages:
+            if message.get("type") == "accident":
+                self._accidents.inc()
+                message["capture_latency_ms"] = round(self.stream.record_alert(packet) * 1000, 1)
+        payloads = self._frame_payloads(packet) if packet.has_frame else {}
+        progress = self._progress_message(packet) if packet.progress_due else None
+
+        def build(subscriber: Subscriber) -> List:
+            items = list(packet.messages)
+            payload = payloads.get((subscriber.frame_format, subscriber.subscription))
+            if payload is not None:
+                items.append(payload)
+            if progress is not None:
+                items.append(progress)
+            return items
+
+        self._broadcast(build, packet)
+        if payloads:
+            self.frames_broadcast += 1
+
+    async def _run(self):
+        stream = self.stream
+        try:
+            logging.info(f"Opening video for camera session {self.camera_key} from: "
+                         f"{redact_source(self.video_path)}")
+            await stream.open()
+            logging.info(f"Video opened: {stream.width}x{stream.height}, Original FPS: {stream.original_fps}, "
+                         f"Target FPS: {stream.target_fps}")
+
+            self.video_info = {
+                "type": "video_info",
+                "camera_id": self.camera_key,
+                "width": stream.width,
+                "height": stream.height,
+                "fps": stream.target_fps,
+                "original_fps": stream.original_fps,
+                "total_frames": stream.total_frames,
+                "message": f"Processing video at {stream.target_fps} FPS ({stream.width}x{stream.height})",
+                "severity": "info"
+            }
+            self._broadcast(lambda subscriber: [self._video_info_for(subscriber)])
+
+            stream.start()
+            while True:
+                packet = await stream.get()
+                if packet is None:
+                    break
+                await self._publish(packet)
+
+            complete = {
+                "type": "processing_complete",
+                "message": "Video processing completed",
+                "severity": "info",
+                **stream.summary(),
+                "timestamp": datetime.now().timestamp()
+            }
+            self._broadcast(lambda subscriber: [complete])
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error processing video for camera session {self.camera_key}: {str(e)}")
+            error = {
+                "type": "error",
+                "message": f"Error processing video: {str(e)}",
+                "severity": "error"
+            }
+            self._broadcast(lambda subscriber: [error])
+
+        finally:
+            stream.stop()
+            # the session is over: queued alerts and the completion message still go out, stale
+            # previews and progress updates would only arrive after them
+            for subscriber in self.subscribers.values():
+                subscriber.queue.discard_stale()
+            self._remove_metrics()
+            if self._on_finished is not None:
+                self._on_finished(self)
+
+    def stats(self) -> Dict:
+        stats = self.stream.stats()
+        stats["subscribers"] = {
+            connection_id: {
+                "frame_format": subscriber.frame_format,
+                "subscription": subscriber.subscription,
+                "send_queue": subscriber.queue.stats(),
+            }
+            for connection_id, subscriber in self.subscribers.items()
+        }
+        stats["frames_broadcast"] = self.frames_broadcast
+        return stats
+
+
+class CameraSessionRegistry:
+    """
+    Maps camera ids to their shared CameraSession and connections to the
+    camera they currently watch. Sessions without a camera_id are keyed by
+    their video path, so two clients opening the same file share one pipeline.
+    """
+
+    def __init__(self, scheduler, save_image: Optional[Callable] = None, worker_pool=None):
+        """
+        :param scheduler: InferenceScheduler shared by in-process streams
+        :param save_image: Callback saving accident images
+        :param worker_pool: Optional CameraWorkerPool; when given, cameras run in its worker processes
+        """
+        self.scheduler = scheduler
+        self.save_image = save_image
+        self.worker_pool = worker_pool
+        self.sessions: Dict[str, CameraSession] = {}
+        self.connections: Dict[str, str] = {}
+
+    async def subscribe(self, connection_id: str, send_queue: ClientSendQueue, video_path: str,
+                        metadata: Optional[Dict] = None, frame_format: str = FRAME_FORMAT_JSON,
+                        subscription: str = SUBSCRIPTION_FULL) -> CameraSession:
+        """
+        Attaches a connection to the session of its camera, starting the session if needed.
+
+        :param send_queue: Started ClientSendQueue of the connection; the session only puts into it
+        """
+        await self.unsubscribe(connection_id)
+
+        camera_key = str((metadata or {}).get("camera_id") or redact_source(video_path))
+        camera_session = self.sessions.get(camera_key)
+        if camera_session is not None and camera_session.video_path != video_path:
+            logging.warning(f"Camera {camera_key} is already streaming {redact_source(camera_session.video_path)}; "
+                            f"ignoring {redact_source(video_path)} from {connection_id}")
+
+        self.connections[connection_id] = camera_key
+        if camera_session is None:
+            camera_session = CameraSession(camera_key, self._create_stream(camera_key, video_path, metadata),
+                                           on_finished=self._finished)
+            self.sessions[camera_key] = camera_session
+            await camera_session.attach(Subscriber(connection_id, send_queue, frame_format, subscription))
+            camera_session.start()
+        else:
+            await camera_session.attach(Subscriber(connection_id, send_queue, frame_format, subscription))
+        return camera_session
+
+    def _create_stream(self, camera_key: str, video_path: str, metadata: Optional[Dict]):
+        if self.worker_pool is not None:
+            return self.worker_pool.open_stream(camera_key, video_path, metadata)
+        session = StreamSession(camera_key, metadata, self.save_image, frozenset())
+        return StreamPipeline(video_path, session, self.scheduler, frame_formats=frozenset())
+
+    async def unsubscribe(self, connection_id: str):
+        """Detaches a connection; closes its camera session if nobody else is watching."""
+        camera_key = self.connections.pop(connection_id, None)
+        camera_session = self.sessions.get(camera_key) if camera_key is not None else None
+        if camera_session is None:
+            return
+        camera_session.detach(connection_id)
+        if camera_session.idle:
+            self.sessions.pop(camera_key, None)
+            await camera_session.close()
+
+    def _finished(self, camera_session: CameraSession):
+        if self.sessions.get(camera_session.camera_key) is camera_session:
+            del self.sessions[camera_session.camera_key]
+        for connection_id in list(camera_session.subscribers):
+            if self.connections.get(connection_id) == camera_session.camera_key:
+                del self.connections[connection_id]
+
+    def stats(self) -> Dict:
+        return {camera_key: camera_session.stats() for camera_key, camera_session in list(self.sessions.items())}
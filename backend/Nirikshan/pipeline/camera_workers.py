@@ -0,0 +1,533 @@
+import asyncio
+import base64
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from Nirikshan.components.evidence_writer import close_shared_evidence
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.constant.application import (
+    CAMERA_WORKER_QUEUE_SIZE,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+)
+from Nirikshan.logger import logging
+from Nirikshan.pipeline.stream_pipeline import FramePacket
+from Nirikshan.utils.frame_transport import FRAME_FORMAT_BINARY, FRAME_FORMAT_JSON
+from Nirikshan.utils.main_utils import redact_source
+
+MONITOR_INTERVAL = 0.5
+
+# Commands (API process -> worker):
+#   ("start", camera_key, video_path, metadata, subscriptions)
+#   ("subscribe", camera_key, subscriptions)
+#   ("stop", camera_key)
+#   None shuts the worker down.
+# Events (worker -> API process): (kind, camera_key, payload) with kind one of
+# "video_info", "packet", "complete" and "error".
+
+
+def _to_wall_clock(perf_time: float) -> float:
+    return time.time() - (time.perf_counter() - perf_time)
+
+
+def _from_wall_clock(wall_time: float) -> float:
+    return time.perf_counter() - (time.time() - wall_time)
+
+
+class _CameraWorker:
+    """Runs inside a worker process: one model, one scheduler, any number of camera streams."""
+
+    def __init__(self, worker_id: int, commands, events, save_image: Optional[Callable], parent_pid: int):
+        self.worker_id = worker_id
+        self.commands = commands
+        self.events = events
+        self.save_image = save_image
+        self.parent_pid = parent_pid
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.scheduler = None
+        self.model_loader = None
+        self.streams: Dict = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.subscriptions: Dict[str, FrozenSet[str]] = {}
+
+    def _on_model_ready(self, pipeline):
+        self.scheduler.model_trainer = pipeline.model_trainer
+        self.scheduler.start()
+
+    async def run(self):
+        from Nirikshan.components.inference_scheduler import InferenceScheduler
+        from Nirikshan.pipeline.model_loader import ModelLoader
+
+        self.loop = asyncio.get_running_loop()
+        self.scheduler = InferenceScheduler(None, max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                                            max_wait_ms=INFERENCE_MAX_WAIT_MS)
+        self.model_loader = ModelLoader(on_ready=self._on_model_ready)
+        self.model_loader.start()
+
+        inbox = asyncio.Queue()
+        threading.Thread(target=self._read_commands, args=(inbox,), name="camera-worker-commands",
+                         daemon=True).start()
+        logging.info(f"Camera worker {self.worker_id} started (pid {os.getpid()})")
+        try:
+            while True:
+                command = await inbox.get()
+                if command is None:
+                    break
+                kind, camera_key, *args = command
+                if kind == "start":
+                    self._start(camera_key, *args)
+                elif kind == "subscribe":
+                    self.subscriptions[camera_key] = args[0]
+                    stream = self.streams.get(camera_key)
+                    if stream is not None:
+                        stream.set_subscriptions(args[0], frozenset((FRAME_FORMAT_BINARY,)))
+                elif kind == "stop":
+                    self._stop(camera_key)
+        finally:
+            for camera_key in list(self.tasks):
+                self._stop(camera_key)
+            self.scheduler.stop()
+            # flush images this worker queued, if it saved any
+            close_shared_evidence()
+            logging.info(f"Camera worker {self.worker_id} stopped")
+
+    def _read_commands(self, inbox: asyncio.Queue):
+        while True:
+            try:
+                command = self.commands.get(timeout=1.0)
+            except queue.Empty:
+                if os.getppid() != self.parent_pid:
+                    command = None
+                else:
+                    continue
+            except (EOFError, OSError):
+                command = None
+            self.loop.call_soon_threadsafe(inbox.put_nowait, command)
+            if command is None:
+                return
+
+    def _start(self, camera_key: str, video_path: str, metadata: Optional[Dict], subscriptions: FrozenSet[str]):
+        self._stop(camera_key)
+        self.subscriptions[camera_key] = subscriptions
+        self.tasks[camera_key] = asyncio.create_task(self._run_camera(camera_key, video_path, metadata))
+
+    def _stop(self, camera_key: str):
+        self.subscriptions.pop(camera_key, None)
+        stream = self.streams.pop(camera_key, None)
+        if stream is not None:
+            stream.stop()
+        task = self.tasks.pop(camera_key, None)
+        if task is not None:
+            task.cancel()
+
+    async def _emit(self, kind: str, camera_key: str, payload=None):
+        # blocks only this camera when the API process falls behind
+        await self.loop.run_in_executor(None, self.events.put, (kind, camera_key, payload))
+
+    async def _run_camera(self, camera_key: str, video_path: str, metadata: Optional[Dict]):
+        from Nirikshan.pipeline.stream_pipeline import StreamPipeline, StreamSession
+
+        task = asyncio.current_task()
+        stream = None
+        try:
+            if not await self.model_loader.wait_async():
+                raise RuntimeError(f"Model failed to load: {self.model_loader.error}")
+
+            session = StreamSession(camera_key, metadata, self.save_image,
+                                    self.subscriptions.get(camera_key, frozenset()))
+            stream = StreamPipeline(video_path, session, self.scheduler,
+                                    frame_formats=frozenset((FRAME_FORMAT_BINARY,)))
+            self.streams[camera_key] = stream
+            await stream.open()
+            await self._emit("video_info", camera_key, {
+                "width": stream.width,
+                "height": stream.height,
+                "original_fps": stream.original_fps,
+                "target_fps": stream.target_fps,
+                "total_frames": stream.total_frames,
+                "is_live": stream.is_live,
+            })
+
+            stream.start()
+            while True:
+                packet = await stream.get()
+                if packet is None:
+                    break
+                await self._emit("packet", camera_key, {
+                    "frame_number": packet.frame_number,
+                    "captured_at": _to_wall_clock(packet.captured_at),
+                    "previews": packet.previews,
+                    "messages": packet.messages,
+                    "progress_due": packet.progress_due,
+                    "frames_decoded": stream.frames_decoded,
+                    "frames_dropped": stream.frames_dropped,
+                    "stats": stream.stats() if packet.progress_due else None,
+                })
+            await self._emit("complete", camera_key, {"summary": stream.summary(), "stats": stream.stats()})
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Camera worker {self.worker_id} failed on {camera_key}: {str(e)}")
+            await self._emit("error", camera_key, str(e))
+
+        finally:
+            if stream is not None:
+                stream.stop()
+            if self.tasks.get(camera_key) is task:
+                del self.tasks[camera_key]
+                self.streams.pop(camera_key, None)
+
+
+def _worker_main(worker_id: int, commands, events, save_image: Optional[Callable],
+                 torch_threads: int, parent_pid: int):
+    if torch_threads > 0:
+        import torch
+        torch.set_num_threads(torch_threads)
+    asyncio.run(_CameraWorker(worker_id, commands, events, save_image, parent_pid).run())
+
+
+class RemoteStream:
+    """
+    API-process stand-in for a StreamPipeline running in a camera worker.
+    Exposes the same interface CameraSession uses, fed by the pool's relay
+    thread instead of local stage threads. The relay thread serves every
+    camera of a worker, so it never waits for this one: packets are handed
+    to the event loop, and once CAMERA_WORKER_QUEUE_SIZE of them are waiting
+    the oldest one without messages is dropped. Packets carrying alerts and
+    the end of the stream are always kept.
+    """
+
+    def __init__(self, pool: "CameraWorkerPool", camera_key: str, video_path: str, metadata: Optional[Dict]):
+        self.pool = pool
+        self.camera_key = camera_key
+        self.video_path = video_path
+        self.metadata = metadata
+        self.subscriptions: FrozenSet[str] = frozenset()
+        self.frame_formats: FrozenSet[str] = frozenset()
+        self.worker_id: Optional[int] = None
+        self.reassignments = 0
+
+        self.width = 0
+        self.height = 0
+        self.original_fps = 0.0
+        self.target_fps = 0.0
+        self.total_frames = 0
+        self.is_live = False
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.last_frame_number = 0
+        self.packets_dropped = 0
+        self.alert_latencies = deque(maxlen=1000)
+        self.error: Optional[BaseException] = None
+
+        self._summary: Dict = {}
+        self._stats: Dict = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # only touched on the event loop
+        self._output: deque = deque()
+        self._output_ready: Optional[asyncio.Event] = None
+        self._opened: Optional[asyncio.Future] = None
+        self._closed = threading.Event()
+
+    async def open(self):
+        """Assigns the camera to a worker and waits until the worker has opened the video."""
+        self._loop = asyncio.get_running_loop()
+        self._output_ready = asyncio.Event()
+        self._opened = self._loop.create_future()
+        self.pool.assign(self)
+        await self._opened
+
+    def start(self):
+        pass
+
+    def stop(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.pool.release(self)
+
+    async def get(self) -> Optional[FramePacket]:
+        while not self._output:
+            self._output_ready.clear()
+            await self._output_ready.wait()
+        packet = self._output.popleft()
+        if packet is None and self.error is not None:
+            raise self.error
+        return packet
+
+    def set_subscriptions(self, subscriptions: FrozenSet[str], frame_formats: FrozenSet[str]):
+        self.subscriptions = frozenset(subscriptions)
+        self.frame_formats = frozenset(frame_formats)
+        if self.worker_id is not None:
+            self.pool.send(self, ("subscribe", self.camera_key, self.subscriptions))
+
+    def summary(self) -> Dict:
+        return dict(self._summary)
+
+    def record_alert(self, packet: FramePacket) -> float:
+        latency = time.perf_counter() - packet.captured_at
+        self.alert_latencies.append(latency)
+        return latency
+
+    def stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats.update({
+            "source": redact_source(self.video_path),
+            "worker": self.worker_id,
+            "worker_reassignments": self.reassignments,
+            "relay_packets_dropped": self.packets_dropped,
+            "alert_latency_ms": summarize_timings(self.alert_latencies),
+        })
+        return stats
+
+    def _resolve_open(self, error: Optional[BaseException] = None):
+        def resolve():
+            if not self._opened.done():
+                if error is None:
+                    self._opened.set_result(None)
+                else:
+                    self._opened.set_exception(error)
+        self._loop.call_soon_threadsafe(resolve)
+
+    def _enqueue(self, item):
+        if len(self._output) >= CAMERA_WORKER_QUEUE_SIZE:
+            for index, queued in enumerate(self._output):
+                if queued is not None and not queued.messages:
+                    del self._output[index]
+                    self.packets_dropped += 1
+                    break
+        self._output.append(item)
+        self._output_ready.set()
+
+    def _deliver(self, item) -> bool:
+        """Hands a packet (or the end-of-stream None) to the event loop without waiting."""
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, item)
+        except RuntimeError:
+            return False
+        return True
+
+    def handle_event(self, kind: str, payload):
+        """Called from the relay thread of the worker currently running this camera."""
+        if self._closed.is_set():
+            return
+        if kind == "video_info":
+            self.width = payload["width"]
+            self.height = payload["height"]
+            self.original_fps = payload["original_fps"]
+            self.target_fps = payload["target_fps"]
+            self.total_frames = payload["total_frames"]
+            self.is_live = payload["is_live"]
+            self._resolve_open()
+        elif kind == "packet":
+            packet = FramePacket(payload["frame_number"], None, _from_wall_clock(payload["captured_at"]))
+            packet.previews = payload["previews"]
+            if FRAME_FORMAT_JSON in self.frame_formats:
+                packet.encoded_previews = {level: base64.b64encode(jpeg).decode('utf-8')
+                                           for level, jpeg in packet.previews.items()}
+            packet.messages = payload["messages"]
+            packet.progress_due = payload["progress_due"]
+            self.frames_decoded = payload["frames_decoded"]
+            self.frames_dropped = payload["frames_dropped"]
+            self.last_frame_number = packet.frame_number
+            if payload["stats"] is not None:
+                self._stats = payload["stats"]
+            self._deliver(packet)
+        elif kind == "complete":
+            self._summary = payload["summary"]
+            self._stats = payload["stats"]
+            self._deliver(None)
+        elif kind == "error":
+            self.error = RuntimeError(payload)
+            if self._opened.done():
+                self._deliver(None)
+            else:
+                self._resolve_open(self.error)
+        elif kind == "reassigned":
+            packet = FramePacket(self.last_frame_number, None, time.perf_counter())
+            packet.messages = [{
+                "type": "worker_restarted",
+                "message": f"Camera worker failed, stream moved to worker {payload}",
+                "severity": "warning"
+            }]
+            self._deliver(packet)
+
+
+class _WorkerHandle:
+    def __init__(self, index: int, process, commands, events):
+        self.index = index
+        self.process = process
+        self.commands = commands
+        self.events = events
+        self.cameras = set()
+        self.retired = threading.Event()
+        self.relay: Optional[threading.Thread] = None
+
+
+class CameraWorkerPool:
+    """
+    Supervisor for camera worker processes. Assigns each camera to the least
+    loaded worker, relays its events back to the API process, and when a
+    worker dies replaces it and restarts its cameras on the surviving workers.
+    """
+
+    def __init__(self, num_workers: int, save_image: Optional[Callable] = None, torch_threads: Optional[int] = None):
+        """
+        :param num_workers: Number of worker processes
+        :param save_image: Accident image callback run inside the workers; must be a module-level function
+            (e.g. evidence_writer.save_accident_image) so unpickling it does not import the API app
+        :param torch_threads: Intra-op threads per worker; defaults to an even share of the cores
+        """
+        self.num_workers = max(1, int(num_workers))
+        self.save_image = save_image
+        self.torch_threads = torch_threads if torch_threads is not None else \
+            max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.worker_restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_WorkerHandle] = []
+        self._streams: Dict[str, RemoteStream] = {}
+        self._lock = threading.RLock()
+        self._running = False
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        with self._lock:
+            self._workers = [self._spawn(index) for index in range(self.num_workers)]
+        self._monitor = threading.Thread(target=self._monitor_loop, name="camera-worker-monitor", daemon=True)
+        self._monitor.start()
+        logging.info(f"Camera worker pool started with {self.num_workers} workers "
+                     f"({self.torch_threads} torch threads each)")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.retired.set()
+            worker.commands.put(None)
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        logging.info("Camera worker pool stopped")
+
+    def _spawn(self, index: int) -> _WorkerHandle:
+        commands = self._context.Queue()
+        events = self._context.Queue(maxsize=CAMERA_WORKER_QUEUE_SIZE)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, commands, events, self.save_image, self.torch_threads, os.getpid()),
+            name=f"camera-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        worker = _WorkerHandle(index, process, commands, events)
+        worker.relay = threading.Thread(target=self._relay_loop, args=(worker,),
+                                        name=f"camera-worker-{index}-relay", daemon=True)
+        worker.relay.start()
+        return worker
+
+    def open_stream(self, camera_key: str, video_path: str, metadata: Optional[Dict]) -> RemoteStream:
+        return RemoteStream(self, camera_key, video_path, metadata)
+
+    def _least_loaded(self) -> _WorkerHandle:
+        return min(self._workers, key=lambda worker: (not worker.process.is_alive(), len(worker.cameras)))
+
+    def assign(self, stream: RemoteStream):
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("Camera worker pool is not running")
+            worker = self._least_loaded()
+            worker.cameras.add(stream.camera_key)
+            stream.worker_id = worker.index
+            self._streams[stream.camera_key] = stream
+            worker.commands.put(("start", stream.camera_key, stream.video_path, stream.metadata, stream.subscriptions))
+        logging.info(f"Camera {stream.camera_key} assigned to worker {worker.index}")
+
+    def release(self, stream: RemoteStream):
+        with self._lock:
+            if self._streams.get(stream.camera_key) is not stream:
+                return
+            del self._streams[stream.camera_key]
+            worker = self._workers[stream.worker_id]
+            worker.cameras.discard(stream.camera_key)
+            if self._running:
+                worker.commands.put(("stop", stream.camera_key))
+
+    def send(self, stream: RemoteStream, command):
+        with self._lock:
+            if self._streams.get(stream.camera_key) is stream and self._running:
+                self._workers[stream.worker_id].commands.put(command)
+
+    def _relay_loop(self, worker: _WorkerHandle):
+        while True:
+            try:
+                kind, camera_key, payload = worker.events.get(timeout=MONITOR_INTERVAL)
+            except queue.Empty:
+                if worker.retired.is_set():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                stream = self._streams.get(camera_key)
+                if stream is None or stream.worker_id != worker.index or worker.retired.is_set():
+                    continue
+            stream.handle_event(kind, payload)
+
+    def _monitor_loop(self):
+        while self._running:
+            time.sleep(MONITOR_INTERVAL)
+            moved = []
+            with self._lock:
+                for worker in list(self._workers):
+                    if self._running and not worker.process.is_alive():
+                        moved.extend(self._replace(worker))
+            # notified outside the lock, like the relay threads do
+            for stream, index in moved:
+                stream.handle_event("reassigned", index)
+
+    def _replace(self, dead: _WorkerHandle) -> List:
+        """Respawns a dead worker and spreads its cameras over the pool again; returns the moved streams."""
+        logging.error(f"Camera worker {dead.index} died (exit code {dead.process.exitcode}), "
+                      f"rebalancing {len(dead.cameras)} cameras")
+        dead.retired.set()
+        self.worker_restarts += 1
+        self._workers[dead.index] = self._spawn(dead.index)
+        moved = []
+        for camera_key in sorted(dead.cameras):
+            stream = self._streams.get(camera_key)
+            if stream is None:
+                continue
+            worker = self._least_loaded()
+            worker.cameras.add(camera_key)
+            stream.worker_id = worker.index
+            stream.reassignments += 1
+            worker.commands.put(("start", camera_key, stream.video_path, stream.metadata, stream.subscriptions))
+            moved.append((stream, worker.index))
+            logging.info(f"Camera {camera_key} reassigned to worker {worker.index}")
+        return moved
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "workers": [{
+                    "worker": worker.index,
+                    "pid": worker.process.pid,
+                    "alive": worker.process.is_alive(),
+                    "cameras": sorted(worker.cameras),
+                } for worker in self._workers],
+                "worker_restarts": self.worker_restarts,
+                "torch_threads": self.torch_threads,
+            }
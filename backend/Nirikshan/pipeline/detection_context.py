@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import List, Optional
+
+from Nirikshan.components.clip_recorder import ClipRecorder
+from Nirikshan.components.frame_buffer import FrameRingBuffer
+from Nirikshan.components.inference_gate import InferenceGate
+from Nirikshan.components.region_of_interest import RegionOfInterest
+from Nirikshan.constant.application import (
+    CLIP_ENCODER_QUEUE_SIZE,
+    FRAME_BUFFER_JPEG_QUALITY,
+    FRAME_BUFFER_MODE,
+)
+
+
+class DetectionContext:
+    """
+    Detection state of one video, feed or upload: the pre-accident buffer, the
+    open clip and the event/cooldown counters. TrainingPipeline itself holds
+    no per-request state, so any number of contexts can run through one
+    pipeline at the same time.
+    """
+
+    def __init__(self, buffer_size: int, name: Optional[str] = None, roi: Optional[RegionOfInterest] = None):
+        """
+        :param buffer_size: Frames kept before an accident for the clip pre-roll
+        :param name: Optional label for logs and stats
+        :param roi: Optional region of interest detection is restricted to
+        """
+        self.name = name
+        self.roi = roi
+        self.frame_buffer = FrameRingBuffer(buffer_size, FRAME_BUFFER_MODE, FRAME_BUFFER_JPEG_QUALITY)
+        self.clip_recorder = ClipRecorder(max(CLIP_ENCODER_QUEUE_SIZE, buffer_size))
+        self.inference_gate = InferenceGate()
+        self.last_detections = None
+        self.accident_active = False
+        self.lost_counter = 0
+        self.cooldown_frames = 0
+        self.clip_frames = 0
+        self.clip_index = 0
+        self.clip_paths: List[Path] = []
+        self.accident_detected = False
+        self.frames_processed = 0
+        # FrameTracer of the current frame while this context's name is being traced
+        self.tracer = None
+
+    def saved_clips(self) -> List[Path]:
+        """Clips recorded in this context that were written successfully"""
+        return [path for path in self.clip_paths if path.exists()]
+
+    def close(self, wait: bool = True):
+        """Finishes the open clip and, with wait, blocks until every clip is on disk"""
+        self.clip_recorder.finish()
+        self.accident_active = False
+        if wait:
+            self.clip_recorder.join()
+
+    def stats(self) -> dict:
+        """Memory held by the pre-accident buffer and the clip encoder queue"""
+        return {
+            "name": self.name,
+            "frames_processed": self.frames_processed,
+            "accident_active": self.accident_active,
+            "clips": len(self.clip_paths),
+            "inference_gate": self.inference_gate.stats(),
+            "roi": self.roi.stats() if self.roi is not None else None,
+            "pre_accident": self.frame_buffer.stats(),
+            "clip": self.clip_recorder.stats(),
+            "bytes": self.frame_buffer.nbytes,
+        }
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from Nirikshan.constant.application import (
+    WARMUP_BATCH_SIZES,
+    WARMUP_RESOLUTIONS,
+    WARMUP_RUNS,
+)
+from Nirikshan.logger import logging
+
+
+def parse_resolutions(value: str) -> List[Tuple[int, int]]:
+    """
+    Parses a comma separated list of WxH resolutions.
+
+    :param value: String such as "1280x720,640x480"
+    :return: List of (width, height) tuples
+    """
+    resolutions = []
+    for item in value.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        width, height = item.split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+class ModelLoader:
+    """
+    Builds the TrainingPipeline (torch, ultralytics and the YOLO weights) in a
+    background thread so the server can bind immediately, then runs warmup
+    passes at the expected camera resolutions before reporting ready.
+    """
+    PENDING = "pending"
+    LOADING = "loading"
+    WARMING_UP = "warming_up"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, factory: Optional[Callable] = None, on_ready: Optional[Callable] = None,
+                 resolutions: str = WARMUP_RESOLUTIONS, batch_sizes: str = WARMUP_BATCH_SIZES,
+                 warmup_runs: int = WARMUP_RUNS):
+        self.factory = factory
+        self.on_ready = on_ready
+        self.resolutions = parse_resolutions(resolutions)
+        self.batch_sizes = [int(size) for size in batch_sizes.split(",") if size.strip()]
+        self.warmup_runs = max(0, warmup_runs)
+        self.pipeline = None
+        self.state = self.PENDING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_timings = []
+        self._ready = threading.Event()
+        self._thread = None
+        self._started_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _create_pipeline(self):
+        if self.factory is not None:
+            return self.factory()
+        from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+        return TrainingPipeline()
+
+    def _run(self):
+        try:
+            self.state = self.LOADING
+            started = time.perf_counter()
+            self.pipeline = self._create_pipeline()
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            logging.info(f"Model loaded in {self.load_seconds}s")
+
+            self.state = self.WARMING_UP
+            self._warmup(self.pipeline.model_trainer)
+
+            if self.on_ready is not None:
+                self.on_ready(self.pipeline)
+            self.state = self.READY
+            logging.info(f"Model ready {time.perf_counter() - self._started_at:.2f}s after startup")
+        except Exception as e:
+            self.error = str(e)
+            self.state = self.FAILED
+            logging.error(f"Model loading failed: {self.error}")
+        finally:
+            self._ready.set()
+
+    def _warmup(self, model_trainer):
+        # a ModelTrainerPool warms every instance it holds
+        for instance in getattr(model_trainer, "instances", [model_trainer]):
+            self._warmup_instance(instance)
+
+    def _warmup_instance(self, model_trainer):
+        for width, height in self.resolutions:
+            for batch_size in self.batch_sizes:
+                frames = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(batch_size)]
+                timings = []
+                for _ in range(self.warmup_runs):
+                    started = time.perf_counter()
+                    model_trainer.detect_objects_batch(frames)
+                    timings.append(round((time.perf_counter() - started) * 1000, 1))
+                self.warmup_timings.append({
+                    "resolution": f"{width}x{height}",
+                    "batch_size": batch_size,
+                    "timings_ms": timings,
+                })
+                logging.info(f"Warmup {width}x{height} batch {batch_size}: {timings} ms")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until loading finished (successfully or not)."""
+        self._ready.wait(timeout)
+        return self.ready
+
+    async def wait_async(self, poll_interval: float = 0.2) -> bool:
+        while not self._ready.is_set():
+            await asyncio.sleep(poll_interval)
+        return self.ready
+
+    def status(self) -> dict:
+        status = {
+            "state": self.state,
+            "ready": self.ready,
+            "load_seconds": self.load_seconds,
+            "warmup": self.warmup_timings,
+            "error": self.error,
+        }
+        if self.pipeline is not None:
+            model_trainer = self.pipeline.model_trainer
+            status["backend"] = model_trainer.backend.name
+            status["device"] = str(model_trainer.device)
+        if self._started_at is not None and not self._ready.is_set():
+            status["elapsed_seconds"] = round(time.perf_counter() - self._started_at, 3)
+        return status
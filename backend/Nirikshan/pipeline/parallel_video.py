@@ -0,0 +1,309 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+
+from Nirikshan.constant.application import (
+    PARALLEL_VIDEO_CHUNK_FRAMES,
+    PARALLEL_VIDEO_OVERLAP_FRAMES,
+)
+from Nirikshan.logger import logging
+
+# Set in each pool process by _init_worker: a sequential TrainingPipeline with its own model.
+_pipeline = None
+
+# open_at_frame checks a seek by the timestamps of the SEEK_CHECK_FRAMES frames
+# it grabs before the target, which must sit within SEEK_TOLERANCE of a frame
+# period of where a constant frame rate puts them.
+SEEK_CHECK_FRAMES = 4
+SEEK_TOLERANCE = 0.1
+
+
+class ChunkResult:
+    """What a pool process returns for one chunk."""
+    __slots__ = ("start", "accident_flags", "gate_stats", "entry_state", "exit_state")
+
+    def __init__(self, start: int, accident_flags: List[bool], gate_stats: dict, entry_state, exit_state):
+        self.start = start
+        self.accident_flags = accident_flags
+        # inference gate counters of frames [start, end) only, warmup excluded
+        self.gate_stats = gate_stats
+        # (gate state, last detections) on reaching `start` and after the last frame
+        self.entry_state = entry_state
+        self.exit_state = exit_state
+
+
+def plan_chunks(total_frames: int, chunk_frames: int, overlap_frames: int,
+                align: int = 1) -> List[Tuple[int, Optional[int], int]]:
+    """
+    Splits a video into frame ranges.
+
+    :param total_frames: Frame count reported by the container
+    :param chunk_frames: Frames per chunk
+    :param overlap_frames: Frames each chunk processes before its range to warm up its state
+    :param align: Warmup starts are rounded down to a multiple of this (the gate stride), so a fresh
+        gate, which infers its first frame, keeps the stride phase of a sequential run
+    :return: List of (start, end, warmup_start); the last chunk has end None and reads to the end of the file
+    """
+    chunk_frames = max(1, chunk_frames)
+    align = max(1, align)
+    chunks = []
+    for start in range(0, max(total_frames, 1), chunk_frames):
+        end = start + chunk_frames
+        warmup_start = max(0, start - overlap_frames)
+        chunks.append((start, end if end < total_frames else None, warmup_start - warmup_start % align))
+    return chunks
+
+
+def _seek(cap: cv2.VideoCapture, frame_index: int, fps: float) -> bool:
+    """Seeks so that the next read() returns frame_index; returns whether the frames before it check out."""
+    period_ms = 1000.0 / fps
+    first = frame_index - SEEK_CHECK_FRAMES
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    for index in range(first, frame_index):
+        if not cap.grab() or abs(cap.get(cv2.CAP_PROP_POS_MSEC) - index * period_ms) > SEEK_TOLERANCE * period_ms:
+            return False
+    return int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index
+
+
+def open_at_frame(video_path: str, frame_index: int) -> Tuple[cv2.VideoCapture, int]:
+    """
+    Opens a video so that the next read() returns frame `frame_index`, counted
+    as a sequential read from the start would count it.
+
+    CAP_PROP_POS_FRAMES seeks are only frame-exact where timestamps map
+    cleanly onto frame numbers. On H.264 with a variable frame rate, or at the
+    start of an MPEG-TS stream, they land on another frame and still report
+    the requested position. Every seek is therefore checked against the
+    timestamps of the frames before the target; if they are off, the capture
+    seeks further back (behind the previous keyframe, which is where the
+    decoder restarts) and reads forward, and as a last resort it reads
+    forward from the start of the file.
+
+    :param video_path: Video file
+    :param frame_index: Frame the next read() should return
+    :return: (capture, index of the frame its next read() returns); less than frame_index only if the video
+        is shorter
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    position = 0
+    back = 0
+    while fps > 0 and frame_index - back - SEEK_CHECK_FRAMES > 0:
+        if _seek(cap, frame_index - back, fps):
+            position = frame_index - back
+            break
+        back = back * 8 if back else 64
+    else:
+        if back:
+            logging.warning(f"Seeking in {video_path} is not frame-exact; reading {frame_index} frames from the start")
+            cap.release()
+            cap = cv2.VideoCapture(video_path)
+    while position < frame_index and cap.grab():
+        position += 1
+    return cap, position
+
+
+def _init_worker(torch_threads: int, pipeline_factory: Optional[Callable]):
+    global _pipeline
+    import torch
+    torch.set_num_threads(torch_threads)
+    if pipeline_factory is None:
+        from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+        _pipeline = TrainingPipeline(parallel_workers=0)
+    else:
+        _pipeline = pipeline_factory()
+
+
+def _detect_chunk(video_path: str, start: int, end: Optional[int], warmup_start: int, roi,
+                  initial_state=None) -> ChunkResult:
+    """
+    Runs in a pool process: per-frame accident flags of frames [start, end).
+
+    :param initial_state: exit_state of the preceding chunk to continue from instead of a fresh context
+    """
+    from Nirikshan.components.region_of_interest import RegionOfInterest
+
+    context = _pipeline.new_context(f"{video_path}[{start}:{end}]", RegionOfInterest(roi) if roi else None)
+    gate = context.inference_gate
+    if initial_state is not None:
+        gate_state, context.last_detections = initial_state
+        gate.restore(gate_state)
+    cap, index = open_at_frame(video_path, warmup_start)
+    accident_flags = []
+    entry_state = None
+    try:
+        while end is None or index < end:
+            if index == start:
+                entry_state = (gate.state(), context.last_detections)
+                gate.reset_counters()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            accident_indices = _pipeline.detect_accidents(frame, context)[3]
+            if index >= start:
+                accident_flags.append(len(accident_indices) > 0)
+            index += 1
+    finally:
+        cap.release()
+    if entry_state is None:
+        # the video ended inside the warmup
+        gate.reset_counters()
+    return ChunkResult(start, accident_flags, gate.stats(), entry_state, (gate.state(), context.last_detections))
+
+
+def _continues(result: ChunkResult, previous: ChunkResult) -> bool:
+    """Whether a chunk started in the gate state the preceding chunk ended in, as a sequential run would."""
+    if result.entry_state is None or not result.accident_flags:
+        return True
+    from Nirikshan.components.inference_gate import InferenceGate
+    # equal gate states mean the same last inferred frame, hence the same reused detections
+    return InferenceGate.same_state(result.entry_state[0], previous.exit_state[0])
+
+
+class ParallelVideoProcessor:
+    """
+    Detects accidents in long videos on a pool of processes, each loading its
+    own model once. The video is cut into frame ranges of
+    PARALLEL_VIDEO_CHUNK_FRAMES; every chunk seeks to its range, runs
+    detection and returns one accident flag per frame. The flags are put back
+    in order, so the caller can replay the accident event state over them and
+    get the events and clips of a sequential run.
+
+    Detection of a frame does not depend on earlier frames unless the
+    inference gate is on. Then each chunk first processes up to
+    PARALLEL_VIDEO_OVERLAP_FRAMES frames before its range, starting on the
+    stride phase, which usually brings its gate into the state a sequential
+    run would be in. That is not guaranteed (a candidate hold or a motion
+    reference from before the overlap carries over), so every chunk reports
+    its gate state on entering its range and after its last frame, and a
+    chunk that did not start where its predecessor ended is run again from
+    the predecessor's exact state. Flags and gate statistics then match a
+    sequential run; in the worst case the chunks end up running one after
+    another.
+    """
+
+    def __init__(self, workers: int, chunk_frames: int = PARALLEL_VIDEO_CHUNK_FRAMES,
+                 overlap_frames: int = PARALLEL_VIDEO_OVERLAP_FRAMES, torch_threads: Optional[int] = None,
+                 pipeline_factory: Optional[Callable] = None):
+        """
+        :param workers: Number of processes
+        :param chunk_frames: Frames per chunk
+        :param overlap_frames: Warmup frames per chunk when the inference gate is on
+        :param torch_threads: Intra-op threads per process; defaults to an even share of the cores
+        :param pipeline_factory: Picklable callable building the sequential TrainingPipeline of each
+            process (e.g. with a stub model); a default TrainingPipeline if omitted
+        """
+        self.workers = max(1, int(workers))
+        self.chunk_frames = max(1, int(chunk_frames))
+        self.overlap_frames = max(0, int(overlap_frames))
+        self.torch_threads = torch_threads if torch_threads is not None else \
+            max(1, (os.cpu_count() or 1) // self.workers)
+        self.pipeline_factory = pipeline_factory
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.videos = 0
+        self.chunks = 0
+        self.chunks_rerun = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.torch_threads, self.pipeline_factory)
+                )
+                logging.info(f"Started {self.workers} video processes ({self.torch_threads} torch threads each)")
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def detect(self, video_path: str, total_frames: int, roi=None,
+               progress: Optional[Callable] = None) -> Tuple[List[bool], List[dict]]:
+        """
+        Runs detection over a whole video on the process pool.
+
+        :param video_path: Video file, readable by the pool processes
+        :param total_frames: Frame count reported by the container
+        :param roi: Optional ROI polygon points
+        :param progress: Optional callback called with (frames_processed, total_frames) as chunks finish
+        :return: (accident flag per frame in order, inference gate stats per chunk, covering each frame once)
+        """
+        from Nirikshan.components.inference_gate import InferenceGate
+
+        gate = InferenceGate()
+        overlap = self.overlap_frames if gate.enabled else 0
+        chunks = plan_chunks(total_frames, self.chunk_frames, overlap, 1 if gate.motion else gate.stride)
+        started = time.perf_counter()
+        pool = self._pool()
+        pending = {pool.submit(_detect_chunk, video_path, start, end, warmup_start, roi)
+                   for start, end, warmup_start in chunks}
+        results: Dict[int, ChunkResult] = {}
+        frames_done = 0
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results[result.start] = result
+                    frames_done += len(result.accident_flags)
+                    if progress is not None:
+                        progress(frames_done, total_frames)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        reruns = 0
+        while True:
+            # chunks whose predecessor ended in another state are run again from that state; the first
+            # of them is then final, later ones are checked again in case their predecessor changed too
+            stale = [(start, end, results[previous].exit_state)
+                     for (previous, _, _), (start, end, _) in zip(chunks, chunks[1:])
+                     if not _continues(results[start], results[previous])]
+            if not stale:
+                break
+            reruns += len(stale)
+            futures = [pool.submit(_detect_chunk, video_path, start, end, start, roi, state)
+                       for start, end, state in stale]
+            for future in futures:
+                result = future.result()
+                results[result.start] = result
+        if reruns:
+            logging.warning(f"Chunks of {video_path} did not reach the sequential gate state within {overlap} "
+                            f"warmup frames; {reruns} chunk runs repeated")
+
+        ordered = [results[start] for start, _, _ in chunks]
+        accident_flags = []
+        for result in ordered:
+            accident_flags.extend(result.accident_flags)
+        with self._lock:
+            self.videos += 1
+            self.chunks += len(chunks)
+            self.chunks_rerun += reruns
+        elapsed = time.perf_counter() - started
+        logging.info(f"Detected {len(accident_flags)} frames of {video_path} in {len(chunks)} chunks "
+                     f"on {self.workers} processes in {elapsed:.2f}s")
+        return accident_flags, [result.gate_stats for result in ordered]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "chunk_frames": self.chunk_frames,
+            "overlap_frames": self.overlap_frames,
+            "running": self._executor is not None,
+            "videos": self.videos,
+            "chunks": self.chunks,
+            "chunks_rerun": self.chunks_rerun,
+        }
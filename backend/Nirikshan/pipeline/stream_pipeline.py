@@ -0,0 +1,697 @@
+import asyncio
+import base64
+import concurrent.futures
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from Nirikshan.components.clip_recorder import ClipRecorder
+from Nirikshan.components.frame_annotator import FrameAnnotator
+from Nirikshan.components.frame_buffer import FrameRingBuffer
+from Nirikshan.components.frame_tracer import TRACING, FrameTracer
+from Nirikshan.components.inference_gate import InferenceGate
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.components.live_capture import LatestFrameGrabber
+from Nirikshan.components.metrics import stage_timers
+from Nirikshan.components.region_of_interest import RegionOfInterest
+from Nirikshan.components.track_history import TrackHistoryStore
+from Nirikshan.constant.application import (
+    ACCIDENT_CLIPS_DIR,
+    CLIP_ENCODER_QUEUE_SIZE,
+    FRAME_BUFFER_JPEG_QUALITY,
+    FRAME_BUFFER_MODE,
+    LIVE_MAX_FRAME_AGE_MS,
+    LIVE_STREAM_SCHEMES,
+    PROGRESS_INTERVAL_FRAMES,
+    STREAM_JPEG_QUALITY,
+    STREAM_MAX_FPS,
+    STREAM_MAX_WIDTH,
+    STREAM_RECORD_CLIPS,
+    STREAM_STAGE_QUEUE_SIZE,
+    THUMBNAIL_FPS,
+    THUMBNAIL_JPEG_QUALITY,
+    THUMBNAIL_WIDTH,
+)
+from Nirikshan.constant.training_pipeline import (
+    ACCIDENT_CLASS_IDS,
+    ACCIDENT_STATE_DURATION,
+    BUFFER_SIZE,
+    CLASS_NAMES,
+    CONFIDENCE_THRESHOLD,
+    MAX_CLIP_FRAMES,
+    POST_ACCIDENT_FRAMES,
+    TRACKER_LOST_TRACK_BUFFER,
+)
+from Nirikshan.logger import logging
+from Nirikshan.utils.frame_transport import (
+    FRAME_FORMAT_JSON,
+    SUBSCRIPTION_FULL,
+    SUBSCRIPTION_THUMBNAIL,
+)
+from Nirikshan.utils.main_utils import redact_source
+
+_STOP = object()
+
+
+def format_location(latitude: float, longitude: float) -> str:
+    """Format location coordinates to a readable string"""
+    if latitude is None or longitude is None:
+        return "Unknown location"
+    return f"{latitude:.6f}, {longitude:.6f}"
+
+
+@dataclass
+class FramePacket:
+    """A frame travelling through the stages of a StreamPipeline."""
+    frame_number: int
+    frame: np.ndarray
+    captured_at: float
+    inference: Optional[concurrent.futures.Future] = None
+    inferred: bool = True
+    display_frame: Optional[np.ndarray] = None
+    preview_levels: Tuple[str, ...] = ()
+    previews: Dict[str, bytes] = field(default_factory=dict)
+    encoded_previews: Dict[str, str] = field(default_factory=dict)
+    messages: List[Dict] = field(default_factory=list)
+    progress_due: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    tracer: Optional[FrameTracer] = None
+
+    @property
+    def has_frame(self) -> bool:
+        return bool(self.previews)
+
+
+class StreamSession:
+    """
+    Per-source tracking, annotation and accident state for a live stream.
+    Only ever touched by the track/annotate stage thread of its pipeline,
+    except for subscriptions, which the owner may replace at any time.
+    """
+
+    def __init__(self, session_id: str, metadata: Optional[Dict] = None,
+                 save_image: Optional[Callable] = None,
+                 subscriptions: FrozenSet[str] = frozenset((SUBSCRIPTION_FULL,)),
+                 record_clips: bool = STREAM_RECORD_CLIPS):
+        self.session_id = session_id
+        self.subscriptions = frozenset(subscriptions)
+        self.last_thumbnail_at = None
+        self.metadata = metadata or {}
+        self.location = format_location(self.metadata.get("latitude"), self.metadata.get("longitude"))
+        self.save_image = save_image
+        self.roi = RegionOfInterest.from_metadata(self.metadata)
+        self.stage_seconds = stage_timers(session_id)
+
+        self.tracker = sv.ByteTrack(
+            track_activation_threshold=0.25,
+            lost_track_buffer=TRACKER_LOST_TRACK_BUFFER,
+            minimum_matching_threshold=0.8,
+            frame_rate=24
+        )
+        self.annotator = FrameAnnotator()
+        self.inference_gate = InferenceGate()
+        self.last_tracked = sv.Detections.empty()
+        self.frame_buffer = FrameRingBuffer(BUFFER_SIZE, FRAME_BUFFER_MODE, FRAME_BUFFER_JPEG_QUALITY)
+        self.traces = TrackHistoryStore(ttl_frames=TRACKER_LOST_TRACK_BUFFER)
+        self.frames_rendered = 0
+
+        self.record_clips = record_clips
+        self.clip_recorder = ClipRecorder(max(CLIP_ENCODER_QUEUE_SIZE, BUFFER_SIZE))
+        self.clip_fps = STREAM_MAX_FPS
+        self.clip_idle_frames = 0
+
+        self.accident_found = False
+        self.in_accident_state = False
+        self.accident_state_frames = 0
+        self.last_accident_frame = 0
+        self.detected_accident_type = None
+        self.detected_confidence = None
+
+    def track(self, boxes, class_ids, confidences):
+        if boxes is not None and hasattr(boxes, "shape") and boxes.shape[0] > 0:
+            detections = sv.Detections(
+                xyxy=np.array(boxes, dtype=np.float32),
+                confidence=np.array(confidences, dtype=np.float32),
+                class_id=np.array(class_ids, dtype=np.int32)
+            )
+            return self.tracker.update_with_detections(detections)
+        return sv.Detections.empty()
+
+    def record_traces(self, tracked_detections):
+        if len(tracked_detections) == 0 or tracked_detections.tracker_id is None:
+            self.traces.update((), None)
+            return
+        xyxy = tracked_detections.xyxy
+        centers = ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32)
+        self.traces.update(tracked_detections.tracker_id.tolist(), centers)
+
+    def wants_preview(self, packet: FramePacket) -> Tuple[str, ...]:
+        """Preview levels the current subscriptions need for this frame; empty if none."""
+        subscriptions = self.subscriptions
+        levels = []
+        if SUBSCRIPTION_FULL in subscriptions:
+            levels.append(SUBSCRIPTION_FULL)
+        if SUBSCRIPTION_THUMBNAIL in subscriptions:
+            if self.last_thumbnail_at is None or packet.captured_at - self.last_thumbnail_at >= 1.0 / THUMBNAIL_FPS:
+                self.last_thumbnail_at = packet.captured_at
+                levels.append(SUBSCRIPTION_THUMBNAIL)
+        return tuple(levels)
+
+    def record_stage(self, packet: FramePacket, stage: str, started: float, ended: Optional[float] = None,
+                     track: Optional[str] = None):
+        """Adds a stage duration to the camera's latency histogram and, while tracing, to the frame timeline."""
+        if ended is None:
+            ended = time.perf_counter()
+        self.stage_seconds[stage].observe(ended - started)
+        if packet.tracer is not None:
+            packet.tracer.record(stage, started, ended, packet.frame_number, track)
+
+    def render(self, packet: FramePacket, tracked_detections):
+        started = time.perf_counter()
+        self.frames_rendered += 1
+        display_frame = packet.frame.copy()
+        self.annotator.annotate(display_frame, tracked_detections, self.traces)
+        self.record_stage(packet, "annotation", started)
+        return display_frame
+
+    def process(self, packet: FramePacket, boxes, class_ids, confidences):
+        frame = packet.frame
+        frame_count = packet.frame_number
+        self.frame_buffer.append(frame)
+
+        started = time.perf_counter()
+        if packet.inferred:
+            tracked_detections = self.track(boxes, class_ids, confidences)
+            self.last_tracked = tracked_detections
+            self.inference_gate.observe(class_ids)
+            # traces advance with the tracker, so their TTL and point history count inferred frames
+            self.record_traces(tracked_detections)
+        else:
+            # frame skipped by the inference gate: carry the last tracks over
+            # without advancing the tracker, so none of them age out, and keep
+            # drawing their traces without appending the same centre again
+            tracked_detections = self.last_tracked
+        self.record_stage(packet, "tracking", started)
+
+        display_frame = None
+        packet.preview_levels = self.wants_preview(packet)
+        if packet.preview_levels:
+            display_frame = self.render(packet, tracked_detections)
+            packet.display_frame = display_frame
+
+        accident_indices = np.empty(0, dtype=np.int64)
+        if len(tracked_detections) > 0:
+            accident_indices = np.flatnonzero(
+                np.isin(tracked_detections.class_id, ACCIDENT_CLASS_IDS)
+                & (tracked_detections.confidence >= CONFIDENCE_THRESHOLD)
+            )
+        accident_detected = accident_indices.size > 0
+
+        if accident_detected and not self.in_accident_state:
+            self.last_accident_frame = frame_count
+            self.in_accident_state = True
+            self.accident_state_frames = 0
+            self.accident_found = True
+
+            i = int(accident_indices[0])
+            confidence = float(tracked_detections.confidence[i])
+            class_name = CLASS_NAMES.get(int(tracked_detections.class_id[i]), "Unknown")
+            self.detected_accident_type = class_name
+            self.detected_confidence = confidence
+
+            packet.messages.append({
+                "type": "accident",
+                "accident_detected": True,
+                "frame_number": frame_count,
+                "confidence": confidence,
+                "accident_type": class_name,
+                "location": self.location,
+                "message": f"{class_name} detected at frame {frame_count}",
+                "severity": "error",
+                "timestamp": datetime.now().timestamp()
+            })
+
+            image_url = None
+            if self.save_image:
+                if display_frame is None:
+                    display_frame = self.render(packet, tracked_detections)
+                started = time.perf_counter()
+                image_url = self.save_image(display_frame, self.session_id, frame_count, {
+                    "camera_id": self.metadata.get("camera_id"),
+                    "camera_name": self.metadata.get("name"),
+                    "accident_type": class_name,
+                    "confidence": confidence,
+                    "latitude": self.metadata.get("latitude"),
+                    "longitude": self.metadata.get("longitude"),
+                    "location": self.location,
+                    "frame_number": frame_count,
+                })
+                if packet.tracer is not None:
+                    packet.tracer.record("save_image", started, time.perf_counter(), frame_count)
+            if image_url:
+                packet.messages.append({
+                    "type": "image_saved",
+                    "message": f"Accident image saved: {image_url}",
+                    "severity": "info",
+                    "image_url": image_url,
+                    "frame_number": frame_count,
+                    "accident_type": class_name,
+                    "confidence": confidence,
+                    "location": self.location,
+                    "timestamp": datetime.now().timestamp()
+                })
+
+        if self.in_accident_state:
+            self.accident_state_frames += 1
+            if self.accident_state_frames >= ACCIDENT_STATE_DURATION:
+                self.in_accident_state = False
+
+        if self.record_clips:
+            started = time.perf_counter()
+            self.record_clip(packet, accident_detected)
+            if packet.tracer is not None:
+                packet.tracer.record("record_clip", started, time.perf_counter(), frame_count)
+
+    def record_clip(self, packet: FramePacket, accident_detected: bool):
+        """
+        Starts a clip with the frame buffer as pre-roll when an accident shows up,
+        keeps appending while it is visible and finishes POST_ACCIDENT_FRAMES
+        frames after the last detection (or at MAX_CLIP_FRAMES).
+        """
+        recorder = self.clip_recorder
+        if accident_detected:
+            self.clip_idle_frames = 0
+            if not recorder.recording:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                clip_path = Path(ACCIDENT_CLIPS_DIR) / f"accident_clip_{timestamp}_{uuid.uuid4().hex[:8]}.mp4"
+                recorder.start(clip_path, self.clip_fps, self.frame_buffer)
+            else:
+                recorder.append(packet.frame)
+        elif recorder.recording:
+            recorder.append(packet.frame)
+            self.clip_idle_frames += 1
+            if self.clip_idle_frames >= POST_ACCIDENT_FRAMES:
+                recorder.finish()
+
+        if recorder.frames_recorded >= MAX_CLIP_FRAMES:
+            recorder.finish()
+
+        packet.messages.extend(self._clip_saved_message(clip_path) for clip_path in recorder.poll_finished())
+
+    def _clip_saved_message(self, clip_path: Path) -> Dict:
+        return {
+            "type": "clip_saved",
+            "message": f"Accident clip saved: /accident_clips/{clip_path.name}",
+            "severity": "info",
+            "clip_url": f"/accident_clips/{clip_path.name}",
+            "location": self.location,
+            "timestamp": datetime.now().timestamp()
+        }
+
+    def close(self, timeout: float = 30.0) -> List[Dict]:
+        """
+        Finishes a clip still being recorded when the stream ends and waits for its encoder.
+
+        :param timeout: Seconds to wait for clips still being written
+        :return: clip_saved messages for clips finished since the last frame
+        """
+        recorder = self.clip_recorder
+        recorder.finish()
+        if not recorder.join(timeout):
+            logging.warning(f"Accident clip of {self.session_id} still being written after {timeout}s")
+        return [self._clip_saved_message(clip_path) for clip_path in recorder.poll_finished()]
+
+
+class StreamPipeline:
+    """
+    Runs decode -> infer -> track/annotate -> encode for one video source in
+    worker threads connected by bounded queues. The asyncio side only awaits
+    finished packets through get() and does the WebSocket I/O.
+    """
+
+    def __init__(self, video_path: str, session: StreamSession, scheduler,
+                 queue_size: int = STREAM_STAGE_QUEUE_SIZE,
+                 frame_formats: FrozenSet[str] = frozenset((FRAME_FORMAT_JSON,))):
+        self.video_path = video_path
+        self.session = session
+        self.scheduler = scheduler
+        self.frame_formats = frozenset(frame_formats)
+        self.queue_size = max(1, queue_size)
+
+        self.cap = None
+        self.width = 0
+        self.height = 0
+        self.scale_factor = 1.0
+        self.original_fps = 0.0
+        self.target_fps = STREAM_MAX_FPS
+        self.total_frames = 0
+        self.frames_decoded = 0
+        self.last_frame_number = 0
+        self.frames_encoded = 0
+        self.is_live = False
+        self.grabber: Optional[LatestFrameGrabber] = None
+        self.frames_stale = 0
+        self.alert_latencies = deque(maxlen=1000)
+        self.error: Optional[BaseException] = None
+
+        self._infer_queue = queue.Queue(maxsize=self.queue_size)
+        self._process_queue = queue.Queue(maxsize=self.queue_size)
+        self._encode_queue = queue.Queue(maxsize=self.queue_size)
+        self._output: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._halt = threading.Event()
+        self._closed = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _open_capture(self):
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            cap.release()
+            raise Exception(f"Could not open video file: {self.video_path}")
+
+        self.original_fps = cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.target_fps = min(self.original_fps, STREAM_MAX_FPS) if self.original_fps > 0 else STREAM_MAX_FPS
+
+        self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if self.width > STREAM_MAX_WIDTH:
+            self.scale_factor = STREAM_MAX_WIDTH / self.width
+            self.width = STREAM_MAX_WIDTH
+            self.height = int(self.height * self.scale_factor)
+
+        self.session.clip_fps = self.target_fps
+        self.is_live = self.video_path.lower().startswith(LIVE_STREAM_SCHEMES) or self.total_frames <= 0
+        if self.is_live:
+            self.grabber = LatestFrameGrabber(cap, name=f"{self.session.session_id}-grabber")
+        self.cap = cap
+
+    async def open(self):
+        """Opens the capture without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self._open_capture)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._output = asyncio.Queue(maxsize=self.queue_size)
+        stages = [
+            ("decode", self._decode_loop),
+            ("infer", self._infer_loop),
+            ("process", self._process_loop),
+            ("encode", self._encode_loop),
+        ]
+        for name, target in stages:
+            thread = threading.Thread(target=target, name=f"{self.session.session_id}-{name}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        """Signals every stage to exit; safe to call from the event loop."""
+        self._closed.set()
+        self._halt.set()
+        if not self._threads and self.cap is not None:
+            self.cap.release()
+
+    async def get(self) -> Optional[FramePacket]:
+        """Returns the next encoded packet, or None once the stream has ended."""
+        packet = await self._output.get()
+        if packet is None and self.error is not None:
+            raise self.error
+        return packet
+
+    def set_subscriptions(self, subscriptions: FrozenSet[str], frame_formats: FrozenSet[str]):
+        """Replaces the preview levels to render and the frame formats to encode."""
+        self.session.subscriptions = frozenset(subscriptions)
+        self.frame_formats = frozenset(frame_formats)
+
+    def summary(self) -> Dict:
+        """Outcome of a finished stream for the processing_complete message."""
+        return {
+            "accident_found": self.session.accident_found,
+            "total_frames": self.last_frame_number,
+            "dropped_frames": self.frames_dropped,
+            "location": self.session.location,
+        }
+
+    def record_alert(self, packet: FramePacket) -> float:
+        """Records the capture-to-alert latency of a packet carrying an alert, in seconds."""
+        latency = time.perf_counter() - packet.captured_at
+        self.alert_latencies.append(latency)
+        return latency
+
+    @property
+    def frames_dropped(self) -> int:
+        overwritten = self.grabber.frames_dropped if self.grabber is not None else 0
+        return overwritten + self.frames_stale
+
+    def stats(self) -> Dict:
+        return {
+            "source": redact_source(self.video_path),
+            "live": self.is_live,
+            "subscriptions": sorted(self.session.subscriptions),
+            "frames_decoded": self.frames_decoded,
+            "frames_rendered": self.session.frames_rendered,
+            "frames_encoded": self.frames_encoded,
+            "frames_dropped": self.frames_dropped,
+            "frames_overwritten": self.grabber.frames_dropped if self.grabber is not None else 0,
+            "frames_stale": self.frames_stale,
+            "queue_depths": self.queue_depths(),
+            "inference_gate": self.session.inference_gate.stats(),
+            "roi": self.session.roi.stats() if self.session.roi is not None else None,
+            "track_history": self.session.traces.stats(),
+            "frame_buffer": self.session.frame_buffer.stats(),
+            "clip_recorder": self.session.clip_recorder.stats(),
+            "alert_latency_ms": summarize_timings(self.alert_latencies),
+            "memory_bytes": self.memory_bytes(),
+        }
+
+    def memory_bytes(self) -> int:
+        """Estimate of the frame memory held by this stream: its frame buffer plus queued frames."""
+        session = self.session
+        queued = sum(self.queue_depths().values()) + session.clip_recorder.stats()["queue_depth"]
+        return session.frame_buffer.nbytes + queued * self.width * self.height * 3
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {
+            "infer": self._infer_queue.qsize(),
+            "process": self._process_queue.qsize(),
+            "encode": self._encode_queue.qsize(),
+            "output": self._output.qsize() if self._output is not None else 0,
+        }
+
+    def _fail(self, stage: str, error: BaseException):
+        if self.error is None:
+            self.error = error
+        logging.error(f"Stream stage '{stage}' failed for {self.session.session_id}: {str(error)}")
+        self._halt.set()
+
+    def _put(self, stage_queue: queue.Queue, item) -> bool:
+        while not self._halt.is_set():
+            try:
+                stage_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, stage_queue: queue.Queue):
+        while not self._halt.is_set():
+            try:
+                return stage_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _deliver(self, item) -> bool:
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._output.put(item), self._loop)
+        except RuntimeError:
+            return False
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if self._closed.is_set():
+                    future.cancel()
+                    return False
+
+    def _new_packet(self, frame_number: int, frame, captured_at: float) -> FramePacket:
+        return FramePacket(frame_number, frame, captured_at, tracer=TRACING.active(self.session.session_id))
+
+    def _decode_loop(self):
+        try:
+            if self.is_live:
+                self._decode_live()
+            else:
+                self._decode_paced()
+        except Exception as e:
+            self._fail("decode", e)
+        finally:
+            if self.grabber is not None:
+                self.grabber.stop()
+            self.cap.release()
+            self._put(self._infer_queue, None)
+
+    def _decode_paced(self):
+        frame_interval = 1.0 / self.target_fps
+        last_frame_time = time.perf_counter()
+        while not self._halt.is_set():
+            started = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.frames_decoded += 1
+
+            if self.scale_factor < 1.0:
+                frame = cv2.resize(frame, (self.width, self.height))
+            decoded = time.perf_counter()
+
+            sleep_time = frame_interval - (decoded - last_frame_time)
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+            last_frame_time = time.perf_counter()
+
+            packet = self._new_packet(self.frames_decoded, frame, last_frame_time)
+            self.session.record_stage(packet, "decode", started, decoded)
+            if not self._put(self._infer_queue, packet):
+                break
+
+    def _decode_live(self):
+        self.grabber.start()
+        while not self._halt.is_set():
+            grabbed = self.grabber.read(timeout=0.1)
+            if grabbed is None:
+                continue
+            frame, captured_at, sequence, read_seconds = grabbed
+            if frame is None:
+                break
+            self.frames_decoded += 1
+
+            started = time.perf_counter()
+            if self.scale_factor < 1.0:
+                frame = cv2.resize(frame, (self.width, self.height))
+            packet = self._new_packet(sequence, frame, captured_at)
+            # the read ran on the grabber thread; count it together with the resize
+            self.session.record_stage(packet, "decode", started - read_seconds)
+
+            if not self._put(self._infer_queue, packet):
+                break
+
+    def _infer_loop(self):
+        try:
+            while True:
+                packet = self._get(self._infer_queue)
+                if packet is None or packet is _STOP:
+                    break
+                if self.is_live and not self._infer_queue.empty() and \
+                        (time.perf_counter() - packet.captured_at) * 1000 > LIVE_MAX_FRAME_AGE_MS:
+                    self.frames_stale += 1
+                    continue
+                started = time.perf_counter()
+                roi = self.session.roi
+                model_input = roi.crop(packet.frame) if roi is not None else packet.frame
+                if self.session.inference_gate.should_infer(model_input):
+                    packet.inference = self.scheduler.submit(model_input, packet.timings)
+                else:
+                    packet.inferred = False
+                if packet.tracer is not None:
+                    packet.tracer.record("gate", started, time.perf_counter(), packet.frame_number,
+                                         inferred=packet.inferred)
+                if not self._put(self._process_queue, packet):
+                    break
+        except Exception as e:
+            self._fail("infer", e)
+        finally:
+            self._put(self._process_queue, None)
+
+    def _process_loop(self):
+        session = self.session
+        last_frame_number = 0
+        try:
+            while True:
+                packet = self._get(self._process_queue)
+                if packet is None or packet is _STOP:
+                    break
+                boxes = class_ids = confidences = None
+                if packet.inferred:
+                    waited = time.perf_counter()
+                    boxes, class_ids, confidences = packet.inference.result()
+                    if packet.tracer is not None:
+                        packet.tracer.record("wait_inference", waited, time.perf_counter(), packet.frame_number)
+                    timings = packet.timings
+                    if "started" in timings:
+                        # measured on the scheduler thread for the whole batch this frame was part of
+                        preprocessed = timings["started"] + timings["preprocess"]
+                        session.record_stage(packet, "preprocess", timings["started"], preprocessed, "inference")
+                        session.record_stage(packet, "inference", preprocessed, preprocessed + timings["inference"],
+                                             "inference")
+                    if self.session.roi is not None:
+                        boxes, class_ids, confidences = self.session.roi.restore(boxes, class_ids, confidences)
+                self.session.process(packet, boxes, class_ids, confidences)
+                last_frame_number = packet.frame_number
+                if not self._put(self._encode_queue, packet):
+                    break
+        except Exception as e:
+            self._fail("process", e)
+        finally:
+            messages = self.session.close()
+            if messages:
+                # announce clips finalized here before the stream reports its end
+                closing = FramePacket(last_frame_number, None, time.perf_counter(), messages=messages)
+                self._put(self._encode_queue, closing)
+            self._put(self._encode_queue, None)
+
+    def _encode(self, packet: FramePacket):
+        encode_base64 = FRAME_FORMAT_JSON in self.frame_formats
+        for level in packet.preview_levels:
+            display_frame = packet.display_frame
+            quality = STREAM_JPEG_QUALITY
+            if level == SUBSCRIPTION_THUMBNAIL:
+                height, width = display_frame.shape[:2]
+                if width > THUMBNAIL_WIDTH:
+                    display_frame = cv2.resize(display_frame, (THUMBNAIL_WIDTH, int(height * THUMBNAIL_WIDTH / width)),
+                                               interpolation=cv2.INTER_AREA)
+                quality = THUMBNAIL_JPEG_QUALITY
+            _, buffer = cv2.imencode('.jpg', display_frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            packet.previews[level] = buffer.tobytes()
+            if encode_base64:
+                packet.encoded_previews[level] = base64.b64encode(buffer).decode('utf-8')
+            self.frames_encoded += 1
+
+    def _encode_loop(self):
+        last_progress_bucket = 0
+        try:
+            while True:
+                packet = self._get(self._encode_queue)
+                if packet is None or packet is _STOP:
+                    break
+                if packet.display_frame is not None:
+                    started = time.perf_counter()
+                    self._encode(packet)
+                    self.session.record_stage(packet, "encode", started)
+                packet.frame = None
+                packet.display_frame = None
+                self.last_frame_number = packet.frame_number
+
+                progress_bucket = packet.frame_number // PROGRESS_INTERVAL_FRAMES
+                if progress_bucket > last_progress_bucket:
+                    last_progress_bucket = progress_bucket
+                    packet.progress_due = True
+
+                if packet.has_frame or packet.messages or packet.progress_due:
+                    if not self._deliver(packet):
+                        break
+        except Exception as e:
+            self._fail("encode", e)
+        finally:
+            self._deliver(None)
@@ -1,133 +1,334 @@
 import cv2
-import collections
 import os
+import time
+import uuid
 from pathlib import Path
 from datetime import datetime
-from Nirikshan.components.model_trainer import ModelTrainer
+from Nirikshan.components.evidence_writer import EvidenceWriter
+from Nirikshan.components.frame_tracer import TRACING
+from Nirikshan.components.metrics import ACCIDENTS_TOTAL
+from Nirikshan.components.model_pool import ModelTrainerPool
+from Nirikshan.constant.application import (
+    ACCIDENT_CLIPS_DIR,
+    PARALLEL_VIDEO_CHUNK_FRAMES,
+    PARALLEL_VIDEO_WORKERS,
+    PROGRESS_INTERVAL_FRAMES,
+)
+from Nirikshan.constant.training_pipeline import (
+    CLASS_NAMES,
+    CONFIDENCE_THRESHOLD,
+    MAX_CLIP_FRAMES,
+    POST_ACCIDENT_FRAMES,
+)
 from Nirikshan.logger import logging
+from Nirikshan.pipeline.detection_context import DetectionContext
 
 class TrainingPipeline:
-    CONFIDENCE_THRESHOLD = 0.85
+    """
+    Accident detection over frames, videos and feeds. The pipeline is shared
+    and stateless: per-video state lives in a DetectionContext, and inference
+    borrows an instance from the ModelTrainerPool, so concurrent requests
+    neither corrupt each other nor queue on a single model.
+    """
+    CONFIDENCE_THRESHOLD = CONFIDENCE_THRESHOLD
     ACCIDENT_CLASS_IDS = {1, 2, 3, 5, 6, 7, 8}
-    ACCIDENT_CLIPS_DIR = Path("accident_clips")
+    ACCIDENT_CLIPS_DIR = Path(ACCIDENT_CLIPS_DIR)
     ACCIDENT_IMAGES_DIR = Path("accident_images")
     ACCIDENT_CLIPS_DIR.mkdir(parents=True, exist_ok=True)
     ACCIDENT_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
     PRE_ACCIDENT_BUFFER_SIZE = 50
-    MAX_CLIP_FRAMES = 300
+    MAX_CLIP_FRAMES = MAX_CLIP_FRAMES
     FPS = 30
-    LOST_THRESHOLD = 15
+    LOST_THRESHOLD = POST_ACCIDENT_FRAMES
     COOLDOWN_FRAMES = 50
 
-    def __init__(self):
-        self.model_trainer = ModelTrainer()
-        self.frame_buffer = collections.deque(maxlen=self.PRE_ACCIDENT_BUFFER_SIZE)
-        self.accident_active = False
-        self.accident_clip_frames = []
-        self.lost_counter = 0
-        self.cooldown_frames = 0
-        self.clip_index = 0
-        self.accident_detected_in_video = False
-
-    def save_video_clip(self, frames, filename):
-        if not frames:
-            return
-        height, width, _ = frames[0].shape
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        writer = cv2.VideoWriter(filename, fourcc, self.FPS, (width, height))
-        for f in frames:
-            writer.write(f)
-        writer.release()
-        logging.info(f"Clip saved: {filename}")
-
-    def save_annotated_image(self, frame, boxes, filename):
+    EVENT_START = "start"
+    EVENT_APPEND = "append"
+
+    def __init__(self, evidence_writer=None, incident_catalog=None, model_pool=None,
+                 parallel_workers=PARALLEL_VIDEO_WORKERS, parallel=None):
+        """
+        :param evidence_writer: Writer for accident images, a private one if omitted
+        :param incident_catalog: Optional catalog saved images are recorded in
+        :param model_pool: ModelTrainerPool to run inference on, a single instance if omitted
+        :param parallel_workers: Processes process_video splits long videos over; 0 or 1 runs sequentially
+        :param parallel: ParallelVideoProcessor to split them on (e.g. one building stub-model pipelines),
+            created on first use if omitted
+        """
+        self.model_trainer = model_pool or ModelTrainerPool(size=1)
+        self.evidence_writer = evidence_writer or EvidenceWriter()
+        self.incident_catalog = incident_catalog
+        self.parallel_workers = parallel_workers
+        self._parallel = parallel
+
+    @property
+    def parallel(self):
+        """Process pool for chunked process_video, created on first use"""
+        if self._parallel is None:
+            from Nirikshan.pipeline.parallel_video import ParallelVideoProcessor
+            self._parallel = ParallelVideoProcessor(self.parallel_workers)
+        return self._parallel
+
+    def close(self):
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def new_context(self, name=None, roi=None):
+        """Creates the detection state for one video, feed or upload, optionally limited to an ROI"""
+        return DetectionContext(self.PRE_ACCIDENT_BUFFER_SIZE, name, roi)
+
+    def new_clip_path(self, context):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        clip_filename = self.ACCIDENT_CLIPS_DIR / f"accident_clip_{timestamp}_{uuid.uuid4().hex[:8]}.mp4"
+        context.clip_paths.append(clip_filename)
+        context.clip_index += 1
+        return clip_filename
+
+    def start_clip(self, context):
+        """Opens the next clip with the pre-accident buffer (which already holds the current frame) as pre-roll"""
+        context.clip_recorder.start(self.new_clip_path(context), self.FPS, context.frame_buffer)
+
+    def finish_clip(self, context):
+        context.clip_recorder.finish()
+        context.accident_active = False
+
+    def save_annotated_image(self, frame, boxes, filename, details=None):
         for box in boxes:
             x1, y1, x2, y2 = map(int, box)
             cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.imwrite(filename, frame)
+        on_written = None
+        if self.incident_catalog is not None:
+            def on_written(path):
+                if path.exists():
+                    self.incident_catalog.record(path.name, f"/accident_images/{path.name}", details,
+                                                 path.stat().st_size)
+        self.evidence_writer.save_image(frame, filename, on_written=on_written)
 
-    def process_frame(self, frame, save_image=True):
-        self.frame_buffer.append(frame.copy())
-        boxes, class_ids, confidences = self.model_trainer.detect_objects(frame)
-        accident_indices = [
-            i for i, (cls, conf) in enumerate(zip(class_ids, confidences))
-            if cls in self.ACCIDENT_CLASS_IDS and conf >= self.CONFIDENCE_THRESHOLD
-        ]
+    def process_frame(self, frame, save_image=True, context=None):
+        """
+        Runs detection on one frame.
+
+        :param frame: BGR frame
+        :param save_image: Save an annotated image when an accident is found
+        :param context: DetectionContext of the video the frame belongs to; without one the
+            frame is judged on its own and no clip is recorded
+        :return: "Accident detected" or "No accident detected"
+        """
+        if context is not None:
+            context.frame_buffer.append(frame)
+            context.frames_processed += 1
+        boxes, class_ids, confidences, accident_indices = self.detect_accidents(frame, context)
         accident_detected = len(accident_indices) > 0
         logging.info(f"Accident detected: {accident_detected}")
 
         if accident_detected and save_image:
             accident_boxes = [boxes[i] for i in accident_indices]
+            best = max(accident_indices, key=lambda i: confidences[i])
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            accident_image_path = self.ACCIDENT_IMAGES_DIR / f"accident_image_{timestamp}.jpg"
-            self.save_annotated_image(frame, accident_boxes, accident_image_path)
-
-        if self.cooldown_frames > 0:
-            self.cooldown_frames -= 1
-
-        if accident_detected and self.cooldown_frames <= 0:
-            if not self.accident_active:
-                self.accident_active = True
-                self.lost_counter = 0
-                self.accident_clip_frames = list(self.frame_buffer)
-                logging.info("Accident event started.")
+            accident_image_path = self.ACCIDENT_IMAGES_DIR / f"accident_image_{timestamp}_{uuid.uuid4().hex[:8]}.jpg"
+            self.save_annotated_image(frame, accident_boxes, accident_image_path, {
+                "accident_type": CLASS_NAMES.get(int(class_ids[best]), "Unknown"),
+                "confidence": float(confidences[best]),
+            })
+
+        if context is not None:
+            started = time.perf_counter()
+            self.update_clip(context, frame, accident_detected)
+            if context.tracer is not None:
+                context.tracer.record("update_clip", started, time.perf_counter(), context.frames_processed)
+
+        return "Accident detected" if accident_detected else "No accident detected"
+
+    def detect_accidents(self, frame, context=None):
+        """
+        Runs (or, when the context's inference gate skips the frame, reuses) detection on one frame.
+
+        :return: (boxes, class_ids, confidences, accident_indices) in full-frame coordinates
+        """
+        roi = context.roi if context is not None else None
+        model_input = roi.crop(frame) if roi is not None else frame
+        if context is None or context.inference_gate.should_infer(model_input):
+            if context is None or context.tracer is None:
+                boxes, class_ids, confidences = self.model_trainer.detect_objects(model_input)
             else:
-                self.lost_counter = 0
-            self.accident_clip_frames.append(frame.copy())
-            if len(self.accident_clip_frames) >= self.MAX_CLIP_FRAMES:
-                clip_filename = self.ACCIDENT_CLIPS_DIR / f"accident_clip_{self.clip_index:04d}.mp4"
-                self.save_video_clip(self.accident_clip_frames, clip_filename)
-                self.clip_index += 1
-                self.accident_active = False
-                self.accident_clip_frames = []
-                self.cooldown_frames = self.COOLDOWN_FRAMES
+                boxes, class_ids, confidences = self._traced_detect(model_input, context)
+            if roi is not None:
+                boxes, class_ids, confidences = roi.restore(boxes, class_ids, confidences)
+            if context is not None:
+                context.last_detections = (boxes, class_ids, confidences)
+                context.inference_gate.observe(class_ids)
         else:
-            if self.accident_active:
-                self.lost_counter += 1
-                self.accident_clip_frames.append(frame.copy())
-                if self.lost_counter >= self.LOST_THRESHOLD:
-                    clip_filename = self.ACCIDENT_CLIPS_DIR / f"accident_clip_{self.clip_index:04d}.mp4"
-                    self.save_video_clip(self.accident_clip_frames, clip_filename)
-                    self.clip_index += 1
-                    self.accident_active = False
-                    self.accident_clip_frames = []
-                    self.cooldown_frames = self.COOLDOWN_FRAMES
+            # skipped by the inference gate: the previous detections still describe the scene
+            boxes, class_ids, confidences = context.last_detections
+        accident_indices = [
+            i for i, (cls, conf) in enumerate(zip(class_ids, confidences))
+            if cls in self.ACCIDENT_CLASS_IDS and conf >= self.CONFIDENCE_THRESHOLD
+        ]
+        return boxes, class_ids, confidences, accident_indices
 
-        return "Accident detected" if accident_detected else "No accident detected"
+    def _traced_detect(self, model_input, context):
+        tracer, frame_number = context.tracer, context.frames_processed
+        timings = {}
+        with tracer.span("detect", frame_number):
+            result = self.model_trainer.detect_objects_batch([model_input], timings)[0]
+        preprocessed = timings["started"] + timings["preprocess"]
+        tracer.record("preprocess", timings["started"], preprocessed, frame_number)
+        tracer.record("inference", preprocessed, preprocessed + timings["inference"], frame_number)
+        return result
+
+    def advance_event(self, context, accident_detected):
+        """
+        Steps the accident event state of a context by one frame, without touching frames.
+
+        :return: (action, finished): action is EVENT_START (open a clip with the pre-roll),
+            EVENT_APPEND (add this frame) or None; finished means the clip closes after it
+        """
+        action, finished = None, False
+        if accident_detected:
+            context.accident_detected = True
+        if context.cooldown_frames > 0:
+            context.cooldown_frames -= 1
+
+        if accident_detected and context.cooldown_frames <= 0:
+            if not context.accident_active:
+                context.accident_active = True
+                context.lost_counter = 0
+                # the pre-roll is the pre-accident buffer, current frame included
+                context.clip_frames = min(context.frames_processed, self.PRE_ACCIDENT_BUFFER_SIZE)
+                action = self.EVENT_START
+            else:
+                context.lost_counter = 0
+                context.clip_frames += 1
+                action = self.EVENT_APPEND
+            if context.clip_frames >= self.MAX_CLIP_FRAMES:
+                finished = True
+        elif context.accident_active:
+            context.lost_counter += 1
+            context.clip_frames += 1
+            action = self.EVENT_APPEND
+            finished = context.lost_counter >= self.LOST_THRESHOLD
+
+        if finished:
+            context.accident_active = False
+            context.cooldown_frames = self.COOLDOWN_FRAMES
+        return action, finished
 
-    def reset_state(self):
-        """Reset all state variables for a new detection session"""
-        self.frame_buffer.clear()
-        self.accident_active = False
-        self.accident_clip_frames = []
-        self.lost_counter = 0
-        self.cooldown_frames = 0
-        self.accident_detected_in_video = False
-
-    def process_video(self, video_path):
-        self.reset_state()
+    def update_clip(self, context, frame, accident_detected):
+        """Advances the accident event of a context: opens, extends or closes its clip"""
+        action, finished = self.advance_event(context, accident_detected)
+        if action == self.EVENT_START:
+            ACCIDENTS_TOTAL.labels("offline").inc()
+            self.start_clip(context)
+            logging.info("Accident event started.")
+        elif action == self.EVENT_APPEND:
+            context.clip_recorder.append(frame)
+        if finished:
+            self.finish_clip(context)
+
+    def record_events(self, video_path, accident_flags, context):
+        """
+        Replays the event state over per-frame accident flags (from a parallel
+        run) and writes the clips the sequential run would have recorded,
+        decoding only the frames they contain.
+        """
+        ranges = []
+        for index, accident_detected in enumerate(accident_flags):
+            context.frames_processed += 1
+            action, _ = self.advance_event(context, accident_detected)
+            if action == self.EVENT_START:
+                ACCIDENTS_TOTAL.labels("offline").inc()
+                ranges.append([index - context.clip_frames + 1, index])
+            elif action == self.EVENT_APPEND:
+                ranges[-1][1] = index
+        context.accident_active = False
+        if not ranges:
+            return
+
+        from Nirikshan.pipeline.parallel_video import open_at_frame
+
+        cap = cv2.VideoCapture(str(video_path))
+        position = 0
+        try:
+            for first, last in ranges:
+                if first < position or first - position > self.FPS * 10:
+                    cap.release()
+                    cap, position = open_at_frame(str(video_path), first)
+                while position < first and cap.grab():
+                    position += 1
+                context.clip_recorder.start(self.new_clip_path(context), self.FPS)
+                logging.info(f"Accident event recorded: frames {first}-{last}")
+                while position <= last:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    context.clip_recorder.append(frame)
+                    position += 1
+                context.clip_recorder.finish()
+        finally:
+            cap.release()
+
+    def process_video(self, video_path, progress=None, context=None):
+        """
+        Runs detection over a whole video file.
+
+        :param video_path: Video file to process
+        :param progress: Optional callback called with (frames_processed, total_frames) every PROGRESS_INTERVAL_FRAMES
+        :param context: DetectionContext to record into (e.g. to read its clips afterwards), a new one if omitted
+        :return: "Accident detected" or "No accident detected"
+        """
+        context = context or self.new_context(str(video_path))
         
         cap = cv2.VideoCapture(str(video_path))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.parallel_workers > 1 and total_frames > PARALLEL_VIDEO_CHUNK_FRAMES:
+            cap.release()
+            return self._process_video_parallel(video_path, total_frames, progress, context)
         frame_index = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            result = self.process_frame(frame, save_image=False)
-            if result == "Accident detected":
-                self.accident_detected_in_video = True
-            frame_index += 1
-        cap.release()
+        try:
+            while cap.isOpened():
+                context.tracer = TRACING.active(context.name)
+                started = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if context.tracer is not None:
+                    context.tracer.record("decode", started, time.perf_counter(), frame_index + 1)
+                self.process_frame(frame, save_image=False, context=context)
+                frame_index += 1
+                if progress is not None and frame_index % PROGRESS_INTERVAL_FRAMES == 0:
+                    progress(frame_index, total_frames)
+        finally:
+            cap.release()
+            context.close()
+        if progress is not None:
+            progress(frame_index, total_frames)
         
-        if self.accident_active and self.accident_clip_frames:
-            clip_filename = self.ACCIDENT_CLIPS_DIR / f"accident_clip_{self.clip_index:04d}.mp4"
-            self.save_video_clip(self.accident_clip_frames, clip_filename)
-            self.clip_index += 1
+        return "Accident detected" if context.accident_detected else "No accident detected"
+
+    def _process_video_parallel(self, video_path, total_frames, progress, context):
+        roi = context.roi.polygon if context.roi is not None else None
+        tracer = TRACING.active(context.name)
+        try:
+            # chunks run in pool processes; only the two phases of the job are traced
+            started = time.perf_counter()
+            accident_flags, gate_stats = self.parallel.detect(str(video_path), total_frames, roi, progress)
+            detected = time.perf_counter()
+            context.frames_processed = 0
+            self.record_events(video_path, accident_flags, context)
+            if tracer is not None:
+                tracer.record("parallel_detect", started, detected, frames=len(accident_flags))
+                tracer.record("record_events", detected, time.perf_counter(), clips=len(context.clip_paths))
+            context.inference_gate.merge_stats(gate_stats)
+        finally:
+            context.close()
+        if progress is not None:
+            progress(len(accident_flags), total_frames)
         
-        return "Accident detected" if self.accident_detected_in_video else "No accident detected"
+        return "Accident detected" if context.accident_detected else "No accident detected"
 
-    def process_live_feed(self, url):
-        self.reset_state()
+    def process_live_feed(self, url, context=None):
+        context = context or self.new_context(url)
         
         cap = cv2.VideoCapture(url)
         if not cap.isOpened():
@@ -136,19 +337,15 @@ class TrainingPipeline:
         frame_index = 0
         max_frames = 1000 
         
-        while cap.isOpened() and frame_index < max_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            result = self.process_frame(frame, save_image=False)
-            if result == "Accident detected":
-                self.accident_detected_in_video = True
-            frame_index += 1
-        cap.release()
-        
-        if self.accident_active and self.accident_clip_frames:
-            clip_filename = self.ACCIDENT_CLIPS_DIR / f"accident_clip_{self.clip_index:04d}.mp4"
-            self.save_video_clip(self.accident_clip_frames, clip_filename)
-            self.clip_index += 1
+        try:
+            while cap.isOpened() and frame_index < max_frames:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.process_frame(frame, save_image=False, context=context)
+                frame_index += 1
+        finally:
+            cap.release()
+            context.close()
         
-        return "Accident detected" if self.accident_detected_in_video else "No accident detected"
\ No newline at end of file
+        return "Accident detected" if context.accident_detected else "No accident detected"
@@ -0,0 +1,204 @@
+import collections
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from Nirikshan.constant.application import (
+    VIDEO_JOB_HISTORY,
+    VIDEO_JOB_MAX_PENDING,
+    VIDEO_JOB_WORKERS,
+)
+from Nirikshan.logger import logging
+
+
+class VideoJob:
+    """State of one uploaded video: queued, running, completed or failed."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, video_path: str, filename: Optional[str] = None, size_bytes: Optional[int] = None,
+                 options: Optional[Dict] = None):
+        self.job_id = uuid.uuid4().hex
+        self.video_path = video_path
+        self.filename = filename
+        self.size_bytes = size_bytes
+        self.options = options or {}
+        self.state = self.QUEUED
+        self.frames_processed = 0
+        self.total_frames = 0
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (self.COMPLETED, self.FAILED)
+
+    def report_progress(self, frames_processed: int, total_frames: int):
+        self.frames_processed = frames_processed
+        self.total_frames = max(total_frames, frames_processed)
+
+    def status(self) -> dict:
+        progress = None
+        if self.state == self.COMPLETED:
+            progress = 1.0
+        elif self.total_frames > 0:
+            progress = round(self.frames_processed / self.total_frames, 4)
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "filename": self.filename,
+            "size_bytes": self.size_bytes,
+            "frames_processed": self.frames_processed,
+            "total_frames": self.total_frames,
+            "progress": progress,
+            "created": datetime.fromtimestamp(self.created_at).isoformat(),
+            "started": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finished": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+
+class VideoJobQueue:
+    """
+    Runs uploaded videos through the offline pipeline on a fixed number of
+    worker threads, so a request only has to queue the job and return its id.
+    The pending queue is bounded: submit raises queue.Full once
+    VIDEO_JOB_MAX_PENDING jobs are waiting. Finished jobs are kept, oldest
+    dropped first, until VIDEO_JOB_HISTORY of them have accumulated.
+    """
+
+    def __init__(self, runner: Callable[[VideoJob], Dict], workers: int = VIDEO_JOB_WORKERS,
+                 max_pending: int = VIDEO_JOB_MAX_PENDING, history: int = VIDEO_JOB_HISTORY):
+        """
+        :param runner: Called on a worker thread with the job; returns its result or raises
+        :param workers: Jobs run at the same time
+        :param max_pending: Jobs allowed to wait for a worker
+        :param history: Finished jobs kept for status and result queries
+        """
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.history = max(1, history)
+        self._pending = queue.Queue(maxsize=max(1, max_pending))
+        self._jobs: Dict[str, VideoJob] = {}
+        self._finished_ids = collections.deque()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.jobs_rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"video-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stops the workers after their current job. Jobs still queued are not
+        run; they are marked failed so their status does not stay queued.
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._stopping.set()
+        for thread in threads:
+            thread.join(timeout)
+        while True:
+            try:
+                job = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            job.error = "Job queue stopped before the job started"
+            job.state = VideoJob.FAILED
+            job.finished_at = time.time()
+            logging.warning(f"Video job {job.job_id} dropped: {job.error}")
+            self._record_finished(job)
+
+    def submit(self, video_path: str, filename: Optional[str] = None, size_bytes: Optional[int] = None,
+               options: Optional[Dict] = None) -> VideoJob:
+        """
+        Queues a video for processing.
+
+        :param video_path: Video file on disk
+        :param filename: Original name of the upload
+        :param size_bytes: Size of the upload
+        :param options: Processing options for the runner, e.g. the ROI
+        :return: The queued job
+        :raises queue.Full: if VIDEO_JOB_MAX_PENDING jobs are already waiting
+        """
+        self.start()
+        job = VideoJob(video_path, filename, size_bytes, options)
+        with self._lock:
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                self.jobs_rejected += 1
+                raise
+            self._jobs[job.job_id] = job
+        logging.info(f"Video job {job.job_id} queued for {video_path}")
+        return job
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[VideoJob]:
+        """All known jobs, newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            job.state = VideoJob.RUNNING
+            job.started_at = time.time()
+            try:
+                job.result = self.runner(job)
+                job.state = VideoJob.COMPLETED
+            except Exception as e:
+                job.error = str(e)
+                job.state = VideoJob.FAILED
+                logging.error(f"Video job {job.job_id} failed: {job.error}")
+            job.finished_at = time.time()
+            logging.info(f"Video job {job.job_id} {job.state} in {job.finished_at - job.started_at:.2f}s")
+            self._record_finished(job)
+
+    def _record_finished(self, job: VideoJob):
+        with self._lock:
+            if job.state == VideoJob.COMPLETED:
+                self.jobs_completed += 1
+            else:
+                self.jobs_failed += 1
+            self._finished_ids.append(job.job_id)
+            while len(self._finished_ids) > self.history:
+                self._jobs.pop(self._finished_ids.popleft(), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.state == VideoJob.RUNNING)
+            return {
+                "workers": self.workers,
+                "running": running,
+                "pending": self._pending.qsize(),
+                "max_pending": self._pending.maxsize,
+                "completed": self.jobs_completed,
+                "failed": self.jobs_failed,
+                "rejected": self.jobs_rejected,
+            }
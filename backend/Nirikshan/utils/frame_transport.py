@@ -0,0 +1,70 @@
+import struct
+
+FRAME_FORMAT_JSON = "json"
+FRAME_FORMAT_BINARY = "binary"
+FRAME_FORMATS = (FRAME_FORMAT_JSON, FRAME_FORMAT_BINARY)
+
+# Binary preview frames are a fixed little-endian header followed by the raw
+# JPEG bytes: message type (uint8), frame_number (uint32), timestamp (float64,
+# unix seconds) and progress (float32, 0..1). Control and alert messages
+# always stay JSON text frames.
+BINARY_FRAME_TYPE = 1
+BINARY_FRAME_HEADER = struct.Struct("<BIdf")
+
+
+def negotiate_frame_format(requested) -> str:
+    """
+    Picks the preview frame format for a client, defaulting to JSON for old clients.
+
+    :param requested: Value of "frame_format" sent with process_video
+    :return: One of FRAME_FORMATS
+    """
+    if isinstance(requested, str) and requested.lower() == FRAME_FORMAT_BINARY:
+        return FRAME_FORMAT_BINARY
+    return FRAME_FORMAT_JSON
+
+
+def pack_binary_frame(frame_number: int, timestamp: float, progress: float, jpeg: bytes) -> bytes:
+    """
+    Builds a binary preview frame message.
+
+    :param frame_number: Frame number within the stream
+    :param timestamp: Unix timestamp of the frame
+    :param progress: Fraction of the source processed so far
+    :param jpeg: Encoded JPEG bytes
+    :return: Header followed by the JPEG payload
+    """
+    header = BINARY_FRAME_HEADER.pack(BINARY_FRAME_TYPE, frame_number, timestamp, progress)
+    return header + jpeg
+
+
+def unpack_binary_frame(message: bytes):
+    """
+    Splits a binary preview frame message into its fields.
+
+    :param message: Bytes received from the WebSocket
+    :return: Tuple of (frame_number, timestamp, progress, jpeg)
+    """
+    message_type, frame_number, timestamp, progress = BINARY_FRAME_HEADER.unpack_from(message)
+    if message_type != BINARY_FRAME_TYPE:
+        raise ValueError(f"Unknown binary message type: {message_type}")
+    return frame_number, timestamp, progress, bytes(message[BINARY_FRAME_HEADER.size:])
+
+
+SUBSCRIPTION_ALERTS = "alerts"
+SUBSCRIPTION_THUMBNAIL = "thumbnail"
+SUBSCRIPTION_FULL = "full"
+# ordered from least to most work per frame
+SUBSCRIPTION_LEVELS = (SUBSCRIPTION_ALERTS, SUBSCRIPTION_THUMBNAIL, SUBSCRIPTION_FULL)
+
+
+def negotiate_subscription(requested) -> str:
+    """
+    Picks the preview subscription level for a client, defaulting to the full stream.
+
+    :param requested: Value of "subscription" sent with process_video
+    :return: One of SUBSCRIPTION_LEVELS
+    """
+    if isinstance(requested, str) and requested.lower() in SUBSCRIPTION_LEVELS:
+        return requested.lower()
+    return SUBSCRIPTION_FULL
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import cv2
@@ -6,28 +6,77 @@ import numpy as np
 import json
 import asyncio
 import os
+import queue
 import uuid
 from datetime import datetime
 from typing import Dict, Set, List, Deque, Optional
-from collections import deque
+from collections import Counter, deque
 import base64
 import traceback
-from fastapi.responses import JSONResponse
-from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from Nirikshan.pipeline.model_loader import ModelLoader
+from Nirikshan.pipeline.camera_session import CameraSessionRegistry
+from Nirikshan.pipeline.camera_workers import CameraWorkerPool
+from Nirikshan.pipeline.video_jobs import VideoJob, VideoJobQueue
+from Nirikshan.components.evidence_writer import (
+    ACCIDENT_IMAGES_DIR,
+    PUBLIC_IMAGES_DIR,
+    close_shared_evidence,
+    save_accident_image,
+    shared_evidence,
+)
+from Nirikshan.components.frame_tracer import TRACING
+from Nirikshan.components.region_of_interest import RegionOfInterest, parse_roi
+from Nirikshan.components.send_queue import ClientSendQueue
+from Nirikshan.components.inference_scheduler import InferenceScheduler
+from Nirikshan.components.metrics import CONTENT_TYPE, REGISTRY, Gauge, resident_memory_bytes
+from Nirikshan.constant.application import (
+    ACCIDENT_CLIPS_DIR,
+    CAMERA_WORKERS,
+    INCIDENT_MAX_PAGE_SIZE,
+    INCIDENT_PAGE_SIZE,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    MODEL_POOL_SIZE,
+    TRACE_MAX_EVENTS,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_BYTES,
+    UPLOADS_DIR,
+)
 from Nirikshan.logger import logging
+from Nirikshan.utils.frame_transport import negotiate_frame_format, negotiate_subscription
 from pathlib import Path
 import supervision as sv
 
 app = FastAPI()
-pipeline = TrainingPipeline()
+inference_scheduler = InferenceScheduler(
+    None,
+    max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=INFERENCE_MAX_WAIT_MS
+)
+
+def on_model_ready(pipeline):
+    inference_scheduler.model_trainer = pipeline.model_trainer
+    inference_scheduler.start()
 
-ACCIDENT_IMAGES_DIR = Path("accident_images")
-ACCIDENT_IMAGES_DIR.mkdir(exist_ok=True)
+evidence_writer, incident_catalog = shared_evidence()
 
-PUBLIC_IMAGES_DIR = Path("../frontend/public/accident_images")
-PUBLIC_IMAGES_DIR.mkdir(exist_ok=True, parents=True)
+def create_pipeline():
+    from Nirikshan.components.model_pool import ModelTrainerPool
+    from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+    return TrainingPipeline(evidence_writer, incident_catalog, ModelTrainerPool(size=MODEL_POOL_SIZE))
+
+model_loader = ModelLoader(factory=create_pipeline, on_ready=on_model_ready)
+
+ACCIDENT_CLIPS_PATH = Path(ACCIDENT_CLIPS_DIR)
+ACCIDENT_CLIPS_PATH.mkdir(exist_ok=True, parents=True)
+
+UPLOADS_PATH = Path(UPLOADS_DIR)
+UPLOADS_PATH.mkdir(exist_ok=True, parents=True)
 
 app.mount("/accident_images", StaticFiles(directory=str(ACCIDENT_IMAGES_DIR)), name="accident_images")
+app.mount("/accident_clips", StaticFiles(directory=str(ACCIDENT_CLIPS_PATH)), name="accident_clips")
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,40 +88,25 @@ app.add_middleware(
 
 active_connections: Dict[str, WebSocket] = {}
 detected_accidents: Dict[str, Set[int]] = {}  
-frame_buffers: Dict[str, Deque] = {}
-tracker_instances: Dict[str, sv.ByteTrack] = {}
-traces: Dict[str, Dict[int, deque]] = {}
 cctv_metadata: Dict[str, Dict] = {}
 
-MIN_FRAMES_BETWEEN_DETECTIONS = 30  
-BUFFER_SIZE = 15 
-POST_ACCIDENT_FRAMES = 15 
-ACCIDENT_COOLDOWN_FRAMES = 90
-ACCIDENT_STATE_DURATION = 120
-TRACE_LENGTH = 30
-MAX_TRACE_POINTS = 90
-
-CLASS_NAMES = {
-    0: "bike",
-    1: "bike_bike_accident",
-    2: "bike_object_accident",
-    3: "bike_person_accident",
-    4: "car",
-    5: "car_bike_accident",
-    6: "car_car_accident",
-    7: "car_object_accident",
-    8: "car_person_accident",
-    9: "person"
-}
-
-VEHICLE_CLASS_IDS = [0, 4]
-ACCIDENT_CLASS_IDS = [1, 2, 3, 5, 6, 7, 8]
-
-def format_location(latitude: float, longitude: float) -> str:
-    """Format location coordinates to a readable string"""
-    if latitude is None or longitude is None:
-        return "Unknown location"
-    return f"{latitude:.6f}, {longitude:.6f}"
+@app.on_event("startup")
+async def start_model_loading():
+    model_loader.start()
+    asyncio.get_running_loop().run_in_executor(None, incident_catalog.backfill, ACCIDENT_IMAGES_DIR)
+    if camera_workers is not None:
+        camera_workers.start()
+    video_jobs.start()
+
+@app.on_event("shutdown")
+async def stop_inference_scheduler():
+    inference_scheduler.stop()
+    video_jobs.stop()
+    if model_loader.pipeline is not None:
+        model_loader.pipeline.close()
+    close_shared_evidence()
+    if camera_workers is not None:
+        camera_workers.stop()
 
 @app.get("/health")
 async def health_check():
@@ -83,17 +117,147 @@ async def health_check():
         "public_dir": str(PUBLIC_IMAGES_DIR)
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: model loading state and warmup timings"""
+    status = model_loader.status()
+    return JSONResponse(content=status, status_code=200 if model_loader.ready else 503)
+
+def get_pipeline():
+    if not model_loader.ready:
+        raise HTTPException(status_code=503, detail=model_loader.status())
+    return model_loader.pipeline
+
+@app.get("/inference/stats")
+async def inference_stats():
+    """Batch size and queue wait statistics of the shared inference scheduler and the model pool"""
+    stats = inference_scheduler.stats()
+    if model_loader.ready:
+        stats["model_pool"] = model_loader.pipeline.model_trainer.stats()
+    return stats
+
+@app.get("/streams/stats")
+async def stream_stats():
+    """Per-camera subscribers, frame drop, queue depth and capture-to-alert latency statistics"""
+    return camera_sessions.stats()
+
+@app.get("/evidence/stats")
+async def evidence_stats():
+    """Queue depth and write latency of the background evidence writer"""
+    return evidence_writer.stats()
+
+@app.get("/workers/stats")
+async def worker_stats():
+    """Camera assignments and restarts of the camera worker processes, if enabled"""
+    if camera_workers is None:
+        return {"enabled": False}
+    return {"enabled": True, **camera_workers.stats()}
+
+def collect_gauges():
+    """Current sessions, queue depths, dropped frames and memory, read from the live objects at scrape time"""
+    sessions = Gauge("nirikshan_active_sessions", "Camera sessions currently running")
+    connections = Gauge("nirikshan_websocket_connections", "Open /ws/detect connections")
+    subscribers = Gauge("nirikshan_session_subscribers", "WebSockets attached to a camera session", ("camera",))
+    queue_depth = Gauge("nirikshan_queue_depth", "Frames waiting in a stage queue of a camera session",
+                        ("camera", "queue"))
+    dropped = Gauge("nirikshan_frames_dropped", "Frames dropped by a camera session since it started", ("camera",))
+    memory = Gauge("nirikshan_session_memory_bytes", "Frame memory held by a camera session (estimate)", ("camera",))
+    shared_depth = Gauge("nirikshan_shared_queue_depth", "Items waiting in a queue shared by all sessions",
+                         ("queue",))
+    resident = Gauge("process_resident_memory_bytes", "Resident memory size of the API process")
+    send_pending = Gauge("nirikshan_send_queue_pending", "Messages waiting in the send queues of a camera's WebSockets",
+                         ("camera", "priority"))
+    send_dropped = Gauge("nirikshan_send_queue_dropped", "Messages dropped from the send queues of a camera's "
+                         "current WebSockets because the clients fell behind", ("camera", "priority"))
+
+    sessions.labels().set(len(camera_sessions.sessions))
+    connections.labels().set(len(active_connections))
+    for camera_key, stats in camera_sessions.stats().items():
+        subscribers.labels(camera_key).set(len(stats.get("subscribers", {})))
+        dropped.labels(camera_key).set(stats.get("frames_dropped", 0))
+        memory.labels(camera_key).set(stats.get("memory_bytes", 0))
+        for name, depth in stats.get("queue_depths", {}).items():
+            queue_depth.labels(camera_key, name).set(depth)
+        pending, send_drops = Counter(), Counter()
+        for subscriber in stats.get("subscribers", {}).values():
+            pending.update(subscriber["send_queue"]["pending"])
+            send_drops.update(subscriber["send_queue"]["dropped"])
+        for priority in pending:
+            send_pending.labels(camera_key, priority).set(pending[priority])
+            send_dropped.labels(camera_key, priority).set(send_drops[priority])
+    shared_depth.labels("inference").set(inference_scheduler.stats()["queue_depth"])
+    shared_depth.labels("evidence").set(evidence_writer.stats()["queue_depth"])
+    shared_depth.labels("video_jobs").set(video_jobs.stats()["pending"])
+    rss = resident_memory_bytes()
+    if rss is not None:
+        resident.labels().set(rss)
+    return [sessions, connections, subscribers, queue_depth, dropped, memory, shared_depth, resident,
+            send_pending, send_dropped]
+
+REGISTRY.add_collector(collect_gauges)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-camera stage latency histograms, session gauges, accident and artifact counters"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/admin/tracing")
+async def list_traces():
+    """Frame timeline traces that are recording or kept for download"""
+    return {"traces": TRACING.stats()}
+
+@app.post("/admin/tracing/{target:path}/start")
+async def start_trace(target: str, max_events: int = TRACE_MAX_EVENTS):
+    """Starts recording per-frame stage spans for a camera session (camera_id, or video path) or a video job id"""
+    return TRACING.start(target, max_events).stats()
+
+@app.post("/admin/tracing/{target:path}/stop")
+async def stop_trace(target: str):
+    """Stops recording; the trace stays available at GET /admin/tracing/{target}"""
+    tracer = TRACING.stop(target)
+    if tracer is None:
+        raise HTTPException(status_code=404, detail=f"No trace for {target}")
+    return tracer.stats()
+
+@app.get("/admin/tracing/{target:path}")
+async def export_trace(target: str):
+    """The spans recorded so far as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)"""
+    tracer = TRACING.get(target)
+    if tracer is None:
+        raise HTTPException(status_code=404, detail=f"No trace for {target}")
+    filename = "trace_" + "".join(c if c.isalnum() else "_" for c in target)[:64] + ".json"
+    return JSONResponse(content=await run_in_threadpool(tracer.export),
+                        headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.delete("/admin/tracing/{target:path}")
+async def discard_trace(target: str):
+    """Stops recording and drops the trace"""
+    if TRACING.discard(target) is None:
+        raise HTTPException(status_code=404, detail=f"No trace for {target}")
+    return {"target": target, "discarded": True}
+
 @app.get("/images")
-async def list_images():
+def list_images(limit: int = INCIDENT_PAGE_SIZE, cursor: Optional[str] = None, camera_id: Optional[str] = None,
+                accident_type: Optional[str] = None, min_confidence: Optional[float] = None,
+                since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Saved accident images from the incident catalog, newest first; pass next_cursor back as cursor for the next page"""
+    try:
+        incidents, next_cursor = incident_catalog.list(
+            limit=max(1, min(limit, INCIDENT_MAX_PAGE_SIZE)),
+            cursor=cursor,
+            camera_id=camera_id,
+            accident_type=accident_type,
+            min_confidence=min_confidence,
+            since=since.timestamp() if since is not None else None,
+            until=until.timestamp() if until is not None else None
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
     images = []
-    for file in ACCIDENT_IMAGES_DIR.glob("*.jpg"):
-        images.append({
-            "filename": file.name,
-            "url": f"/accident_images/{file.name}",
-            "created": datetime.fromtimestamp(file.stat().st_ctime).isoformat(),
-            "size_bytes": file.stat().st_size
-        })
-    return {"images": images, "count": len(images)}
+    for incident in incidents:
+        incident["created"] = datetime.fromtimestamp(incident.pop("created_at")).isoformat()
+        images.append(incident)
+    return {"images": images, "count": len(images), "next_cursor": next_cursor}
 
 @app.websocket("/ws/detect")
 async def accident_detection_websocket(websocket: WebSocket):
@@ -102,15 +266,18 @@ async def accident_detection_websocket(websocket: WebSocket):
     connection_id = f"conn_{uuid.uuid4().hex[:8]}"
     active_connections[connection_id] = websocket
     detected_accidents[connection_id] = set()
+    # the only writer on this socket from here on; replies and camera session messages all go through it
+    send_queue = ClientSendQueue(websocket, connection_id)
+    send_queue.start()
     
     try:
         logging.info(f"Client connected: {connection_id}")
-        await websocket.send_json({
+        send_queue.put({
             "message": "Connected to accident detection service",
             "severity": "info"
         })
         
-        await websocket.send_json({
+        send_queue.put({
             "type": "ready",
             "message": "Backend ready for video processing",
             "severity": "info"
@@ -121,20 +288,50 @@ async def accident_detection_websocket(websocket: WebSocket):
             data = json.loads(message)
             
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                send_queue.put({"type": "pong"})
             
             elif data.get("type") == "process_video":
                 video_url = data.get("video_url")
                 
+                try:
+                    roi = parse_roi(data.get("roi"))
+                except ValueError as e:
+                    send_queue.put({
+                        "type": "error",
+                        "message": f"Invalid ROI: {str(e)}",
+                        "severity": "error"
+                    })
+                    continue
+
                 cctv_metadata[connection_id] = {
                     "name": data.get("camera_name", "Unknown Camera"),
                     "latitude": data.get("latitude"),
                     "longitude": data.get("longitude"),
-                    "camera_id": data.get("camera_id")
+                    "camera_id": data.get("camera_id"),
+                    "roi": roi
                 }
                 
+                if video_url and not model_loader.ready:
+                    send_queue.put({
+                        "type": "model_loading",
+                        "message": f"Model is {model_loader.state}, waiting before processing",
+                        "severity": "info"
+                    })
+                    if not await model_loader.wait_async():
+                        send_queue.put({
+                            "type": "error",
+                            "message": f"Model failed to load: {model_loader.error}",
+                            "severity": "error"
+                        })
+                        continue
+
                 if video_url:
-                    await process_video_stream(websocket, video_url, connection_id)
+                    frame_format = negotiate_frame_format(data.get("frame_format"))
+                    subscription = negotiate_subscription(data.get("subscription"))
+                    await process_video_stream(send_queue, video_url, connection_id, frame_format, subscription)
+
+            elif data.get("type") == "stop_video":
+                await camera_sessions.unsubscribe(connection_id)
     
     except WebSocketDisconnect:
         logging.info(f"Client disconnected: {connection_id}")
@@ -148,364 +345,80 @@ async def accident_detection_websocket(websocket: WebSocket):
             del active_connections[connection_id]
         if connection_id in detected_accidents:
             del detected_accidents[connection_id]
-        if connection_id in traces:
-            del traces[connection_id]
-        if connection_id in tracker_instances:
-            del tracker_instances[connection_id]
+        await camera_sessions.unsubscribe(connection_id)
+        send_queue.close()
         if connection_id in cctv_metadata:
             del cctv_metadata[connection_id]
         logging.info(f"Cleaned up connection: {connection_id}")
 
-def save_accident_image(frame, connection_id: str, frame_number: int) -> Optional[str]:
-    if frame is None:
-        logging.error("No frame provided to save_accident_image")
-        return None
-    
+def run_video_job(job: VideoJob) -> Dict:
+    """Processes an uploaded video on a job worker thread once the model is ready"""
+    if not model_loader.wait():
+        raise RuntimeError(f"Model failed to load: {model_loader.error}")
+    pipeline = model_loader.pipeline
+    roi = job.options.get("roi")
+    context = pipeline.new_context(job.job_id, RegionOfInterest(roi) if roi else None)
+    result = pipeline.process_video(job.video_path, progress=job.report_progress, context=context)
+    return {
+        "result": result,
+        "accident_detected": result == "Accident detected",
+        "frames_processed": job.frames_processed,
+        "inference_gate": context.inference_gate.stats(),
+        "clips": [
+            {"clip_url": f"/accident_clips/{path.name}", "path": str(path), "size_bytes": path.stat().st_size}
+            for path in context.saved_clips()
+        ],
+    }
+
+video_jobs = VideoJobQueue(run_video_job)
+
+def get_job(job_id: str) -> VideoJob:
+    job = video_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+async def save_upload(upload: UploadFile, destination: Path) -> int:
+    """Copies an upload to disk chunk by chunk, never holding the whole file in memory; returns its size"""
+    temporary = destination.with_name(destination.name + ".part")
+    size_bytes = 0
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = uuid.uuid4().hex[:8]
-        filename = f"accident_{timestamp}_{unique_id}.jpg"
-        
-        backend_path = ACCIDENT_IMAGES_DIR / filename
-        public_path = PUBLIC_IMAGES_DIR / filename
-        
-        cv2.imwrite(str(backend_path), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-        
-        if not backend_path.exists() or backend_path.stat().st_size == 0:
-            logging.error(f"Failed to create valid image file at {backend_path}")
-            return None
-        
-        try:
-            import shutil
-            shutil.copy2(str(backend_path), str(public_path))
-            logging.info(f"Copied image to public directory: {public_path}")
-        except Exception as e:
-            logging.error(f"Failed to copy to public directory: {str(e)}")
-
-        return f"/accident_images/{filename}"
-        
-    except Exception as e:
-        logging.error(f"Error saving accident image: {str(e)}")
-        logging.error(traceback.format_exc())
-        return None
+        with open(temporary, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size_bytes += len(chunk)
+                if size_bytes > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {UPLOAD_MAX_BYTES} bytes")
+                await run_in_threadpool(f.write, chunk)
+        os.replace(temporary, destination)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+    finally:
+        await upload.close()
+    return size_bytes
+
+camera_workers = CameraWorkerPool(CAMERA_WORKERS, save_accident_image) if CAMERA_WORKERS > 0 else None
+camera_sessions = CameraSessionRegistry(inference_scheduler, save_accident_image, camera_workers)
 
-async def process_video_stream(websocket: WebSocket, video_url: str, connection_id: str):
+async def process_video_stream(send_queue: ClientSendQueue, video_url: str, connection_id: str,
+                               frame_format: str = "json", subscription: str = "full"):
+    """Attaches the connection to the shared session of its camera without blocking the receive loop"""
     try:
-        frame_buffers[connection_id] = deque(maxlen=BUFFER_SIZE)
-        traces[connection_id] = {}
-        
-        tracker = sv.ByteTrack(
-            track_activation_threshold=0.25,
-            lost_track_buffer=30,
-            minimum_matching_threshold=0.8,
-            frame_rate=24
-        )
-        tracker_instances[connection_id] = tracker
-        
-        frame_count = 0
-        accident_found = False
-        in_accident_sequence = False
-        post_accident_frame_count = 0
-        last_accident_frame = 0
-        in_accident_state = False
-        accident_state_frames = 0
-        detected_accident_type = None
-        detected_confidence = None
-        
         if video_url.startswith('/'):
             video_path = f"../frontend/public{video_url}"
         else:
             video_path = video_url
-            
-        logging.info(f"Opening video from: {video_path}")
-        cap = cv2.VideoCapture(video_path)
-        
-        if not cap.isOpened():
-            raise Exception(f"Could not open video file: {video_path}")
-            
-        original_fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        target_fps = min(original_fps, 24.0)
-        frame_interval = 1.0 / target_fps
-        
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        scale_factor = 1.0
-        if width > 1280:
-            scale_factor = 1280 / width
-            width = 1280
-            height = int(height * scale_factor)
-        
-        logging.info(f"Video opened: {width}x{height}, Original FPS: {original_fps}, Target FPS: {target_fps}")
-        
-        await websocket.send_json({
-            "type": "video_info",
-            "width": width,
-            "height": height,
-            "fps": target_fps,
-            "original_fps": original_fps,
-            "total_frames": total_frames,
-            "message": f"Processing video at {target_fps} FPS ({width}x{height})",
-            "severity": "info"
-        })
-        
-        processing_time_avg = 0.0
-        frame_times = []
-        last_frame_time = asyncio.get_event_loop().time()
-        
-        box_annotator = sv.BoxAnnotator(thickness=2)
-            
-        while cap.isOpened():
-            batch_start_time = asyncio.get_event_loop().time()
-            
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            frame_count += 1
-            
-            if scale_factor < 1.0:
-                frame = cv2.resize(frame, (width, height))
-                
-            frame_buffers[connection_id].append(frame.copy())
-            
-            boxes, class_ids, confidences = pipeline.model_trainer.detect_objects(frame)
-
-            if boxes is not None and hasattr(boxes, "shape") and boxes.shape[0] > 0:
-                boxes_np = np.array(boxes, dtype=np.float32)
-                confidences_np = np.array(confidences, dtype=np.float32)
-                class_ids_np = np.array(class_ids, dtype=np.int32)
-
-                detections = sv.Detections(
-                    xyxy=boxes_np,
-                    confidence=confidences_np,
-                    class_id=class_ids_np
-                )
-                tracked_detections = tracker.update_with_detections(detections)
-            else:
-                tracked_detections = sv.Detections.empty()
-            
-            display_frame = frame.copy()
-            
-            accident_indices = []
-            accident_detected = False
-            
-            if len(tracked_detections) > 0:
-                for i in range(len(tracked_detections)):
-                    track_id = tracked_detections.tracker_id[i]
-                    if track_id is None:
-                        continue
-                        
-                    class_id = int(tracked_detections.class_id[i])
-                    confidence = float(tracked_detections.confidence[i])
-                    
-                    is_accident = class_id in ACCIDENT_CLASS_IDS
-                            
-                    if is_accident and confidence >= pipeline.CONFIDENCE_THRESHOLD:
-                        accident_indices.append(i)
-                        accident_detected = True
-                    
-                    if track_id not in traces[connection_id]:
-                        traces[connection_id][track_id] = deque(maxlen=MAX_TRACE_POINTS)
-                    
-                    bbox = tracked_detections.xyxy[i]
-                    center_x = int((bbox[0] + bbox[2]) / 2)
-                    center_y = int((bbox[1] + bbox[3]) / 2)
-                    traces[connection_id][track_id].append((center_x, center_y))
-            
-            labels = []
-            colors = []
-            
-            for i in range(len(tracked_detections)):
-                track_id = tracked_detections.tracker_id[i]
-                if track_id is None:
-                    continue
-                    
-                class_id = int(tracked_detections.class_id[i])
-                conf = float(tracked_detections.confidence[i])
-                
-                class_name = CLASS_NAMES.get(class_id, "Unknown")
-                label = f"{class_name} {track_id}: {conf:.2f}"
-                labels.append(label)
-                
-                is_accident = False
-                for acid in ACCIDENT_CLASS_IDS:
-                    if class_id == acid:
-                        is_accident = True
-                        break
-                        
-                if is_accident:
-                    colors.append((0, 0, 255))
-                elif class_id == 0:
-                    colors.append((0, 165, 255))
-                elif class_id == 4:
-                    colors.append((0, 255, 0))
-                else:
-                    colors.append((255, 255, 255)) 
-            
-            vehicle_mask = []
-            for i in range(len(tracked_detections)):
-                c_id = int(tracked_detections.class_id[i])
-                vehicle_mask.append(c_id == 0 or c_id == 4)
-            non_vehicle_mask = [not vm for vm in vehicle_mask]
-
-            non_vehicle_detections = tracked_detections[non_vehicle_mask]
-
-            if len(non_vehicle_detections) > 0:
-                box_annotator.annotate(
-                    scene=display_frame,
-                    detections=non_vehicle_detections)
-            
-            for track_id, trace_points in traces[connection_id].items():
-                if len(trace_points) < 2:
-                    continue
-                
-                track_class_id = -1
-                for i in range(len(tracked_detections)):
-                    current_track_id = tracked_detections.tracker_id[i]
-                    if current_track_id is not None and int(current_track_id) == int(track_id):
-                        track_class_id = int(tracked_detections.class_id[i])
-                        break
-                
-                if track_class_id == 0 or track_class_id == 4:
-                    color = (0, 165, 255) if track_class_id == 0 else (0, 255, 0)
-                    points = np.array(list(trace_points), dtype=np.int32)
-                    cv2.polylines(display_frame, [points], False, color, 3)
-                    
-                    if len(trace_points) >= 1:
-                        end_pt = trace_points[-1]
-                        cv2.circle(display_frame, end_pt, 5, color, -1)
-                
-                else:
-                    is_accident = False
-                    for acid in ACCIDENT_CLASS_IDS:
-                        if track_class_id == acid:
-                            is_accident = True
-                            break
-                            
-                    if is_accident:
-                        color = (0, 0, 255)
-                        points = np.array(list(trace_points), dtype=np.int32)
-                        cv2.polylines(display_frame, [points], False, color, 3)
-                        
-                        if len(trace_points) >= 1:
-                            end_pt = trace_points[-1]
-                            cv2.circle(display_frame, end_pt, 6, color, -1)
-                    
-            if accident_detected and not in_accident_state:
-                last_accident_frame = frame_count
-                in_accident_state = True
-                accident_state_frames = 0
-                accident_found = True
-                in_accident_sequence = True
-                post_accident_frame_count = 0
-                
-                if accident_indices:
-                    i = accident_indices[0]
-                    confidence = float(tracked_detections.confidence[i])
-                    class_id = int(tracked_detections.class_id[i])
-                    class_name = CLASS_NAMES.get(class_id, "Unknown")
-                    
-                    detected_accident_type = class_name
-                    detected_confidence = confidence
-                    
-                    location = "Unknown location"
-                    if connection_id in cctv_metadata:
-                        meta = cctv_metadata[connection_id]
-                        if meta.get("latitude") is not None and meta.get("longitude") is not None:
-                            location = format_location(meta["latitude"], meta["longitude"])
-                    
-                    await websocket.send_json({
-                        "type": "accident",
-                        "accident_detected": True,
-                        "frame_number": frame_count,
-                        "confidence": confidence,
-                        "accident_type": class_name,
-                        "location": location,
-                        "message": f"{class_name} detected at frame {frame_count}",
-                        "severity": "error",
-                        "timestamp": datetime.now().timestamp()
-                    })
-                    
-                    image_url = save_accident_image(display_frame, connection_id, frame_count)
-                    
-                    if image_url:
-                        await websocket.send_json({
-                            "type": "image_saved",
-                            "message": f"Accident image saved: {image_url}",
-                            "severity": "info",
-                            "image_url": image_url,
-                            "frame_number": frame_count,
-                            "accident_type": class_name,
-                            "confidence": confidence,
-                            "location": location,
-                            "timestamp": datetime.now().timestamp()
-                        })
-            
-            if in_accident_state:
-                accident_state_frames += 1
-                if accident_state_frames >= ACCIDENT_STATE_DURATION:
-                    in_accident_state = False
-            
-            _, buffer = cv2.imencode('.jpg', display_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            encoded_frame = base64.b64encode(buffer).decode('utf-8')
-            
-            await websocket.send_json({
-                "type": "frame",
-                "frame": encoded_frame,
-                "frame_number": frame_count,
-                "timestamp": datetime.now().timestamp(),
-                "display_time": frame_count / original_fps,
-                "total_frames": total_frames,
-                "progress": frame_count / total_frames if total_frames > 0 else 0
-            })
-        
-            if frame_count % 30 == 0:
-                await websocket.send_json({
-                    "type": "progress",
-                    "message": f"Processed {frame_count} of {total_frames} frames",
-                    "severity": "info",
-                    "frame_count": frame_count,
-                    "progress": frame_count / total_frames if total_frames > 0 else 0
-                })
-            
-            current_time = asyncio.get_event_loop().time()
-            processing_time = current_time - batch_start_time
-            frame_times.append(processing_time)
-            
-            if len(frame_times) > 10:
-                frame_times.pop(0)
-            processing_time_avg = sum(frame_times) / len(frame_times)
-            
-            elapsed = current_time - last_frame_time
-            sleep_time = max(0, frame_interval - elapsed)
-            
-            await asyncio.sleep(sleep_time)
-            last_frame_time = asyncio.get_event_loop().time()
 
-        cap.release()
-        
-        location = "Unknown location"
-        meta = cctv_metadata.get(connection_id, {})
-        if meta.get("latitude") is not None and meta.get("longitude") is not None:
-            location = format_location(meta["latitude"], meta["longitude"])
-        
-        await websocket.send_json({
-            "type": "processing_complete",
-            "message": "Video processing completed",
-            "severity": "info",
-            "accident_found": accident_found,
-            "total_frames": frame_count,
-            "location": location,
-            "timestamp": datetime.now().timestamp()
-        })
-            
+        await camera_sessions.subscribe(connection_id, send_queue, video_path, cctv_metadata.get(connection_id),
+                                        frame_format, subscription)
+
     except Exception as e:
         logging.error(f"Error processing video: {str(e)}")
         logging.error(traceback.format_exc())
-        await websocket.send_json({
+        send_queue.put({
             "type": "error",
             "message": f"Error processing video: {str(e)}",
             "severity": "error"
@@ -523,19 +436,56 @@ async def detect_image(file: UploadFile = File(...)):
     contents = await file.read()
     nparr = np.frombuffer(contents, np.uint8)
     img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    result = pipeline.process_frame(img)
+    result = await run_in_threadpool(get_pipeline().process_frame, img)
     return JSONResponse(content={"result": result})
 
-@app.post("/detect/video")
-async def detect_video(file: UploadFile = File(...)):
-    contents = await file.read()
+@app.post("/detect/video", status_code=202)
+async def detect_video(file: UploadFile = File(...), roi: Optional[str] = Form(None)):
+    """Streams the upload to disk and queues it; poll /jobs/{job_id} for progress and /jobs/{job_id}/result.
+    roi is an optional JSON list of [x, y] polygon points (pixels or 0..1) detection is restricted to"""
+    try:
+        roi_polygon = parse_roi(json.loads(roi)) if roi else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ROI: {str(e)}")
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    video_path = os.path.join("uploads", f"videoUpload_{timestamp}.mp4")
-    os.makedirs("uploads", exist_ok=True)
-    
-    with open(video_path, "wb") as f:
-        f.write(contents)
-    
-    pipeline.reset_state()
-    result = pipeline.process_video(video_path)
-    return JSONResponse(content={"result": result})
\ No newline at end of file
+    video_path = UPLOADS_PATH / f"videoUpload_{timestamp}_{uuid.uuid4().hex[:8]}.mp4"
+    size_bytes = await save_upload(file, video_path)
+
+    try:
+        job = video_jobs.submit(str(video_path), file.filename, size_bytes, {"roi": roi_polygon})
+    except queue.Full:
+        video_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=503, detail="Too many videos waiting to be processed",
+                            headers={"Retry-After": "30"})
+    return {
+        **job.status(),
+        "status_url": f"/jobs/{job.job_id}",
+        "result_url": f"/jobs/{job.job_id}/result",
+    }
+
+@app.get("/jobs")
+async def list_jobs():
+    """Queued, running and recently finished video jobs, newest first"""
+    return {"jobs": [job.status() for job in video_jobs.list()], **video_jobs.stats()}
+
+@app.get("/jobs/stats")
+async def job_stats():
+    """Worker, pending and completion counts of the video job queue, and of the parallel video processes if enabled"""
+    stats = video_jobs.stats()
+    pipeline = model_loader.pipeline
+    if pipeline is not None and pipeline.parallel_workers > 1:
+        stats["parallel"] = pipeline.parallel.stats()
+    return stats
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """State and progress (frames processed out of total) of a video job"""
+    return get_job(job_id).status()
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    """Detection result and saved clip URLs of a finished video job"""
+    job = get_job(job_id)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=job.status())
+    return {**job.status(), "result": job.result}
@@ -0,0 +1,131 @@
+"""
+Micro-benchmark for per-frame annotation cost.
+
+Compares the original per-detection Python loops with FrameAnnotator on
+synthetic tracked detections and full-length traces, and checks that both
+draw the same pixels. Exits with status 1 if any frame differs.
+
+Usage: python -m benchmarks.annotation_benchmark --objects 50 100 --iterations 200
+"""
+import argparse
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+import supervision as sv
+
+from Nirikshan.components.frame_annotator import FrameAnnotator
+from Nirikshan.constant.training_pipeline import ACCIDENT_CLASS_IDS, CLASS_NAMES, MAX_TRACE_POINTS
+
+
+def synthetic_scene(objects, width=1280, height=720, seed=0):
+    rng = np.random.default_rng(seed)
+    top_left = rng.uniform([0, 0], [width - 120, height - 120], size=(objects, 2))
+    xyxy = np.hstack([top_left, top_left + rng.uniform(20, 120, size=(objects, 2))]).astype(np.float32)
+    class_ids = rng.choice([0, 4, 9] + ACCIDENT_CLASS_IDS, size=objects).astype(np.int32)
+    detections = sv.Detections(
+        xyxy=xyxy,
+        confidence=rng.uniform(0.3, 1.0, size=objects).astype(np.float32),
+        class_id=class_ids,
+        tracker_id=np.arange(1, objects + 1),
+    )
+    traces = {}
+    for track_id, (x, y) in zip(detections.tracker_id.tolist(), top_left.astype(int).tolist()):
+        steps = rng.integers(-4, 5, size=(MAX_TRACE_POINTS, 2)).cumsum(axis=0)
+        traces[track_id] = deque(((x + dx, y + dy) for dx, dy in steps.tolist()), maxlen=MAX_TRACE_POINTS)
+    # stale tracks that are no longer detected, as on a long-running camera
+    for track_id in range(objects + 1, objects * 4 + 1):
+        traces[track_id] = deque([(10, 10), (20, 20)], maxlen=MAX_TRACE_POINTS)
+    return np.zeros((height, width, 3), dtype=np.uint8), detections, traces
+
+
+def legacy_annotate(display_frame, tracked_detections, traces, box_annotator):
+    """The annotation loops as they were in process_video_stream."""
+    labels = []
+    colors = []
+    for i in range(len(tracked_detections)):
+        track_id = tracked_detections.tracker_id[i]
+        if track_id is None:
+            continue
+        class_id = int(tracked_detections.class_id[i])
+        conf = float(tracked_detections.confidence[i])
+        labels.append(f"{CLASS_NAMES.get(class_id, 'Unknown')} {track_id}: {conf:.2f}")
+        is_accident = False
+        for acid in ACCIDENT_CLASS_IDS:
+            if class_id == acid:
+                is_accident = True
+                break
+        if is_accident:
+            colors.append((0, 0, 255))
+        elif class_id == 0:
+            colors.append((0, 165, 255))
+        elif class_id == 4:
+            colors.append((0, 255, 0))
+        else:
+            colors.append((255, 255, 255))
+
+    vehicle_mask = []
+    for i in range(len(tracked_detections)):
+        c_id = int(tracked_detections.class_id[i])
+        vehicle_mask.append(c_id == 0 or c_id == 4)
+    non_vehicle_detections = tracked_detections[[not vm for vm in vehicle_mask]]
+    if len(non_vehicle_detections) > 0:
+        box_annotator.annotate(scene=display_frame, detections=non_vehicle_detections)
+
+    for track_id, trace_points in traces.items():
+        if len(trace_points) < 2:
+            continue
+        track_class_id = -1
+        for i in range(len(tracked_detections)):
+            current_track_id = tracked_detections.tracker_id[i]
+            if current_track_id is not None and int(current_track_id) == int(track_id):
+                track_class_id = int(tracked_detections.class_id[i])
+                break
+        if track_class_id == 0 or track_class_id == 4:
+            color = (0, 165, 255) if track_class_id == 0 else (0, 255, 0)
+            cv2.polylines(display_frame, [np.array(list(trace_points), dtype=np.int32)], False, color, 3)
+            cv2.circle(display_frame, trace_points[-1], 5, color, -1)
+        elif track_class_id in ACCIDENT_CLASS_IDS:
+            cv2.polylines(display_frame, [np.array(list(trace_points), dtype=np.int32)], False, (0, 0, 255), 3)
+            cv2.circle(display_frame, trace_points[-1], 6, (0, 0, 255), -1)
+    return display_frame
+
+
+def time_per_frame(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def differing_pixels(legacy_frame, frame):
+    return int(np.count_nonzero((legacy_frame != frame).any(axis=2)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    annotator = FrameAnnotator()
+    box_annotator = sv.BoxAnnotator(thickness=2)
+    mismatches = 0
+    print(f"{'objects':>8} {'legacy ms':>10} {'vectorized ms':>14} {'speedup':>8} {'diff px':>8}")
+    for objects in args.objects:
+        scene, detections, traces = synthetic_scene(objects, seed=objects)
+        diff = differing_pixels(legacy_annotate(scene.copy(), detections, traces, box_annotator),
+                                annotator.annotate(scene.copy(), detections, traces))
+        mismatches += diff > 0
+        legacy = time_per_frame(lambda: legacy_annotate(scene.copy(), detections, traces, box_annotator),
+                                args.iterations)
+        vectorized = time_per_frame(lambda: annotator.annotate(scene.copy(), detections, traces), args.iterations)
+        print(f"{objects:>8} {legacy:>10.3f} {vectorized:>14.3f} {legacy / vectorized:>7.1f}x {diff:>8}")
+    if mismatches:
+        print(f"FrameAnnotator output differs from the legacy loops in {mismatches} scene(s)")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
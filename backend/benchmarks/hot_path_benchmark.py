@@ -0,0 +1,326 @@
+"""
+Throughput benchmark for the detection hot path.
+
+Times ModelTrainer.detect_objects, the ByteTrack update, annotation, JPEG
+encode and TrainingPipeline.process_video on generated synthetic videos at
+several resolutions and object densities. With --stub-model the YOLO runtime
+is replaced by a deterministic stub backend (preprocessing and box mapping
+still run), so the suite needs neither weights nor a GPU. Results are written
+as JSON and can be compared against a previous run to catch regressions.
+
+Usage:
+    python -m benchmarks.hot_path_benchmark --stub-model --output bench.json
+    python -m benchmarks.hot_path_benchmark --stub-model --compare bench.json --tolerance 0.15
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import logging
+
+import cv2
+import numpy as np
+import supervision as sv
+import torch
+
+from Nirikshan.components.frame_annotator import FrameAnnotator
+from Nirikshan.components.inference_backends import InferenceBackend
+from Nirikshan.components.inference_scheduler import summarize_timings
+from Nirikshan.components.model_pool import ModelTrainerPool
+from Nirikshan.components.model_trainer import ModelTrainer
+from Nirikshan.components.track_history import TrackHistoryStore
+from Nirikshan.constant.application import STREAM_JPEG_QUALITY
+from Nirikshan.constant.training_pipeline import ACCIDENT_CLASS_IDS, TRACKER_LOST_TRACK_BUFFER
+
+STAGES = ("detect_objects", "bytetrack", "annotate", "jpeg_encode", "process_video")
+# each of these consumes the output of the one before it
+FRAME_STAGES = STAGES[:4]
+
+
+class StubBackend(InferenceBackend):
+    """
+    Stands in for the YOLO runtime: returns `objects` boxes per image that
+    drift a little every call, with a fixed share of accident classes, and
+    optionally sleeps to emulate model latency.
+    """
+    name = "stub"
+
+    def __init__(self, objects: int, latency_ms: float = 0.0, seed: int = 0):
+        super().__init__("stub", torch.device("cpu"))
+        self.model = None
+        self.objects = objects
+        self.latency = latency_ms / 1000.0
+        rng = np.random.default_rng(seed)
+        self._origins = rng.uniform(0.0, 0.85, size=(objects, 2)).astype(np.float32)
+        self._sizes = rng.uniform(0.03, 0.15, size=(objects, 2)).astype(np.float32)
+        self._velocities = rng.uniform(-0.002, 0.002, size=(objects, 2)).astype(np.float32)
+        self._class_ids = rng.choice([0, 4, 9] + ACCIDENT_CLASS_IDS, size=objects,
+                                     p=[0.3, 0.4, 0.16] + [0.02] * len(ACCIDENT_CLASS_IDS)).astype(np.float32)
+        self._confidences = rng.uniform(0.3, 1.0, size=objects).astype(np.float32)
+        self._calls = 0
+
+    def predict(self, batch):
+        if self.latency:
+            time.sleep(self.latency * batch.shape[0])
+        height, width = batch.shape[2:]
+        scale = np.array([width, height, width, height], dtype=np.float32)
+        outputs = []
+        for _ in range(batch.shape[0]):
+            self._calls += 1
+            top_left = (self._origins + self._velocities * self._calls) % 0.85
+            boxes = np.hstack([top_left, top_left + self._sizes]) * scale
+            outputs.append((boxes, self._class_ids.copy(), self._confidences.copy()))
+        return outputs
+
+
+def synthetic_frames(width: int, height: int, objects: int, count: int, seed: int = 0):
+    """Yields frames of a textured road scene with `objects` rectangles moving across it."""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(40, 200, size=(height, width, 3), dtype=np.uint8), (0, 0), 3)
+    positions = rng.uniform([0, 0], [width, height], size=(objects, 2))
+    velocities = rng.uniform(-6, 6, size=(objects, 2))
+    sizes = rng.uniform(0.03, 0.12, size=(objects, 2)) * [width, height]
+    colors = rng.integers(0, 256, size=(objects, 3)).tolist()
+    for _ in range(count):
+        frame = background.copy()
+        positions = (positions + velocities) % [width, height]
+        for (x, y), (w, h), color in zip(positions.astype(int), sizes.astype(int), colors):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1)
+        yield frame
+
+
+def write_video(path: Path, frames, width: int, height: int, fps: float = 30.0) -> Path:
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def measure(function, inputs, warmup: int):
+    """Runs function over inputs, discarding the first `warmup` timings; returns timings in seconds."""
+    timings = []
+    for index, item in enumerate(inputs):
+        started = time.perf_counter()
+        function(item)
+        if index >= warmup:
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def result_entry(resolution: str, objects: int, stage: str, timings, frames: int = None, seconds: float = None):
+    ms = summarize_timings(timings)
+    if frames is None:
+        frames, seconds = len(timings), sum(timings)
+    return {
+        "resolution": resolution,
+        "objects": objects,
+        "stage": stage,
+        "ms": ms,
+        "fps": round(frames / seconds, 2) if seconds else None,
+    }
+
+
+def build_trainer(args, objects: int) -> ModelTrainer:
+    if args.stub_model:
+        return ModelTrainer(backend=StubBackend(objects, args.stub_latency_ms, args.seed))
+    return ModelTrainer()
+
+
+def stub_pipeline(objects: int, latency_ms: float, seed: int):
+    """Sequential pipeline on the stub backend for the parallel process_video workers (picklable via partial)."""
+    from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+    return TrainingPipeline(model_pool=ModelTrainerPool(
+        factory=lambda: ModelTrainer(backend=StubBackend(objects, latency_ms, seed)), size=1), parallel_workers=0)
+
+
+def run_scenario(args, width: int, height: int, objects: int, workdir: Path, stages=STAGES):
+    """
+    Times the selected stages on one synthetic video. Unselected frame stages
+    only run, untimed, when a selected later stage needs their output.
+    """
+    from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+
+    resolution = f"{width}x{height}"
+    frames = list(synthetic_frames(width, height, objects, args.frames, args.seed))
+    results = []
+    selected = [stage for stage in FRAME_STAGES if stage in stages]
+    needed = FRAME_STAGES[:FRAME_STAGES.index(selected[-1]) + 1] if selected else ()
+
+    def run_stage(stage, function, inputs):
+        if stage in stages:
+            results.append(result_entry(resolution, objects, stage, measure(function, inputs, args.warmup)))
+        else:
+            for item in inputs:
+                function(item)
+
+    if needed:
+        trainer = build_trainer(args, objects)
+        detections = []
+
+        def detect(frame):
+            detections.append(trainer.detect_objects(frame))
+        run_stage("detect_objects", detect, frames)
+
+    if "bytetrack" in needed:
+        tracker = sv.ByteTrack(track_activation_threshold=0.25, lost_track_buffer=TRACKER_LOST_TRACK_BUFFER,
+                               minimum_matching_threshold=0.8, frame_rate=24)
+        inputs = [sv.Detections(xyxy=np.asarray(boxes, dtype=np.float32),
+                                confidence=np.asarray(confidences, np.float32),
+                                class_id=np.asarray(class_ids, dtype=np.int32))
+                  for boxes, class_ids, confidences in detections]
+        tracked = []
+
+        def track(item):
+            tracked.append(tracker.update_with_detections(item))
+        run_stage("bytetrack", track, inputs)
+
+    if "annotate" in needed:
+        annotator = FrameAnnotator()
+        traces = TrackHistoryStore(ttl_frames=TRACKER_LOST_TRACK_BUFFER)
+        annotated = []
+
+        def annotate(item):
+            frame, tracked_detections = item
+            if len(tracked_detections) and tracked_detections.tracker_id is not None:
+                xyxy = tracked_detections.xyxy
+                traces.update(tracked_detections.tracker_id.tolist(),
+                              ((xyxy[:, :2] + xyxy[:, 2:]) / 2).astype(np.int32))
+            else:
+                traces.update((), None)
+            annotated.append(annotator.annotate(frame.copy(), tracked_detections, traces))
+        run_stage("annotate", annotate, list(zip(frames, tracked)))
+
+    if "jpeg_encode" in needed:
+        def encode(frame):
+            cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, STREAM_JPEG_QUALITY])
+        run_stage("jpeg_encode", encode, annotated)
+
+    if "process_video" not in stages:
+        return results
+    video_path = write_video(workdir / f"synthetic_{resolution}_{objects}.mp4", frames, width, height)
+    parallel = None
+    if args.stub_model and args.parallel_workers > 1:
+        from Nirikshan.pipeline.parallel_video import ParallelVideoProcessor
+        parallel = ParallelVideoProcessor(args.parallel_workers, pipeline_factory=functools.partial(
+            stub_pipeline, objects, args.stub_latency_ms, args.seed))
+    pipeline = TrainingPipeline(model_pool=ModelTrainerPool(factory=lambda: build_trainer(args, objects), size=1),
+                                parallel_workers=args.parallel_workers, parallel=parallel)
+    pipeline.ACCIDENT_CLIPS_DIR = workdir
+    runs = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        context = pipeline.new_context(video_path.name)
+        pipeline.process_video(video_path, context=context)
+        runs.append(time.perf_counter() - started)
+    pipeline.close()
+    best = min(runs)
+    results.append(result_entry(resolution, objects, "process_video", [run / args.frames for run in runs],
+                                frames=args.frames, seconds=best))
+    return results
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "supervision": getattr(sv, "__version__", None),
+        "args": vars(args),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float):
+    """
+    Compares p50 timings stage by stage.
+
+    :return: List of (key, baseline_ms, current_ms, ratio, regressed) rows
+    """
+    def index(report):
+        return {(entry["resolution"], entry["objects"], entry["stage"]): entry for entry in report["results"]}
+
+    previous = index(baseline)
+    rows = []
+    for key, entry in index(current).items():
+        if key not in previous:
+            continue
+        before, after = previous[key]["ms"]["p50"], entry["ms"]["p50"]
+        ratio = after / before if before else float("inf")
+        rows.append((key, before, after, ratio, ratio > 1.0 + tolerance))
+    return rows
+
+
+def parse_resolution(value: str):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs="+", default=["640x360", "1280x720", "1920x1080"])
+    parser.add_argument("--objects", type=int, nargs="+", default=[5, 25, 100])
+    parser.add_argument("--frames", type=int, default=120, help="Frames per synthetic video")
+    parser.add_argument("--warmup", type=int, default=10, help="Leading iterations excluded from the stage timings")
+    parser.add_argument("--repeat", type=int, default=3, help="process_video runs per scenario (best is reported)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--stub-model", action="store_true", help="Use the stub backend instead of best.pt")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Emulated stub inference time per frame")
+    parser.add_argument("--parallel-workers", type=int, default=0, help="process_video worker processes")
+    parser.add_argument("--threads", type=int, default=None, help="Pin OpenCV and torch to this many threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's per-frame INFO logs")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p50 slowdown before a regression")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+        torch.set_num_threads(args.threads)
+
+    report = {"meta": metadata(args), "results": []}
+    with tempfile.TemporaryDirectory(prefix="nirikshan_bench_") as workdir:
+        for width, height in map(parse_resolution, args.resolutions):
+            for objects in args.objects:
+                entries = run_scenario(args, width, height, objects, Path(workdir), args.stages)
+                report["results"].extend(entries)
+                for entry in entries:
+                    print(f"{entry['resolution']:>10} {entry['objects']:>5} {entry['stage']:>15} "
+                          f"p50 {entry['ms']['p50']:>9.3f} ms  p95 {entry['ms']['p95']:>9.3f} ms  {entry['fps']:>9} fps")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        rows = compare(report, baseline, args.tolerance)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for (resolution, objects, stage), before, after, ratio, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"{resolution:>10} {objects:>5} {stage:>15} {before:>9.3f} -> {after:>9.3f} ms {ratio:>6.2f}x {flag}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Checks that chunked parallel video processing flags the same frames as a
+sequential run while the inference gate is on.
+
+A synthetic video encodes, per frame, whether the stub model sees nothing, a
+low-confidence accident candidate (which makes the gate hold full rate) or an
+accident, so any drift in which frames the gate infers changes the flags.
+The gate is configured through the usual environment variables; without
+them this check uses NIRIKSHAN_INFERENCE_STRIDE=5. The scene is written as an
+mp4v clip (every seek exact) and, if PyAV is installed, as H.264 with long
+GOPs and B-frames, at a constant and at a variable frame rate, where chunks
+have to find their first frame without trusting the seek. Exits with status
+1 if the flags or the gate statistics differ for any of them.
+
+Usage:
+    python -m benchmarks.parallel_video_check
+    NIRIKSHAN_MOTION_GATE=1 python -m benchmarks.parallel_video_check --overlap 0 --codecs h264-vfr
+"""
+import argparse
+import fractions
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("NIRIKSHAN_INFERENCE_STRIDE", "5")
+
+import cv2
+import numpy as np
+import torch
+
+from Nirikshan.components.inference_backends import InferenceBackend
+from Nirikshan.components.model_pool import ModelTrainerPool
+from Nirikshan.components.model_trainer import ModelTrainer
+
+# gray level of the centre square per scene state: nothing, candidate, accident
+STATE_LEVELS = (60, 130, 200)
+
+
+class SceneStubBackend(InferenceBackend):
+    """Reads the scene state back from the centre of the input: a car, plus an accident candidate or accident."""
+    name = "scene-stub"
+
+    def __init__(self):
+        super().__init__("stub", torch.device("cpu"))
+        self.model = None
+
+    def predict(self, batch):
+        height, width = batch.shape[2:]
+        centre = batch[:, :, height // 2 - 8:height // 2 + 8, width // 2 - 8:width // 2 + 8]
+        outputs = []
+        for level in (centre.mean(dim=(1, 2, 3)) * 255).tolist():
+            boxes = [[10, 10, 60, 60]]
+            class_ids = [4]
+            confidences = [0.9]
+            if level > (STATE_LEVELS[0] + STATE_LEVELS[1]) / 2:
+                boxes.append([width / 2 - 40, height / 2 - 40, width / 2 + 40, height / 2 + 40])
+                class_ids.append(6)
+                confidences.append(0.95 if level > (STATE_LEVELS[1] + STATE_LEVELS[2]) / 2 else 0.5)
+            outputs.append((np.array(boxes, np.float32), np.array(class_ids, np.float32),
+                            np.array(confidences, np.float32)))
+        return outputs
+
+
+def stub_pipeline():
+    """Builds the sequential pipeline of a pool process (picklable, so it can be handed to the pool)."""
+    from Nirikshan.pipeline.training_pipeline import TrainingPipeline
+    return TrainingPipeline(model_pool=ModelTrainerPool(factory=lambda: ModelTrainer(backend=SceneStubBackend()),
+                                                        size=1),
+                            parallel_workers=0)
+
+
+CODECS = ("mp4v", "h264", "h264-vfr")
+
+
+def scene_frames(frames: int, seed: int, width: int = 640, height: int = 360):
+    """Random runs of scene states, with a small square drifting across some of them for the motion gate."""
+    rng = np.random.default_rng(seed)
+    states = []
+    while len(states) < frames:
+        states.extend([int(rng.choice(3, p=[0.7, 0.15, 0.15]))] * int(rng.integers(3, 40)))
+    moving = []
+    while len(moving) < frames:
+        moving.extend([bool(rng.random() < 0.5)] * int(rng.integers(10, 80)))
+    x = 0
+    for index in range(frames):
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        level = STATE_LEVELS[states[index]]
+        cv2.rectangle(frame, (width // 2 - 100, height // 2 - 100), (width // 2 + 100, height // 2 + 100),
+                      (level, level, level), -1)
+        if moving[index]:
+            x = (x + 7) % (width - 60)
+        cv2.rectangle(frame, (x, 10), (x + 50, 60), (0, 0, 255), -1)
+        yield frame
+
+
+def write_h264(path: Path, frames, seed: int, variable_rate: bool, fps: int = 30):
+    """H.264 with 600-frame GOPs and B-frames; with variable_rate, frame durations vary between 20 and 66 ms."""
+    import av
+
+    rng = np.random.default_rng(seed)
+    container = av.open(str(path), "w")
+    stream = container.add_stream("libx264", rate=fps)
+    stream.pix_fmt = "yuv420p"
+    stream.options = {"crf": "18", "g": "600", "bf": "3"}
+    time_base = fractions.Fraction(1, 1000)
+    stream.time_base = stream.codec_context.time_base = time_base
+    pts = 0
+    for index, frame in enumerate(frames):
+        if index == 0:
+            stream.height, stream.width = frame.shape[:2]
+        video_frame = av.VideoFrame.from_ndarray(frame, format="bgr24")
+        video_frame.pts, video_frame.time_base = pts, time_base
+        pts += int(rng.choice([20, 33, 50, 66])) if variable_rate else 1000 // fps
+        for packet in stream.encode(video_frame):
+            container.mux(packet)
+    for packet in stream.encode():
+        container.mux(packet)
+    container.close()
+
+
+def write_scene_video(path: Path, frames: int, seed: int, codec: str = "mp4v") -> Path:
+    """Writes the scene with one of CODECS."""
+    if codec == "mp4v":
+        writer = None
+        for frame in scene_frames(frames, seed):
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (width, height))
+            writer.write(frame)
+        writer.release()
+    else:
+        write_h264(path, scene_frames(frames, seed), seed, variable_rate=codec == "h264-vfr")
+    return path
+
+
+def sequential_flags(pipeline, video_path: Path):
+    """Accident flag per frame and gate stats of a plain in-order run."""
+    context = pipeline.new_context(video_path.name)
+    cap = cv2.VideoCapture(str(video_path))
+    flags = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            flags.append(len(pipeline.detect_accidents(frame, context)[3]) > 0)
+    finally:
+        cap.release()
+    return flags, context.inference_gate.stats()
+
+
+def check(processor, video_path: Path, frames: int) -> list:
+    """Runs the video sequentially and in chunks; returns what differs."""
+    from Nirikshan.components.inference_gate import InferenceGate
+
+    expected, expected_stats = sequential_flags(stub_pipeline(), video_path)
+    chunks, reruns = processor.chunks, processor.chunks_rerun
+    flags, chunk_stats = processor.detect(str(video_path), frames)
+
+    gate = InferenceGate()
+    gate.merge_stats(chunk_stats)
+    merged_stats = gate.stats()
+    differing = [index for index, (a, b) in enumerate(zip(expected, flags)) if a != b]
+    print(f"{video_path.name}: gate stride {gate.stride}, motion {gate.motion}; {len(expected)} frames, "
+          f"{sum(expected)} flagged, {expected_stats['frames_inferred']} inferred sequentially; "
+          f"{processor.chunks - chunks} chunks, {processor.chunks_rerun - reruns} run again, "
+          f"{len(differing)} differing flags")
+    failures = []
+    if len(flags) != len(expected) or differing:
+        failures.append(f"flags differ (lengths {len(expected)}/{len(flags)}, first frames {differing[:10]})")
+    if merged_stats != expected_stats:
+        failures.append(f"gate stats differ: sequential {expected_stats}, parallel {merged_stats}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--chunk-frames", type=int, default=150)
+    parser.add_argument("--overlap", type=int, default=None, help="Warmup frames per chunk (default: configured)")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--codecs", default=",".join(CODECS), help=f"Comma-separated subset of {', '.join(CODECS)}")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    from Nirikshan.pipeline.parallel_video import ParallelVideoProcessor
+
+    codecs = [codec for codec in args.codecs.split(",") if codec]
+    unknown = set(codecs) - set(CODECS)
+    if unknown:
+        parser.error(f"unknown codecs: {', '.join(sorted(unknown))}")
+    if any(codec.startswith("h264") for codec in codecs):
+        try:
+            import av  # noqa: F401
+        except ImportError:
+            print("PyAV is not installed, skipping the H.264 videos")
+            codecs = [codec for codec in codecs if not codec.startswith("h264")]
+
+    options = {} if args.overlap is None else {"overlap_frames": args.overlap}
+    processor = ParallelVideoProcessor(args.workers, args.chunk_frames, torch_threads=1,
+                                       pipeline_factory=stub_pipeline, **options)
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="nirikshan_parallel_") as workdir:
+            for codec in codecs:
+                video_path = write_scene_video(Path(workdir) / f"scene-{codec}.mp4", args.frames, args.seed, codec)
+                failures.extend(f"{codec}: {failure}" for failure in check(processor, video_path, args.frames))
+    finally:
+        processor.close()
+    for failure in failures:
+        print(failure)
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
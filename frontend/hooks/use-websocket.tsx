@@ -8,9 +8,45 @@ type WebSocketStatus =
 	| 'closed'
 	| 'error';
 
+// Binary preview frames from /ws/detect: little-endian header of message type
+// (uint8), frame number (uint32), timestamp (float64) and progress (float32),
+// followed by the raw JPEG bytes.
+const BINARY_FRAME_TYPE = 1;
+const BINARY_FRAME_HEADER_SIZE = 17;
+
+export interface BinaryFrame {
+	type: 'frame';
+	binary: true;
+	frame_number: number;
+	timestamp: number;
+	progress: number;
+	image: Blob;
+}
+
+export function parseBinaryFrame(buffer: ArrayBuffer): BinaryFrame | null {
+	if (buffer.byteLength < BINARY_FRAME_HEADER_SIZE) {
+		return null;
+	}
+	const view = new DataView(buffer);
+	if (view.getUint8(0) !== BINARY_FRAME_TYPE) {
+		return null;
+	}
+	return {
+		type: 'frame',
+		binary: true,
+		frame_number: view.getUint32(1, true),
+		timestamp: view.getFloat64(5, true),
+		progress: view.getFloat32(13, true),
+		image: new Blob([buffer.slice(BINARY_FRAME_HEADER_SIZE)], {
+			type: 'image/jpeg',
+		}),
+	};
+}
+
 interface UseWebSocketOptions {
 	onOpen?: (event: Event) => void;
 	onMessage?: (event: MessageEvent) => void;
+	onBinaryFrame?: (frame: BinaryFrame) => void;
 	onClose?: (event: CloseEvent) => void;
 	onError?: (event: Event) => void;
 	reconnectOnClose?: boolean;
@@ -33,6 +69,7 @@ export function useWebSocket(
 	const {
 		onOpen,
 		onMessage,
+		onBinaryFrame,
 		onClose,
 		onError,
 		reconnectOnClose = true,
@@ -87,6 +124,7 @@ export function useWebSocket(
 			log(`Connecting to ${url}`);
 
 			const socket = new WebSocket(url);
+			socket.binaryType = 'arraybuffer';
 			socketRef.current = socket;
 
 			socket.onopen = event => {
@@ -97,6 +135,18 @@ export function useWebSocket(
 			};
 
 			socket.onmessage = event => {
+				if (event.data instanceof ArrayBuffer) {
+					const frame = parseBinaryFrame(event.data);
+					if (frame) {
+						setData(frame);
+						onBinaryFrame?.(frame);
+					} else {
+						warn('Ignoring unknown binary message');
+					}
+					onMessage?.(event);
+					return;
+				}
+
 				try {
 					log('Message received', event.data);
 					console.log(event);
@@ -148,6 +198,7 @@ export function useWebSocket(
 		url,
 		onOpen,
 		onMessage,
+		onBinaryFrame,
 		onClose,
 		onError,
 		reconnectOnClose,